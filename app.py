@@ -8,39 +8,57 @@ import datetime
 
 import time
 
-import requests
+import uuid
 
-import base64
+import pandas as pd
 
-import re
+from googleapiclient.errors import HttpError
 
-import pandas as pd
 
-import plotly.express as px
 
-import google.generativeai as genai
+import auth
 
-from googleapiclient.discovery import build
+import database
 
-from googleapiclient.http import MediaFileUpload
+import image_generation
 
-from google.oauth2.credentials import Credentials
+import http_client
 
-from google.auth.transport.requests import Request
+import video_assembly
 
-from googleapiclient.errors import HttpError
+import upload_queue
 
-from openai import OpenAI
+import write_behind
 
-# from moviepy.editor import *
+import youtube_credentials
 
-from PIL import Image, ImageDraw, ImageFont
+import channel_cache
 
+import channel_catalog
 
+import dashboard_snapshot
 
-import auth
+import session_settings
 
-import database
+import gemini_client
+
+import bulk_approval
+
+import video_metadata
+
+from lazy_imports import lazy_module
+
+
+
+# Heavy SDKs are imported on first use so pages that don't need them start faster
+
+# (see benchmarks/import_time.py)
+
+px = lazy_module("plotly.express")
+
+discovery = lazy_module("googleapiclient.discovery")
+
+googleapiclient_http = lazy_module("googleapiclient.http")
 
 
 
@@ -88,31 +106,11 @@ if not os.path.exists(ASSETS_DIR):
 
 
 
-# --- Load API Config on Startup ---
-
-if os.path.exists(API_CONFIG_FILE):
-
-    try:
+# --- API Config ---
 
-        with open(API_CONFIG_FILE, 'r') as f:
+# Keys and models are resolved per session by get_settings() (env < api_config.json < the user's
 
-            config = json.load(f)
-
-            for key, value in config.items():
-
-                if value:
-
-                    os.environ[key] = value
-
-                    # Configure libraries immediately if needed
-
-                    if key == "GOOGLE_API_KEY":
-
-                        genai.configure(api_key=value)
-
-    except Exception as e:
-
-        print(f"Error loading config: {e}")
+# stored keys) and passed explicitly to the helpers; os.environ is shared by every session.
 
 
 
@@ -132,6 +130,12 @@ if not st.session_state.logged_in:
 
     if auth.handle_oauth_callback():
 
+        # A (re)connected Google account can come with a new YouTube token or channel: drop the
+        # credentials and channel data this process still holds for the user
+        session_user = st.session_state['supabase_session'].user
+        youtube_credentials.get_manager(SCOPES).invalidate(session_user.id)
+        channel_cache.invalidate_user(session_user.id)
+
         st.rerun()
 
 
@@ -146,65 +150,17 @@ if 'logged_in' not in st.session_state or not st.session_state.logged_in:
 
         st.query_params["page"] = "home"
 
-        # Load keys from DB
-
         user = auth.get_current_user()
 
         if user:
 
             st.session_state.user = user # Cache user object
 
-            db_keys = database.get_user_api_keys(user.id)
-
-            for provider, data in db_keys.items():
-
-                if data['api_key']:
-
-                    # Map provider name to env var
-
-                    if provider == "Google Gemini":
-
-                        os.environ["GOOGLE_API_KEY"] = data['api_key']
-
-                        if data['model']: os.environ["GOOGLE_MODEL"] = data['model']
-
-                        genai.configure(api_key=data['api_key'])
-
-                    elif provider == "OpenAI (ChatGPT)":
-
-                        os.environ["OPENAI_API_KEY"] = data['api_key']
+            # Settings are re-resolved for the restored user on first use (get_settings)
 
-                        if data['model']: os.environ["OPENAI_MODEL"] = data['model']
+            st.session_state.pop('settings', None)
 
-                    elif provider == "Anthropic (Claude)":
 
-                        os.environ["ANTHROPIC_API_KEY"] = data['api_key']
-
-                        if data['model']: os.environ["ANTHROPIC_MODEL"] = data['model']
-
-                    elif provider == "Stability AI":
-
-                        os.environ["STABILITY_API_KEY"] = data['api_key']
-
-                        if data['model']: os.environ["STABILITY_MODEL"] = data['model']
-
-                    elif provider == "ElevenLabs":
-
-                        os.environ["ELEVENLABS_API_KEY"] = data['api_key']
-
-                        if data['model']: os.environ["ELEVENLABS_MODEL"] = data['model']
-
-                    elif provider == "Pexels":
-
-                        os.environ["PEXELS_API_KEY"] = data['api_key']
-
-                        if data['model']: os.environ["PEXELS_MODEL"] = data['model']
-
-                    elif provider == "Hugging Face":
-
-                        os.environ["HUGGINGFACE_API_TOKEN"] = data['api_key']
-
-                        if data['model']: os.environ["HUGGINGFACE_MODEL"] = data['model']
 
     else:
 
@@ -214,21 +170,23 @@ if 'logged_in' not in st.session_state or not st.session_state.logged_in:
 
 # --- Custom CSS for Premium Look ---
 
-@st.cache_data
+# Images are served by Streamlit's static file serving (enableStaticServing in .streamlit/config.toml)
+
+# from static/, optimized by optimize_static_assets.py, so reruns send a URL instead of the file
+
+STATIC_DIR = 'static'
 
-def get_base64_of_bin_file(bin_file):
 
-    with open(bin_file, 'rb') as f:
 
-        data = f.read()
+def static_asset_url(filename):
 
-    return base64.b64encode(data).decode()
+    """URL of a file in static/. The mtime query string busts the browser cache when the file changes."""
 
+    return f"app/static/{filename}?v={int(os.path.getmtime(os.path.join(STATIC_DIR, filename)))}"
 
 
-def set_png_as_page_bg(png_file):
 
-    bin_str = get_base64_of_bin_file(png_file)
+def set_page_bg(image_url):
 
     page_bg_img = '''
 
@@ -236,7 +194,7 @@ def set_png_as_page_bg(png_file):
 
     .stApp {
 
-        background-image: url("data:image/png;base64,%s");
+        background-image: url("%s");
 
         background-size: cover;
 
@@ -438,7 +396,7 @@ def set_png_as_page_bg(png_file):
 
     </style>
 
-    ''' % bin_str
+    ''' % image_url
 
     st.markdown(page_bg_img, unsafe_allow_html=True)
 
@@ -446,9 +404,9 @@ def set_png_as_page_bg(png_file):
 
 # Check if background exists
 
-if os.path.exists('background.png'):
+if os.path.exists(os.path.join(STATIC_DIR, 'background.webp')):
 
-    set_png_as_page_bg('background.png')
+    set_page_bg(static_asset_url('background.webp'))
 
 else:
 
@@ -480,7 +438,10 @@ else:
 
 with st.sidebar:
 
-    if os.path.exists('logo.png'):
+    if os.path.exists(os.path.join(STATIC_DIR, 'logo.webp')):
+
+        logo_html = '<img src="%s" alt="Logo" style="width: 100%%; height: auto;">' % static_asset_url('logo.webp')
+
 
         if st.session_state.get('logged_in'):
 
@@ -488,7 +449,7 @@ with st.sidebar:
 
             with col1:
 
-                st.image('logo.png', use_container_width=True)
+                st.markdown(logo_html, unsafe_allow_html=True)
 
             with col2:
 
@@ -502,7 +463,7 @@ with st.sidebar:
 
         else:
 
-             st.image('logo.png', use_container_width=True)
+             st.markdown(logo_html, unsafe_allow_html=True)
 
     
 
@@ -514,18 +475,20 @@ with st.sidebar:
 
 # --- Helper Functions ---
 
-from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled, NoTranscriptFound
-
-import yt_dlp
-
 import time
 
 
 
-def get_video_transcript(video_id):
+def get_video_transcript(video_id, settings):
 
     """Fetches video transcript/captions. Fallback to Audio -> Gemini."""
 
+    # Imported here: only the optimization flows need captions / audio download
+
+    from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled, NoTranscriptFound
+
+    import yt_dlp
+
     try:
 
         # 1. Try Standard Captions
@@ -566,16 +529,12 @@ def get_video_transcript(video_id):
 
         try:
 
-            api_key = os.environ.get("GOOGLE_API_KEY")
+            api_key = settings.get("GOOGLE_API_KEY")
 
             if not api_key:
 
                 return None
 
-                
-
-            genai.configure(api_key=api_key)
-
             
 
             # Download Audio
@@ -618,7 +577,7 @@ def get_video_transcript(video_id):
 
                 # Upload to Gemini
 
-                myfile = genai.upload_file(audio_file)
+                myfile = gemini_client.upload_file(api_key, audio_file)
 
                 
 
@@ -628,13 +587,13 @@ def get_video_transcript(video_id):
 
                     time.sleep(1)
 
-                    myfile = genai.get_file(myfile.name)
+                    myfile = gemini_client.get_file(api_key, myfile.name)
 
                     
 
                 # Generate Transcript
 
-                model = genai.GenerativeModel("gemini-1.5-flash")
+                model = gemini_client.generative_model(api_key, "gemini-1.5-flash")
 
                 response = model.generate_content([myfile, "Transcreva este áudio em português."])
 
@@ -646,7 +605,7 @@ def get_video_transcript(video_id):
 
                     os.remove(audio_file)
 
-                    myfile.delete()
+                    gemini_client.delete_file(api_key, myfile.name)
 
                 except: pass
 
@@ -738,90 +697,97 @@ def get_current_user_cached():
         st.session_state.logged_in = True
     return user
 
-def get_authenticated_service():
-    """Authenticates with YouTube Data API."""
-    creds = None
-    
-    # Try to load from DB first if logged in
+def get_settings():
+    """API keys and models for this session (see session_settings.py), resolved once per user.
+
+    Pass the result to the LLM, image and YouTube helpers instead of reading os.environ.
+    """
     user = get_current_user_cached()
+    user_id = user.id if user else None
+    cached = st.session_state.get('settings')
+    if cached and cached[0] == user_id:
+        return cached[1]
+    settings = session_settings.resolve_settings(database.get_user_api_keys(user_id) if user_id else None)
+    st.session_state.settings = (user_id, settings)
+    return settings
 
-    if user:
+def reset_settings():
+    """Forces get_settings() to resolve again, e.g. after the user saves new keys."""
+    st.session_state.pop('settings', None)
 
-        token_data = database.get_youtube_token(user.id)
+def get_youtube_credentials():
 
-        if token_data:
+    """The user's YouTube Credentials, refreshed and saved by the credential manager, or None."""
 
-            # Inject client_id and client_secret from file if available
+    # Credentials live in memory per user (youtube_credentials); the DB is only read on first use
 
-            secret_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "client_secret.json")
+    user = get_current_user_cached()
 
-            if os.path.exists(secret_path):
+    if not user:
 
-                try:
+        st.warning("⚠️ Autenticação do YouTube necessária. Por favor, reconecte sua conta na aba de Configurações.")
 
-                    with open(secret_path, 'r') as f:
+        return None
 
-                        client_config = json.load(f)
+    
 
-                        # Handle both "web" and "installed" formats
+    try:
 
-                        config_data = client_config.get('web') or client_config.get('installed')
+        creds = youtube_credentials.get_manager(SCOPES).get_credentials(
 
-                        if config_data:
+            user.id, session_tokens=auth.get_session_tokens(), client_config=get_settings().youtube_client_config()
 
-                            token_data['client_id'] = config_data.get('client_id')
+        )
 
-                            token_data['client_secret'] = config_data.get('client_secret')
+    except Exception as e:
 
-                except:
+        st.error(f"Erro ao atualizar token: {e}")
 
-                    pass
+        return None
 
-            
+    
 
-            creds = Credentials.from_authorized_user_info(token_data, SCOPES)
+    if not creds:
 
-            
+        # On Cloud, we cannot run local server. 
 
-    # Fallback to local file REMOVED for cloud security/isolation
+        # User must authenticate via the web flow (not fully implemented here, but preventing crash).
 
-    # if not creds and os.path.exists(TOKEN_FILE): ...
+        st.warning("⚠️ Autenticação do YouTube necessária. Por favor, reconecte sua conta na aba de Configurações.")
 
-    
+        return None
 
-    if not creds or not creds.valid:
+            
 
-        if creds and creds.expired and creds.refresh_token:
+    return creds
 
-            try:
 
-                creds.refresh(Request())
 
-                # Save refreshed credentials to DB
+def youtube_credentials_provider(user_id):
 
-                if user:
+    """Callable for worker threads that returns the user's credentials through the credential manager.
 
-                    database.save_youtube_token(user.id, json.loads(creds.to_json()))
+    st.session_state isn't available on those threads, so the session values are captured here."""
 
-            except Exception as e:
+    manager = youtube_credentials.get_manager(SCOPES)
 
-                st.error(f"Erro ao atualizar token: {e}")
+    session_tokens, client_config = auth.get_session_tokens(), get_settings().youtube_client_config()
 
-                return None
+    return lambda: manager.get_credentials(user_id, session_tokens=session_tokens, client_config=client_config)
 
-        else:
 
-            # On Cloud, we cannot run local server. 
 
-            # User must authenticate via the web flow (not fully implemented here, but preventing crash).
+def get_authenticated_service():
 
-            st.warning("⚠️ Autenticação do YouTube necessária. Por favor, reconecte sua conta na aba de Configurações.")
+    """Authenticates with YouTube Data API."""
 
-            return None
+    creds = get_youtube_credentials()
 
-            
+    if not creds:
 
-    return build(API_SERVICE_NAME, API_VERSION, credentials=creds)
+        return None
+
+    return discovery.build(API_SERVICE_NAME, API_VERSION, credentials=creds)
 
 
 
@@ -839,6 +805,13 @@ def get_cached_service(user_id):
 
 
 
+@st.cache_resource
+def get_upload_queue():
+    """Process-wide upload queue shared by every session."""
+    return upload_queue.UploadQueue(on_done=invalidate_uploads_cache)
+
+
+
 def load_json(filepath):
 
     if os.path.exists(filepath):
@@ -865,15 +838,15 @@ def save_json(filepath, data):
 
 
 
-def update_video_on_youtube(service, video_id, title, description, tags, thumbnail_path=None):
+def update_video_on_youtube(service, video_id, title, description, tags, thumbnail_path=None, stored=None):
+
+    """stored: the pending review's original_data, whose snippet and ETag spare the read before the update."""
 
     try:
 
         # 1. Update Metadata
 
-        video_response = service.videos().list(id=video_id, part='snippet').execute()
-
-        if not video_response['items']:
+        if not video_metadata.update(service, video_id, title, description, tags, stored):
 
             st.error(f"Video {video_id} not found.")
 
@@ -881,26 +854,6 @@ def update_video_on_youtube(service, video_id, title, description, tags, thumbna
 
 
 
-        snippet = video_response['items'][0]['snippet']
-
-        snippet['title'] = title
-
-        snippet['description'] = description
-
-        snippet['tags'] = tags
-
-
-
-        service.videos().update(
-
-            part='snippet',
-
-            body={'id': video_id, 'snippet': snippet}
-
-        ).execute()
-
-
-
         # 2. Update Thumbnail (if exists)
 
         if thumbnail_path and os.path.exists(thumbnail_path):
@@ -909,7 +862,7 @@ def update_video_on_youtube(service, video_id, title, description, tags, thumbna
 
                 videoId=video_id,
 
-                media_body=MediaFileUpload(thumbnail_path)
+                media_body=googleapiclient_http.MediaFileUpload(thumbnail_path)
 
             ).execute()
 
@@ -925,43 +878,57 @@ def update_video_on_youtube(service, video_id, title, description, tags, thumbna
 
 
 
-@st.cache_data(ttl=3600)
+# YouTube channel data is cached per user in channel_cache (explicit keys, TTLs and invalidation);
 
-def get_watch_time_year(_creds):
+# st.cache_data would leave the underscored service/credentials, and so the user, out of the key.
 
-    """Fetches watch time (hours) for the last 365 days."""
+CHANNEL_DATA_TTL = 6 * 3600 # channel statistics and video details
 
-    try:
+ANALYTICS_TTL = 12 * 3600 # YouTube Analytics reports lag by a day or two anyway
 
-        analytics = build('youtubeAnalytics', 'v2', credentials=_creds)
 
-        end_date = datetime.date.today().strftime("%Y-%m-%d")
 
-        start_date = (datetime.date.today() - datetime.timedelta(days=365)).strftime("%Y-%m-%d")
+@channel_cache.cached(ttl=ANALYTICS_TTL)
 
-        
+def _query_watch_time_year(user_id, _creds, end_date):
 
-        response = analytics.reports().query(
+    analytics = discovery.build('youtubeAnalytics', 'v2', credentials=_creds)
 
-            ids='channel==MINE',
+    start_date = (datetime.date.fromisoformat(end_date) - datetime.timedelta(days=365)).strftime("%Y-%m-%d")
 
-            startDate=start_date,
+    
 
-            endDate=end_date,
+    response = analytics.reports().query(
 
-            metrics='estimatedMinutesWatched'
+        ids='channel==MINE',
 
-        ).execute()
+        startDate=start_date,
 
-        
+        endDate=end_date,
 
-        rows = response.get('rows', [])
+        metrics='estimatedMinutesWatched'
 
-        if rows:
+    ).execute()
 
-            return float(rows[0][0]) / 60 # Convert minutes to hours
+    
 
-        return 0.0
+    rows = response.get('rows', [])
+
+    if rows:
+
+        return float(rows[0][0]) / 60 # Convert minutes to hours
+
+    return 0.0
+
+
+
+def get_watch_time_year(user_id, creds):
+
+    """Fetches watch time (hours) for the last 365 days."""
+
+    try:
+
+        return _query_watch_time_year(user_id, creds, datetime.date.today().strftime("%Y-%m-%d"))
 
     except Exception as e:
 
@@ -971,41 +938,45 @@ def get_watch_time_year(_creds):
 
 
 
-@st.cache_data(ttl=3600)
+@channel_cache.cached(ttl=ANALYTICS_TTL)
 
-def get_traffic_sources(_creds):
+def _query_traffic_sources(user_id, _creds, end_date):
 
-    """Fetches traffic sources for the last 30 days."""
+    analytics = discovery.build('youtubeAnalytics', 'v2', credentials=_creds)
 
-    try:
+    start_date = (datetime.date.fromisoformat(end_date) - datetime.timedelta(days=30)).strftime("%Y-%m-%d")
 
-        analytics = build('youtubeAnalytics', 'v2', credentials=_creds)
+    
 
-        end_date = datetime.date.today().strftime("%Y-%m-%d")
+    response = analytics.reports().query(
 
-        start_date = (datetime.date.today() - datetime.timedelta(days=30)).strftime("%Y-%m-%d")
+        ids='channel==MINE',
 
-        
+        startDate=start_date,
 
-        response = analytics.reports().query(
+        endDate=end_date,
 
-            ids='channel==MINE',
+        metrics='views',
 
-            startDate=start_date,
+        dimensions='insightTrafficSourceType',
 
-            endDate=end_date,
+        sort='-views'
 
-            metrics='views',
+    ).execute()
 
-            dimensions='insightTrafficSourceType',
+    
 
-            sort='-views'
+    return response.get('rows', [])
 
-        ).execute()
 
-        
 
-        return response.get('rows', [])
+def get_traffic_sources(user_id, creds):
+
+    """Fetches traffic sources for the last 30 days."""
+
+    try:
+
+        return _query_traffic_sources(user_id, creds, datetime.date.today().strftime("%Y-%m-%d"))
 
     except Exception as e:
 
@@ -1015,43 +986,47 @@ def get_traffic_sources(_creds):
 
 
 
-@st.cache_data(ttl=3600)
+@channel_cache.cached(ttl=ANALYTICS_TTL)
 
-def get_monthly_views(_creds):
+def _query_monthly_views(user_id, _creds, end_date):
 
-    """Fetches total views for the last 30 days. Cached for 1 hour."""
+    analytics = discovery.build('youtubeAnalytics', 'v2', credentials=_creds)
 
-    try:
+    start_date = (datetime.date.fromisoformat(end_date) - datetime.timedelta(days=30)).strftime("%Y-%m-%d")
 
-        analytics = build('youtubeAnalytics', 'v2', credentials=_creds)
+    
 
-        end_date = datetime.date.today().strftime("%Y-%m-%d")
+    response = analytics.reports().query(
 
-        start_date = (datetime.date.today() - datetime.timedelta(days=30)).strftime("%Y-%m-%d")
+        ids='channel==MINE',
 
-        
+        startDate=start_date,
+
+        endDate=end_date,
 
-        response = analytics.reports().query(
+        metrics='views'
 
-            ids='channel==MINE',
+    ).execute()
 
-            startDate=start_date,
+    
 
-            endDate=end_date,
+    rows = response.get('rows', [])
 
-            metrics='views'
+    if rows:
 
-        ).execute()
+        return int(rows[0][0])
 
-        
+    return 0
 
-        rows = response.get('rows', [])
 
-        if rows:
 
-            return int(rows[0][0])
+def get_monthly_views(user_id, creds):
 
-        return 0
+    """Fetches total views for the last 30 days. Errors (e.g. quota) are not cached."""
+
+    try:
+
+        return _query_monthly_views(user_id, creds, datetime.date.today().strftime("%Y-%m-%d"))
 
     except HttpError as e:
 
@@ -1073,9 +1048,9 @@ def get_monthly_views(_creds):
 
 
 
-@st.cache_data(ttl=3600)
+@channel_cache.cached(ttl=CHANNEL_DATA_TTL)
 
-def get_channel_stats(_service):
+def get_channel_stats(user_id, _service):
 
     """Fetches channel statistics (subs, views, video count)."""
 
@@ -1083,9 +1058,9 @@ def get_channel_stats(_service):
 
 
 
-@st.cache_data(ttl=3600)
+@channel_cache.cached(ttl=CHANNEL_DATA_TTL)
 
-def get_subscriber_count(_service):
+def get_subscriber_count(user_id, _service):
 
     """Fetches just the subscriber count."""
 
@@ -1095,253 +1070,75 @@ def get_subscriber_count(_service):
 
 
 
-@st.cache_data(ttl=3600)
+@channel_cache.cached(ttl=CHANNEL_DATA_TTL)
 
-def get_video_details(_service, video_id):
+def get_video_details(user_id, _service, video_id):
 
-    """Fetches snippet and statistics for a specific video."""
+    """Fetches snippet and statistics for a specific video. Invalidated when the video is updated."""
 
     return _service.videos().list(id=video_id, part='snippet,statistics').execute()
 
 
 
-def parse_duration(duration_iso):
-
-    """Parses YouTube duration (ISO 8601) to seconds (approx)."""
-
-    match = re.match(r'PT(\d+H)?(\d+M)?(\d+S)?', duration_iso)
-
-    if not match:
-
-        return 0
-
-    
-
-    h = int(match.group(1)[:-1]) if match.group(1) else 0
-
-    m = int(match.group(2)[:-1]) if match.group(2) else 0
-
-    s = int(match.group(3)[:-1]) if match.group(3) else 0
-
-    
-
-    return h*3600 + m*60 + s
-
-
-
-def generate_image_with_ai(prompt, provider="Auto", model=None):
-
-    """Generates an image using available AI providers (Stability > DALL-E 3 > Hugging Face > Pollinations)."""
-
-    
+@channel_cache.cached(ttl=CHANNEL_DATA_TTL)
 
-    # 1. Stability AI
+def get_uploads_playlist(user_id, _service):
 
-    if (provider == "Auto" or provider == "Stability AI") and os.environ.get("STABILITY_API_KEY"):
+    """Id of the channel's uploads playlist."""
 
-        try:
-
-            api_key = os.environ["STABILITY_API_KEY"]
-
-            engine_id = model or os.environ.get("STABILITY_MODEL", "stable-diffusion-xl-10-stable")
-
-            api_host = os.getenv('API_HOST', 'https://api.stability.ai')
-
-            
-
-            # Enhance prompt for realism
-
-            enhanced_prompt = f"{prompt}, photorealistic, 8k, highly detailed, cinematic lighting, ultra realistic, photography"
-
-            
+    return _service.channels().list(mine=True, part='contentDetails').execute()['items'][0]['contentDetails']['relatedPlaylists']['uploads']
 
-            response = requests.post(
 
-                f"{api_host}/v1/generation/{engine_id}/text-to-image",
 
-                headers={
+@channel_cache.cached(ttl=CHANNEL_DATA_TTL)
 
-                    "Content-Type": "application/json",
+def get_playlist_items(user_id, _service, playlist_id):
 
-                    "Accept": "application/json",
+    """First page (50) of a playlist's items."""
 
-                    "Authorization": f"Bearer {api_key}"
+    return _service.playlistItems().list(
 
-                },
+        playlistId=playlist_id,
 
-                json={
+        part='snippet,contentDetails',
 
-                    "text_prompts": [{"text": enhanced_prompt}],
+        maxResults=50
 
-                    "cfg_scale": 7,
+    ).execute()
 
-                    "height": 720,
 
-                    "width": 1280,
 
-                    "samples": 1,
+@channel_cache.cached(ttl=CHANNEL_DATA_TTL)
 
-                    "steps": 30,
+def get_channel_catalog(user_id, _service, uploads_playlist_id):
 
-                },
+    """Every video of the channel as a DataFrame (see channel_catalog)."""
 
-            )
+    return channel_catalog.fetch_catalog(_service, uploads_playlist_id)
 
 
 
-            if response.status_code != 200:
+def invalidate_video_cache(user_id, video_id):
 
-                raise Exception(f"Non-200 response: {str(response.text)}")
-
-
-
-            data = response.json()
-
-            return base64.b64decode(data["artifacts"][0]["base64"])
-
-            
-
-        except Exception as e:
-
-            if provider != "Auto": return None # Fail if specific provider requested
-
-            st.warning(f"Stability AI falhou ({e}), tentando próximo...")
-
-
-
-    # 2. OpenAI DALL-E 3
-
-    if (provider == "Auto" or provider == "OpenAI (DALL-E 3)") and os.environ.get("OPENAI_API_KEY"):
-
-        try:
-
-            client = OpenAI(api_key=os.environ["OPENAI_API_KEY"])
-
-            
+    """Drops cached data showing a video's metadata, after the video is updated on YouTube."""
 
-            response = client.images.generate(
+    get_video_details.invalidate(user_id, video_id)
 
-                model="dall-e-3",
+    get_playlist_items.invalidate(user_id)
 
-                prompt=f"{prompt}, Photorealistic, cinematic, 4k",
-
-                size="1024x1024", # DALL-E 3 standard
-
-                quality="standard",
-
-                n=1,
-
-                response_format="b64_json"
-
-            )
-
-            
-
-            return base64.b64decode(response.data[0].b64_json)
-
-            
-
-        except Exception as e:
-
-            if provider != "Auto": return None
-
-            st.warning(f"DALL-E 3 falhou ({e}), usando fallback...")
-
-
-
-    # 3. Hugging Face Inference API (Free with Token)
-
-    if (provider == "Auto" or provider == "Hugging Face") and os.environ.get("HUGGINGFACE_API_TOKEN"):
-
-        try:
-
-            api_token = os.environ["HUGGINGFACE_API_TOKEN"]
-
-            model_id = model or os.environ.get("HUGGINGFACE_MODEL", "stabilityai/stable-diffusion-xl-base-1.0")
-
-            api_url = f"https://api-inference.huggingface.co/models/{model_id}"
-
-            headers = {"Authorization": f"Bearer {api_token}"}
-
-            
-
-            # Enhance prompt
-
-            enhanced_prompt = f"{prompt}, photorealistic, 8k, highly detailed, cinematic lighting"
-
-            
-
-            payload = {
-
-                "inputs": enhanced_prompt,
-
-                "parameters": {"num_inference_steps": 25}
-
-            }
-
-
-
-            response = requests.post(api_url, headers=headers, json=payload)
-
-            
+    get_channel_catalog.invalidate(user_id)
 
-            # Handle model loading state (common in free tier)
 
-            if response.status_code == 503:
 
-                 st.warning("Modelo Hugging Face carregando, aguardando...")
+def invalidate_uploads_cache(user_id, video_id):
 
-                 time.sleep(10) # Wait a bit
+    """Drops cached video lists and counts once an upload job has published a new video."""
 
-                 response = requests.post(api_url, headers=headers, json=payload)
+    get_channel_stats.invalidate(user_id)
 
+    get_playlist_items.invalidate(user_id)
 
-
-            if response.status_code != 200:
-
-                 raise Exception(f"Non-200 response: {str(response.text)}")
-
-
-
-            return response.content
-
-            
-
-        except Exception as e:
-
-            if provider != "Auto": return None
-
-            st.warning(f"Hugging Face falhou ({e}), tentando Pollinations...")
-
-
-
-    # 4. Pollinations.ai (Fallback - Free)
-
-    # Always available if Auto or specifically requested
-
-    if provider == "Auto" or provider == "Pollinations (Grátis)":
-
-        try:
-
-            # URL encode prompt
-
-            encoded_prompt = requests.utils.quote(f"{prompt}, photorealistic, 4k, cinematic")
-
-            # Force Flux model for better quality
-
-            image_url = f"https://image.pollinations.ai/prompt/{encoded_prompt}?width=1280&height=720&nologo=true&model=flux" 
-
-            return requests.get(image_url).content
-
-        except Exception as e:
-
-            st.error(f"Erro no gerador gratuito: {e}")
-
-            return None
-
-            
-
-    return None
+    get_channel_catalog.invalidate(user_id)
 
 
 
@@ -1800,10 +1597,6 @@ with st.sidebar:
 
 
 
-def render_home():
-
-    st.title("🏠 Dashboard Principal")
-
 def render_metric_card(title, value, sub_value, progress_percent):
     st.markdown(f"""
     <div class="metric-card">
@@ -1825,83 +1618,91 @@ def render_metric_card(title, value, sub_value, progress_percent):
     </div>
     """, unsafe_allow_html=True)
 
-    user = get_current_user_cached()
+def format_compact(value):
+    """12500 -> "12.5K", 1250000 -> "1.2M"."""
+    for limit, suffix in ((1_000_000, "M"), (1_000, "K")):
+        if abs(value) >= limit:
+            return f"{value / limit:.1f}".rstrip("0").rstrip(".") + suffix
+    return f"{value:,.0f}"
 
-    
+def percent_change(current, previous):
+    """Change vs the previous period, as an int percentage (None if there is no baseline)."""
+    if not previous:
+        return None
+    return round((current - previous) / previous * 100)
 
-    if not user:
+def render_home():
+    st.title("🏠 Dashboard Principal")
 
-        st.info("👋 Bem-vindo! Faça login para começar a gerenciar seu canal.")
+    user = get_current_user_cached()
 
+    if not user:
+        st.info("👋 Bem-vindo! Faça login para começar a gerenciar seu canal.")
         return
 
+    # Numbers come from the snapshot the background worker stores (dashboard_snapshot.py):
+    # one read by primary key, no YouTube API calls on page load
+    snapshot = database.get_dashboard_snapshot(user.id)
+    data = snapshot['data'] if snapshot else None
+    stale = dashboard_snapshot.is_stale(snapshot)
+
+    if data:
+        change = percent_change(data['views_28d'], data['views_prev_28d'])
+        change_text = f"{change:+d}% vs período anterior" if change is not None else "últimos 28 dias"
+        views_progress = min(100, max(0, 50 + (change or 0) // 2))
+        reviewed = data['optimized_videos'] + data['pending_reviews']
+
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            render_metric_card("Inscritos", format_compact(data['subscribers']), f"{data['subscribers_net_7d']:+,} essa semana",
+                               min(100, data['subscribers'] * 100 // 1000)) # progress towards the 1,000 needed to monetize
+        with col2:
+            render_metric_card("Visualizações (28d)", format_compact(data['views_28d']), change_text, views_progress)
+        with col3:
+            revenue = data['estimated_revenue_28d']
+            revenue_text = f"${format_compact(revenue)}" if revenue >= 1000 else f"${revenue:,.2f}"
+            render_metric_card("Receita Est. (28d)", revenue_text, f"RPM ${data['rpm']:.2f}", views_progress)
+        with col4:
+            render_metric_card("Vídeos Otimizados", str(data['optimized_videos']), f"{data['pending_reviews']} pendentes",
+                               data['optimized_videos'] * 100 // reviewed if reviewed else 0)
+
+        computed_at = dashboard_snapshot.computed_at(snapshot)
+        updated_text = f"Atualizado em {computed_at:%d/%m/%Y %H:%M} UTC. " if computed_at else ""
+        st.caption(f"{updated_text}O painel é recalculado a cada {dashboard_snapshot.REFRESH_INTERVAL_MINUTES} minutos.")
+    else:
+        st.info("📊 Os números do seu canal aparecem aqui assim que o painel for calculado pela automação em segundo plano.")
 
-
-    # Quick Stats (Mockup for now, can be real later)
-    col1, col2, col3, col4 = st.columns(4)
-    with col1:
-        render_metric_card("Inscritos", "12.5K", "+120 essa semana", 65)
-    with col2:
-        render_metric_card("Visualizações (28d)", "450K", "+15% vs mês anterior", 95)
-    with col3:
-        render_metric_card("Receita Est.", "R$ 1.2K", "+5%", 40)
-    with col4:
-        render_metric_card("Vídeos Otimizados", "8", "2 pendentes", 75)
-
-        
+    if stale and st.button("🔄 Calcular agora"):
+        creds = get_youtube_credentials()
+        if creds and dashboard_snapshot.refresh(user.id, discovery.build(API_SERVICE_NAME, API_VERSION, credentials=creds), creds):
+            st.rerun()
+        else:
+            st.error("Não foi possível calcular o painel agora.")
 
     st.divider()
 
-    
-
     # Active Connections Status
-
     st.subheader("🔌 Status das Conexões")
-
     cols = st.columns(4)
 
-    
-
-    # YouTube API Status
-
+    # YouTube API Status: a fresh snapshot means the worker could reach the channel
     with cols[0]:
-
-        service = get_authenticated_service()
-
-        if service:
-
+        if snapshot and not stale:
             st.success("✅ YouTube API")
-
+        elif snapshot:
+            st.warning("⚠️ YouTube API")
         else:
-
             st.error("❌ YouTube API")
 
-            
-
     # Supabase Status
-
     with cols[1]:
-
-        if user:
-
-            st.success("✅ Database")
-
-        else:
-
-            st.error("❌ Database")
-
-            
+        st.success("✅ Database")
 
     # Gemini Status
-
     with cols[2]:
-
-        if os.environ.get("GOOGLE_API_KEY"):
-
+        if get_settings().get("GOOGLE_API_KEY"):
             st.success("✅ Gemini AI")
-
         else:
-
             st.warning("⚠️ Gemini AI")
 
 
@@ -1930,6 +1731,12 @@ def render_performance():
 
         if st.button("🔄 Atualizar Dados", use_container_width=True):
 
+            user = get_current_user_cached()
+
+            if user:
+
+                channel_cache.invalidate_user(user.id)
+
             st.rerun()
 
 
@@ -1948,15 +1755,9 @@ def render_performance():
 
         try:
 
-            # 1. Basic Stats
-
-            # Cache this call if possible, but service object is not hashable easily for st.cache_data
-
-            # We can cache the data fetching function instead
-
-            
+            # 1. Basic Stats (cached per user, see channel_cache)
 
-            channels_response = get_channel_stats(service)
+            channels_response = get_channel_stats(user.id, service)
 
             
 
@@ -1982,71 +1783,11 @@ def render_performance():
 
 
 
-                # 2. Fetch Video Data for Charts
+                # 2. Whole catalog as a columnar table (cached per user, see channel_catalog)
 
                 with st.spinner("Analisando dados do canal..."):
 
-                    videos = []
-
-                    playlist_response = service.playlistItems().list(
-
-                        playlistId=uploads_playlist_id,
-
-                        part='contentDetails',
-
-                        maxResults=50
-
-                    ).execute()
-
-                    
-
-                    video_ids = [item['contentDetails']['videoId'] for item in playlist_response['items']]
-
-                    
-
-                    # Need contentDetails for duration
-
-                    stats_response = service.videos().list(
-
-                        id=','.join(video_ids),
-
-                        part='snippet,statistics,contentDetails'
-
-                    ).execute()
-
-                    
-
-                    for item in stats_response['items']:
-
-                        vid_stats = item['statistics']
-
-                        snippet = item['snippet']
-
-                        content = item['contentDetails']
-
-                        duration_sec = parse_duration(content['duration'])
-
-                        is_short = duration_sec <= 60
-
-                        
-
-                        videos.append({
-
-                            'Title': snippet['title'],
-
-                            'Views': int(vid_stats.get('viewCount', 0)),
-
-                            'Likes': int(vid_stats.get('likeCount', 0)),
-
-                            'Comments': int(vid_stats.get('commentCount', 0)),
-
-                            'Type': 'Shorts' if is_short else 'Video'
-
-                        })
-
-                    
-
-                    df = pd.DataFrame(videos)
+                    df = get_channel_catalog(user.id, service, uploads_playlist_id)
 
                     
 
@@ -2056,7 +1797,7 @@ def render_performance():
 
                     # Use credentials from the already authenticated service
 
-                    traffic_data = get_traffic_sources(service._http.credentials)
+                    traffic_data = get_traffic_sources(user.id, service._http.credentials)
 
                     if traffic_data:
 
@@ -2078,11 +1819,11 @@ def render_performance():
 
                     with col_svl1:
 
-                        # Avg Views by Type
+                        # Avg Views / Likes by Type
 
-                        avg_views = df.groupby('Type')['Views'].mean().reset_index()
+                        averages = channel_catalog.averages_by_type(df, ('Views', 'Likes'))
 
-                        fig_avg = px.bar(avg_views, x='Type', y='Views', color='Type', title="Avg Views per Video", template='plotly_dark')
+                        fig_avg = px.bar(averages, x='Type', y='Views', color='Type', title="Avg Views per Video", template='plotly_dark')
 
                         st.plotly_chart(fig_avg, use_container_width=True)
 
@@ -2092,9 +1833,7 @@ def render_performance():
 
                         # Engagement by Type
 
-                        avg_likes = df.groupby('Type')['Likes'].mean().reset_index()
-
-                        fig_likes = px.bar(avg_likes, x='Type', y='Likes', color='Type', title="Avg Likes per Video", template='plotly_dark')
+                        fig_likes = px.bar(averages, x='Type', y='Likes', color='Type', title="Avg Likes per Video", template='plotly_dark')
 
                         st.plotly_chart(fig_likes, use_container_width=True)
 
@@ -2102,11 +1841,11 @@ def render_performance():
 
                     # --- Top Videos ---
 
-                    st.subheader("🏆 Melhores Vídeos (Recentes)")
+                    st.subheader(f"🏆 Melhores Vídeos ({len(df):,} analisados)")
 
                     fig_bar = px.bar(
 
-                        df.sort_values('Views', ascending=False).head(10),
+                        channel_catalog.top_videos(df, 10),
 
                         x='Views', y='Title', orientation='h', color='Views',
 
@@ -2156,13 +1895,15 @@ def render_monetization():
 
     service = get_authenticated_service()
 
+    user = get_current_user_cached()
+
     if service:
 
         try:
 
             # Fetch Subs
 
-            subs = get_subscriber_count(service)
+            subs = get_subscriber_count(user.id, service)
 
             
 
@@ -2170,7 +1911,7 @@ def render_monetization():
 
             # Use credentials from the service object instead of reading file
 
-            watch_hours = get_watch_time_year(service._http.credentials)
+            watch_hours = get_watch_time_year(user.id, service._http.credentials)
 
             
 
@@ -2244,7 +1985,7 @@ def render_monetization():
 
                 # creds = Credentials.from_authorized_user_file(TOKEN_FILE, SCOPES) # REMOVED
 
-                actual_views = get_monthly_views(service._http.credentials)
+                actual_views = get_monthly_views(user.id, service._http.credentials)
 
                 default_views = actual_views if actual_views > 0 else 10000
 
@@ -2278,31 +2019,84 @@ def render_monetization():
 
 # --- Tab 3: Upload & Optimize ---
 
-def render_upload():
+UPLOAD_STATUS_LABELS = {
+    upload_queue.STATUS_QUEUED: "⏳ Na fila",
+    upload_queue.STATUS_UPLOADING: "📤 Enviando",
+    upload_queue.STATUS_DONE: "✅ Enviado",
+    upload_queue.STATUS_FAILED: "❌ Falhou"
+}
 
-    st.title("📤 Upload e Otimização")
+UPLOAD_REFRESH_SECONDS = 2
 
-    st.info("Analise um arquivo de vídeo com IA e faça upload diretamente para o YouTube.")
+def render_upload_queue():
+    """Shows the user's queued uploads. Progress lives in the shared queue, so any session can read it."""
+    user = get_current_user_cached()
+    if not user:
+        return
+
+    jobs = get_upload_queue().list_jobs(user.id)
+    if not jobs:
+        return
 
+    # While something is uploading, only this fragment reruns to refresh the progress bars
+    polling = has_active_uploads(jobs)
+    st.fragment(render_upload_jobs, run_every=UPLOAD_REFRESH_SECONDS if polling else None)(user.id, polling)
 
+def has_active_uploads(jobs):
+    return any(job['status'] in (upload_queue.STATUS_QUEUED, upload_queue.STATUS_UPLOADING) for job in jobs)
 
-    # API Key Check
+def render_upload_jobs(user_id, polling=False):
+    jobs = get_upload_queue().list_jobs(user_id)
+    # run_every is only chosen on a full run: once the last upload finishes, rerun the whole app
+    # so the fragment is rebuilt without it instead of polling forever
+    if polling and not has_active_uploads(jobs):
+        st.rerun()
+    if not jobs:
+        return
 
-    api_key = os.environ.get("GOOGLE_API_KEY")
+    st.divider()
+    col_q1, col_q2, col_q3 = st.columns([3, 1, 1])
+    with col_q1:
+        st.subheader("📦 Fila de Envios")
+    with col_q2:
+        # A click inside the fragment already reruns it
+        st.button("🔄 Atualizar", key="refresh_upload_queue", use_container_width=True)
+    with col_q3:
+        st.button("🧹 Limpar Concluídos", key="clear_upload_queue", use_container_width=True,
+                  on_click=get_upload_queue().clear_finished, args=(user_id,))
+
+    for job in jobs:
+        with st.container(border=True):
+            col_j1, col_j2 = st.columns([3, 1])
+            with col_j1:
+                st.markdown(f"**{job['title']}** · `{job['privacy']}`")
+                st.progress(job['progress'])
+            with col_j2:
+                st.write(UPLOAD_STATUS_LABELS.get(job['status'], job['status']))
+                if job['video_id']:
+                    st.caption(f"ID: {job['video_id']}")
+            if job['error']:
+                st.error(f"Falha no envio: {job['error']}")
+                st.button("🔁 Tentar novamente", key=f"retry_upload_{job['id']}",
+                          on_click=get_upload_queue().retry, args=(job['id'],))
 
-    if not api_key:
+def render_upload():
 
-        api_key = st.text_input("Insira a Chave da API Gemini", type="password")
+    st.title("📤 Upload e Otimização")
 
-        if api_key:
+    st.info("Analise um arquivo de vídeo com IA e faça upload diretamente para o YouTube.")
 
-            os.environ["GOOGLE_API_KEY"] = api_key
 
-            genai.configure(api_key=api_key)
 
-    else:
+    # API Key Check (a key typed here is only used by this session)
 
-        genai.configure(api_key=api_key)
+    settings = get_settings()
+
+    api_key = settings.get("GOOGLE_API_KEY")
+
+    if not api_key:
+
+        api_key = st.text_input("Insira a Chave da API Gemini", type="password")
 
 
 
@@ -2356,13 +2150,13 @@ def render_upload():
 
                         # Upload
 
-                        video_file = genai.upload_file(path=video_path)
+                        video_file = gemini_client.upload_file(api_key, video_path)
 
                         while video_file.state.name == "PROCESSING":
 
                             time.sleep(1)
 
-                            video_file = genai.get_file(video_file.name)
+                            video_file = gemini_client.get_file(api_key, video_file.name)
 
                             
 
@@ -2372,9 +2166,9 @@ def render_upload():
 
                         else:
 
-                            model_name = os.environ.get("GOOGLE_MODEL", "gemini-1.5-flash")
+                            model_name = settings.get("GOOGLE_MODEL", "gemini-1.5-flash")
 
-                            model = genai.GenerativeModel(model_name)
+                            model = gemini_client.generative_model(api_key, model_name)
 
                             response = model.generate_content([video_file, "Transcreva o áudio deste vídeo palavra por palavra. Retorne APENAS o texto da transcrição, sem formatação ou comentários."])
 
@@ -2422,7 +2216,7 @@ def render_upload():
 
                         st.text("Enviando para o Gemini...")
 
-                        video_file = genai.upload_file(path=video_path)
+                        video_file = gemini_client.upload_file(api_key, video_path)
 
                         
 
@@ -2432,7 +2226,7 @@ def render_upload():
 
                             time.sleep(2)
 
-                            video_file = genai.get_file(video_file.name)
+                            video_file = gemini_client.get_file(api_key, video_file.name)
 
                         
 
@@ -2446,9 +2240,9 @@ def render_upload():
 
                             st.text("Gerando metadados...")
 
-                            model_name = os.environ.get("GOOGLE_MODEL", "gemini-1.5-flash")
+                            model_name = settings.get("GOOGLE_MODEL", "gemini-1.5-flash")
 
-                            model = genai.GenerativeModel(model_name)
+                            model = gemini_client.generative_model(api_key, model_name)
 
                             
 
@@ -2556,11 +2350,11 @@ def render_upload():
 
         available_providers = ["Auto", "Pollinations (Grátis)"]
 
-        if os.environ.get("HUGGINGFACE_API_TOKEN"): available_providers.append("Hugging Face")
+        if settings.get("HUGGINGFACE_API_TOKEN"): available_providers.append("Hugging Face")
 
-        if os.environ.get("STABILITY_API_KEY"): available_providers.append("Stability AI")
+        if settings.get("STABILITY_API_KEY"): available_providers.append("Stability AI")
 
-        if os.environ.get("OPENAI_API_KEY"): available_providers.append("OpenAI (DALL-E 3)")
+        if settings.get("OPENAI_API_KEY"): available_providers.append("OpenAI (DALL-E 3)")
 
         
 
@@ -2582,7 +2376,7 @@ def render_upload():
 
             st.error("O roteiro é obrigatório.")
 
-        elif not os.environ.get("GOOGLE_API_KEY"):
+        elif not api_key:
 
             st.error("Chave da API Gemini necessária para criar o roteiro.")
 
@@ -2600,9 +2394,9 @@ def render_upload():
 
                 status_container.write("🧠 Criando roteiro visual com Gemini...")
 
-                model_name = os.environ.get("GOOGLE_MODEL", "gemini-1.5-flash")
+                model_name = settings.get("GOOGLE_MODEL", "gemini-1.5-flash")
 
-                model = genai.GenerativeModel(model_name)
+                model = gemini_client.generative_model(api_key, model_name)
 
                 
 
@@ -2630,55 +2424,59 @@ def render_upload():
 
                 
 
-                clips = []
+                # Per-run folder so concurrent sessions never overwrite each other's scenes
+
+                run_dir = os.path.join(ASSETS_DIR, f"video_{uuid.uuid4().hex[:8]}")
+
+                os.makedirs(run_dir, exist_ok=True)
 
                 
 
-                # 2. Generate Images
+                # 2. Generate Images (all scenes in parallel, bounded by MAX_PARALLEL_SCENES)
 
-                for i, scene in enumerate(scenes):
+                status_container.write(f"🎨 Gerando {len(scenes)} cenas em paralelo...")
 
-                    status_container.write(f"🎨 Gerando cena {i+1}/{len(scenes)}: {scene['prompt'][:30]}...")
+                scene_files = {}
 
-                    progress_bar.progress((i / len(scenes)) * 0.8, text=f"Gerando cena {i+1}...")
+                finished = 0
 
-                    
+                for i, img_data, warnings in image_generation.generate_scene_images([scene['prompt'] for scene in scenes], provider=selected_img_provider, settings=settings):
 
-                    img_data = generate_image_with_ai(scene['prompt'], provider=selected_img_provider)
+                    finished += 1
 
-                    img_filename = os.path.join(ASSETS_DIR, f"scene_{i}.jpg")
+                    progress_bar.progress((finished / len(scenes)) * 0.8, text=f"Cenas prontas: {finished}/{len(scenes)}")
 
-                    
+                    for warning in warnings:
 
-                    valid_image = False
+                        status_container.warning(f"Cena {i+1}: {warning}")
 
                     if img_data:
 
+                        img_filename = os.path.join(run_dir, f"scene_{i}.jpg")
+
                         with open(img_filename, "wb") as f:
 
                             f.write(img_data)
 
-                        valid_image = True
+                        scene_files[i] = img_filename
 
-                    
+                        status_container.write(f"✅ Cena {i+1}/{len(scenes)} pronta: {scenes[i]['prompt'][:30]}...")
 
-                    if valid_image:
+                    else:
 
-                        # Create ImageClip
+                        status_container.warning(f"Falha na imagem da cena {i+1}")
 
-                        clip = ImageClip(img_filename).set_duration(scene['duration'])
 
-                        clips.append(clip)
 
-                    else:
+                # Keep storyboard order regardless of completion order
 
-                        status_container.warning(f"Falha na imagem da cena {i+1}")
+                slideshow = [(scene_files[i], scene.get('duration', 4)) for i, scene in enumerate(scenes) if i in scene_files]
 
                         
 
-                # 3. Assemble
+                # 3. Assemble (ffmpeg concat demuxer, fast x264 preset)
 
-                if clips:
+                if slideshow:
 
                     status_container.write("🎞️ Renderizando vídeo final...")
 
@@ -2686,38 +2484,38 @@ def render_upload():
 
                     
 
-                    final_video = concatenate_videoclips(clips, method="compose")
-
-                    output_filename = os.path.join(ASSETS_DIR, "final_video_ai.mp4")
+                    output_filename = os.path.join(run_dir, "final_video_ai.mp4")
 
-                    final_video.write_videofile(output_filename, fps=24, codec="libx264", audio_codec="aac")
+                    rendered, render_result = video_assembly.assemble_slideshow(slideshow, output_filename)
 
                     
 
-                    st.success("Vídeo gerado com sucesso!")
+                    if rendered:
 
-                    st.video(output_filename)
+                        progress_bar.progress(1.0, text="Concluído!")
 
-                    
-
-                    with open(output_filename, "rb") as f:
+                        st.success("Vídeo gerado com sucesso!")
 
-                        st.download_button("⬇️ Baixar Vídeo", f, file_name="video_ai.mp4")
+                        st.video(output_filename)
 
                         
 
-                    # Cleanup
+                        with open(output_filename, "rb") as f:
 
-                    final_video.close()
+                            st.download_button("⬇️ Baixar Vídeo", f, file_name="video_ai.mp4")
 
-                    for clip in clips:
+                    else:
 
-                        clip.close()
+                        st.error(f"Falha ao renderizar o vídeo: {render_result}")
 
                 else:
 
                     st.error("Não foi possível gerar cenas suficientes.")
 
+                # The scene images were only ffmpeg's input; older runs are pruned like the image cache
+                video_assembly.remove_files(scene_files.values())
+                video_assembly.prune_run_dirs(ASSETS_DIR, keep=run_dir)
+
                     
 
             except Exception as e:
@@ -2764,115 +2562,63 @@ def render_upload():
 
         if st.button("🚀 Enviar para o YouTube"):
 
-            service = get_authenticated_service()
-
-            if service:
-
-                with st.spinner("Enviando para o YouTube..."):
-
-                    try:
-
-                        # Ensure temp file exists (re-save if needed or rely on persistence)
-
-                        # Since streamlit reruns, we might need to rely on the file being there 
-
-                        # or re-save it. For simplicity in this flow, we assume it persists briefly
-
-                        # or we re-save if 'uploaded_file' is still valid.
-
-                        # Ideally, we check if temp_video.mp4 exists.
-
-                        
-
-                        target_path = os.path.join(ASSETS_DIR, "temp_video.mp4")
+            user = get_current_user_cached()
 
-                        if not os.path.exists(target_path):
+            if user and get_youtube_credentials():
 
-                             if uploaded_file:
-
-                                with open(target_path, "wb") as f:
-
-                                    f.write(uploaded_file.getbuffer())
-
-                             else:
-
-                                st.error("Arquivo de vídeo perdido. Por favor, envie novamente.")
-
-                                st.stop()
-
-
-
-                        body = {
-
-                            'snippet': {
-
-                                'title': up_title,
-
-                                'description': up_desc,
-
-                                'tags': [t.strip() for t in up_tags.split(',')],
-
-                                'categoryId': '22' # People & Blogs default
-
-                            },
-
-                            'status': {
+                try:
 
-                                'privacyStatus': privacy
+                    # Each queued upload owns a copy of the file, so later uploads never overwrite it
 
-                            }
+                    job_path = os.path.join(ASSETS_DIR, f"upload_{uuid.uuid4().hex[:12]}")
 
-                        }
+                    if uploaded_file:
 
-                        
+                        job_path += "." + uploaded_file.name.split('.')[-1]
 
-                        media = MediaFileUpload(target_path, chunksize=-1, resumable=True)
+                        with open(job_path, "wb") as f:
 
-                        
+                            f.write(uploaded_file.getbuffer())
 
-                        request = service.videos().insert(
+                    elif os.path.exists(os.path.join(ASSETS_DIR, "temp_video.mp4")):
 
-                            part=','.join(body.keys()),
+                        job_path += ".mp4"
 
-                            body=body,
+                        os.replace(os.path.join(ASSETS_DIR, "temp_video.mp4"), job_path)
 
-                            media_body=media
+                    else:
 
-                        )
+                        st.error("Arquivo de vídeo perdido. Por favor, envie novamente.")
 
-                        
+                        st.stop()
 
-                        response = None
 
-                        while response is None:
 
-                            status, response = request.next_chunk()
+                    metadata = {
 
-                            if status:
+                        'title': up_title,
 
-                                st.progress(int(status.progress() * 100))
+                        'description': up_desc,
 
-                        
+                        'tags': [t.strip() for t in up_tags.split(',')]
 
-                        st.success(f"Vídeo enviado! ID: {response['id']}")
+                    }
 
-                        st.balloons()
+                    get_upload_queue().submit(user.id, youtube_credentials_provider(user.id), job_path, metadata, privacy)
 
-                        # Clear state
+                    st.success("📦 Vídeo adicionado à fila de envio! Você pode continuar usando o app enquanto ele é enviado.")
 
-                        st.session_state.generated_metadata = {}
+                    # Clear state
 
-                        # Cleanup
+                    st.session_state.generated_metadata = {}
 
-                        if os.path.exists(target_path):
+                except Exception as e:
 
-                            os.remove(target_path)
+                    st.error(f"Falha ao enfileirar envio: {e}")
 
-                        
 
-                    except Exception as e:
 
-                        st.error(f"Falha no envio: {e}")
+    render_upload_queue()
 
 
 
@@ -2884,6 +2630,8 @@ def render_upload():
 
 # --- Tab 4: Optimize Existing ---
 
+SUGGESTIONS_SAVE_EVERY = 20 # bulk suggestions are saved in batches of this size as they are generated
+
 def render_optimize():
 
     st.title("✨ Otimizar Vídeos Existentes")
@@ -3016,6 +2764,8 @@ def render_optimize():
 
         service = get_authenticated_service()
 
+        user = get_current_user_cached()
+
         if not service:
 
              st.warning("Por favor, autentique-se para continuar.")
@@ -3026,39 +2776,13 @@ def render_optimize():
 
                 try:
 
-                    # 1. Fetch Recent Videos
-
-                    # Use cached service if possible or cache this specific call
-
-                    @st.cache_data(ttl=3600)
-
-                    def get_uploads_playlist(_service):
+                    # 1. Fetch Recent Videos (cached per user)
 
-                        return _service.channels().list(mine=True, part='contentDetails').execute()['items'][0]['contentDetails']['relatedPlaylists']['uploads']
-
-
-
-                    uploads_playlist_id = get_uploads_playlist(service)
+                    uploads_playlist_id = get_uploads_playlist(user.id, service)
 
                     
 
-                    @st.cache_data(ttl=3600)
-
-                    def get_playlist_items(_service, playlist_id):
-
-                        return _service.playlistItems().list(
-
-                            playlistId=playlist_id,
-
-                            part='snippet,contentDetails',
-
-                            maxResults=50
-
-                        ).execute()
-
-
-
-                    playlist_response = get_playlist_items(service, uploads_playlist_id)
+                    playlist_response = get_playlist_items(user.id, service, uploads_playlist_id)
 
                     
 
@@ -3156,7 +2880,7 @@ def render_optimize():
 
                             
 
-                            analytics = build('youtubeAnalytics', 'v2', credentials=service._http.credentials)
+                            analytics = discovery.build('youtubeAnalytics', 'v2', credentials=service._http.credentials)
 
                             
 
@@ -3250,9 +2974,9 @@ def render_optimize():
 
                             user = get_current_user_cached()
 
-                            history = database.get_optimization_history(user.id) if user else []
+                            playlist_ids = [item['contentDetails']['videoId'] for item in playlist_response['items']]
 
-                            optimized_ids = [h['video_id'] for h in history]
+                            optimized_ids = database.get_optimization_history(user.id, video_ids=playlist_ids) if user else {}
 
                             
 
@@ -3342,7 +3066,9 @@ def render_optimize():
 
                         
 
-                        api_key = os.environ.get("GOOGLE_API_KEY")
+                        settings = get_settings()
+
+                        api_key = settings.get("GOOGLE_API_KEY")
 
                         if not api_key:
 
@@ -3350,151 +3076,174 @@ def render_optimize():
 
                         else:
 
-                            model_name = os.environ.get("GOOGLE_MODEL", "gemini-1.5-flash")
+                            model_name = settings.get("GOOGLE_MODEL", "gemini-1.5-flash")
 
-                            model = genai.GenerativeModel(model_name)
+                            model = gemini_client.generative_model(api_key, model_name)
 
                             
 
                             count = 0
 
-                            for vid in st.session_state.bulk_candidates:
-
-                                status_text.text(f"Processando: {vid['title']}...")
-
-                                try:
+                            pending_batch = []
+                            saved_ids, failed = [], {}
+
+                            def save_pending_batch():
+                                # Saves the suggestions generated so far and their history entries, one request each
+                                if not user or not pending_batch:
+                                    return
+                                batch_ids, batch_failed = database.add_pending_reviews_bulk(user.id, pending_batch)
+                                saved_ids.extend(batch_ids)
+                                failed.update(batch_failed)
+                                saved = [p for p in pending_batch if p['video_id'] in batch_ids]
+                                pending_batch.clear()
+                                database.add_optimization_history_bulk(user.id, [{
+                                    "video_id": p['video_id'],
+                                    "video_title": p['original_data']['current_title'],
+                                    "action_taken": "analyzed",
+                                    "details": {"timestamp": datetime.datetime.now().isoformat()}
+                                } for p in saved])
+                                # Log to Session History
+                                for p in saved:
+                                    st.session_state.session_history.append({
+                                        "timestamp": datetime.datetime.now().strftime("%H:%M:%S"),
+                                        "old_title": p['original_data']['current_title'],
+                                        "new_title": p['suggested_data']['new_title'],
+                                        "status": "pending_review"
+                                    })
+
+                            # Snippet-only items, 50 per call: their ETag is stored with the suggestion so
+                            # approving it can skip re-reading the video (see video_metadata.py)
+                            try:
+                                candidate_videos = video_metadata.list_videos(service, [vid['id'] for vid in st.session_state.bulk_candidates])
+                            except Exception as e:
+                                st.error(f"Erro ao buscar os vídeos: {e}")
+                                candidate_videos = {}
 
-                                    # Fetch details
+                            try:
+                                for vid in st.session_state.bulk_candidates:
 
-                                    vid_response = get_video_details(service, vid['id'])
+                                    status_text.text(f"Processando: {vid['title']}...")
 
-                                    if vid_response['items']:
+                                    try:
 
-                                        snippet = vid_response['items'][0]['snippet']
+                                        # Fetch details
 
-                                        
+                                        video = candidate_videos.get(vid['id'])
 
-                                        # Fetch User Persona
+                                        if video:
 
-                                        user_persona = ""
+                                            snippet = video['snippet']
 
-                                        if user:
+                                        
 
-                                            persona_key = database.get_user_api_keys(user.id).get("Optimization_Persona", {})
+                                            # Fetch User Persona
 
-                                            user_persona = persona_key.get("api_key", "")
+                                            user_persona = database.get_user_persona(user.id) if user else ""
 
                                             
 
-                                        # Fetch Transcript
+                                            # Fetch Transcript
 
-                                        transcript_text = get_video_transcript(vid['id'])
+                                            transcript_text = get_video_transcript(vid['id'], settings)
 
-                                        transcript_context = f"Video Transcript/Content:\n{transcript_text[:10000]}..." if transcript_text else "Transcript not available."
+                                            transcript_context = f"Video Transcript/Content:\n{transcript_text[:10000]}..." if transcript_text else "Transcript not available."
 
 
 
-                                        # Fetch Channel Learning Context (Top Videos)
+                                            # Fetch Channel Learning Context (Top Videos)
 
-                                        top_videos = get_top_performing_videos(service, max_results=5)
+                                            top_videos = get_top_performing_videos(service, max_results=5)
 
-                                        channel_context = ""
+                                            channel_context = ""
 
-                                        if top_videos:
+                                            if top_videos:
 
-                                            channel_context = "Top Performing Videos on this Channel (Emulate this style):\n"
+                                                channel_context = "Top Performing Videos on this Channel (Emulate this style):\n"
 
-                                            for tv in top_videos:
+                                                for tv in top_videos:
 
-                                                channel_context += f"- {tv['title']}\n"
+                                                    channel_context += f"- {tv['title']}\n"
 
 
 
-                                        # Generate
+                                            # Generate
 
-                                        prompt = f"""
+                                            prompt = f"""
 
-                                        Optimize this YouTube video metadata.
+                                            Optimize this YouTube video metadata.
 
                                         
 
-                                        User Persona / Channel Style Instructions:
+                                            User Persona / Channel Style Instructions:
 
-                                        {user_persona if user_persona else "No specific style defined. Use best practices for high CTR and engagement."}
+                                            {user_persona if user_persona else "No specific style defined. Use best practices for high CTR and engagement."}
 
                                         
 
-                                        {channel_context}
+                                            {channel_context}
 
 
 
-                                        Title: {snippet['title']}
+                                            Title: {snippet['title']}
 
-                                        Desc: {snippet['description']}
+                                            Desc: {snippet['description']}
 
-                                        Tags: {snippet.get('tags', [])}
+                                            Tags: {snippet.get('tags', [])}
 
                                         
 
-                                        {transcript_context}
+                                            {transcript_context}
 
                                         
 
-                                        Output JSON: {{ "title": "...", "description": "...", "tags": [...] }}
+                                            Output JSON: {{ "title": "...", "description": "...", "tags": [...] }}
 
-                                        """
+                                            """
 
-                                        response = model.generate_content(prompt)
+                                            response = model.generate_content(prompt)
 
-                                        text = response.text.replace('```json', '').replace('```', '')
+                                            text = response.text.replace('```json', '').replace('```', '')
 
-                                        suggestions = json.loads(text)
+                                            suggestions = json.loads(text)
 
                                         
 
-                                        # Add to Pending
-
-                                        if user:
-
-                                            database.add_pending_review(
-
-                                                user.id, vid['id'], snippet['title'],
-
-                                                suggestions.get('title'), suggestions.get('description'), 
+                                            # Queue for Pending (saved every SUGGESTIONS_SAVE_EVERY videos)
 
-                                                suggestions.get('tags'), None
+                                            pending_batch.append({
 
-                                            )
+                                                "video_id": vid['id'],
 
-                                            
-
-                                            # Log to Session History
+                                                "original_data": video_metadata.original_data(video),
 
-                                            st.session_state.session_history.append({
+                                                "suggested_data": {'new_title': suggestions.get('title'), 'new_description': suggestions.get('description'), 'new_tags': suggestions.get('tags')}
 
-                                                "timestamp": datetime.datetime.now().strftime("%H:%M:%S"),
+                                            })
 
-                                                "old_title": snippet['title'],
+                                        count += 1
 
-                                                "new_title": suggestions.get('title'),
+                                        progress_bar.progress(count / len(st.session_state.bulk_candidates))
 
-                                                "status": "pending_review"
+                                        if len(pending_batch) >= SUGGESTIONS_SAVE_EVERY:
+                                            save_pending_batch()
 
-                                            })
+                                    except Exception as e:
 
-                                    count += 1
+                                        print(f"Erro ao otimizar {vid['id']}: {e}")
 
-                                    progress_bar.progress(count / len(st.session_state.bulk_candidates))
+                                    
 
-                                except Exception as e:
+                            finally:
+                                # Whatever was generated is kept even if the run stops early
+                                save_pending_batch()
 
-                                    print(f"Erro ao otimizar {vid['id']}: {e}")
+                            status_text.text("Concluído!")
 
-                                    
+                            st.success(f"✅ Sucesso! {len(saved_ids)} vídeos foram analisados e as sugestões estão prontas.")
 
-                            status_text.text("Concluído!")
+                            if failed:
 
-                            st.success(f"✅ Sucesso! {count} vídeos foram analisados e as sugestões estão prontas.")
+                                st.warning(f"⚠️ {len(failed)} sugestão(ões) não foram salvas: " + ", ".join(f"{vid_id} ({err})" for vid_id, err in failed.items()))
 
                             st.info("👉 Vá para a aba **'🏠 Início'** e procure por **'Revisões Pendentes'** para aprovar ou editar as sugestões antes de aplicar no YouTube.")
 
@@ -3520,7 +3269,7 @@ def render_optimize():
 
             try:
 
-                vid_response = get_video_details(service, selected_video_id)
+                vid_response = get_video_details(user.id, service, selected_video_id)
 
                 if vid_response['items']:
 
@@ -3576,306 +3325,468 @@ def render_optimize():
 
             # API Key Check (Reuse from Tab 3 logic or env)
 
-            api_key = os.environ.get("GOOGLE_API_KEY")
+            settings = get_settings()
+
+            api_key = settings.get("GOOGLE_API_KEY")
 
             if not api_key:
 
                 api_key = st.text_input("Insira a Chave da API Gemini para Otimização", type="password", key="opt_api_key")
 
-                if api_key:
+            
 
-                    os.environ["GOOGLE_API_KEY"] = api_key
+            # Generating, editing and applying rerun only this fragment
 
-                    genai.configure(api_key=api_key)
+            render_single_optimization(service, user, selected_video_id, current_title, current_desc, current_tags, settings, api_key)
 
-            
 
-            if st.button("🤖 Gerar Melhorias com IA"):
 
-                if not api_key:
+@st.fragment
 
-                    st.error("Chave da API Gemini necessária.")
+def render_single_optimization(service, user, selected_video_id, current_title, current_desc, current_tags, settings, api_key):
 
-                else:
+    """AI suggestions for one video (generate, review, apply), rerun on its own as a fragment."""
 
-                    with st.spinner("Analisando e Otimizando..."):
+    if st.button("🤖 Gerar Melhorias com IA"):
 
-                        try:
+        if not api_key:
 
-                            model_name = os.environ.get("GOOGLE_MODEL", "gemini-1.5-flash")
+            st.error("Chave da API Gemini necessária.")
 
-                            model = genai.GenerativeModel(model_name)
+        else:
 
-                            # Fetch User Persona
+            with st.spinner("Analisando e Otimizando..."):
 
-                            user = get_current_user_cached()
+                try:
 
-                            user_persona = ""
+                    model_name = settings.get("GOOGLE_MODEL", "gemini-1.5-flash")
 
-                            if user:
+                    model = gemini_client.generative_model(api_key, model_name)
 
-                                persona_key = database.get_user_api_keys(user.id).get("Optimization_Persona", {})
+                    # Fetch User Persona
 
-                                user_persona = persona_key.get("api_key", "")
+                    user = get_current_user_cached()
 
+                    user_persona = database.get_user_persona(user.id) if user else ""
 
 
-                            # Fetch Transcript
 
-                            transcript_text = get_video_transcript(selected_video_id)
+                    # Fetch Transcript
 
-                            
+                    transcript_text = get_video_transcript(selected_video_id, settings)
 
-                            # Debug/Feedback UI
+                    
 
-                            if transcript_text:
+                    # Debug/Feedback UI
 
-                                st.success(f"✅ Transcrição carregada ({len(transcript_text)} caracteres)")
+                    if transcript_text:
 
-                                with st.expander("Ver Transcrição Usada"):
+                        st.success(f"✅ Transcrição carregada ({len(transcript_text)} caracteres)")
 
-                                    st.text(transcript_text[:1000] + "..." if len(transcript_text) > 1000 else transcript_text)
+                        with st.expander("Ver Transcrição Usada"):
 
-                            else:
+                            st.text(transcript_text[:1000] + "..." if len(transcript_text) > 1000 else transcript_text)
 
-                                st.warning("⚠️ Não foi possível carregar a transcrição deste vídeo. A IA usará apenas o título e descrição atuais.")
+                    else:
 
+                        st.warning("⚠️ Não foi possível carregar a transcrição deste vídeo. A IA usará apenas o título e descrição atuais.")
 
 
-                            transcript_context = f"Video Transcript/Content:\n{transcript_text[:15000]}..." if transcript_text else "Transcript not available."
 
+                    transcript_context = f"Video Transcript/Content:\n{transcript_text[:15000]}..." if transcript_text else "Transcript not available."
 
 
-                            # Fetch Channel Learning Context (Top Videos)
 
-                            top_videos = get_top_performing_videos(service, max_results=5)
+                    # Fetch Channel Learning Context (Top Videos)
 
-                            channel_context = ""
+                    top_videos = get_top_performing_videos(service, max_results=5)
 
-                            if top_videos:
+                    channel_context = ""
 
-                                channel_context = "Top Performing Videos on this Channel (Emulate this style):\n"
+                    if top_videos:
 
-                                for tv in top_videos:
+                        channel_context = "Top Performing Videos on this Channel (Emulate this style):\n"
 
-                                    channel_context += f"- {tv['title']}\n"
+                        for tv in top_videos:
 
+                            channel_context += f"- {tv['title']}\n"
 
 
-                            prompt = f"""
 
-                            Optimize this YouTube video metadata for better SEO, CTR, and viral potential.
+                    prompt = f"""
 
-                            
+                    Optimize this YouTube video metadata for better SEO, CTR, and viral potential.
 
-                            User Persona / Channel Style Instructions:
+                    
 
-                            {user_persona if user_persona else "No specific style defined. Use best practices for high CTR and engagement."}
+                    User Persona / Channel Style Instructions:
 
-                            
+                    {user_persona if user_persona else "No specific style defined. Use best practices for high CTR and engagement."}
 
-                            {channel_context}
+                    
 
-                            
+                    {channel_context}
 
-                            Current Title: {current_title}
+                    
 
-                            Current Description: {current_desc}
+                    Current Title: {current_title}
 
-                            Current Tags: {current_tags}
+                    Current Description: {current_desc}
 
-                            
+                    Current Tags: {current_tags}
 
-                            {transcript_context}
+                    
 
-                            
+                    {transcript_context}
 
-                            Output ONLY a JSON object with these keys:
+                    
 
-                            {{
+                    Output ONLY a JSON object with these keys:
 
-                                "title": "A significantly better, click-worthy title (max 100 chars)",
+                    {{
 
-                                "description": "A structured, engaging description with keywords and emojis (max 5000 chars)",
+                        "title": "A significantly better, click-worthy title (max 100 chars)",
 
-                                "tags": ["tag1", "tag2", "tag3", "tag4", "tag5", "tag6", "tag7", "tag8"]
+                        "description": "A structured, engaging description with keywords and emojis (max 5000 chars)",
 
-                            }}
+                        "tags": ["tag1", "tag2", "tag3", "tag4", "tag5", "tag6", "tag7", "tag8"]
 
-                            """
+                    }}
 
-                            response = model.generate_content(prompt)
+                    """
 
-                            
+                    response = model.generate_content(prompt)
 
-                            # Parse JSON
+                    
 
-                            text = response.text.replace('```json', '').replace('```', '')
+                    # Parse JSON
 
-                            suggestions = json.loads(text)
+                    text = response.text.replace('```json', '').replace('```', '')
 
-                            st.session_state.opt_suggestions = suggestions
+                    suggestions = json.loads(text)
 
-                            st.success("Sugestões geradas!")
+                    st.session_state.opt_suggestions = suggestions
 
-                            
+                    st.success("Sugestões geradas!")
 
-                        except Exception as e:
+                    
 
-                            st.error(f"Falha na otimização: {e}")
+                except Exception as e:
 
+                    st.error(f"Falha na otimização: {e}")
 
 
-            # 4. Review & Apply
 
-            if st.session_state.opt_suggestions:
+    # 4. Review & Apply
 
-                st.divider()
+    if st.session_state.opt_suggestions:
 
-                st.subheader("✨ Revisar Sugestões")
+        st.divider()
 
-                
+        st.subheader("✨ Revisar Sugestões")
 
-                sugg = st.session_state.opt_suggestions
+        
 
-                
+        sugg = st.session_state.opt_suggestions
 
-                col_opt1, col_opt2 = st.columns(2)
+        
 
-                
+        col_opt1, col_opt2 = st.columns(2)
 
-                with col_opt1:
+        
 
-                    st.markdown("### 📝 Editar Novos Metadados")
+        with col_opt1:
 
-                    new_opt_title = st.text_input("Novo Título", sugg.get('title', ''), key="new_opt_title")
+            st.markdown("### 📝 Editar Novos Metadados")
 
-                    new_opt_desc = st.text_area("Nova Descrição", sugg.get('description', ''), height=300, key="new_opt_desc")
+            new_opt_title = st.text_input("Novo Título", sugg.get('title', ''), key="new_opt_title")
 
-                    
+            new_opt_desc = st.text_area("Nova Descrição", sugg.get('description', ''), height=300, key="new_opt_desc")
 
-                    tags_list = sugg.get('tags', [])
+            
 
-                    if isinstance(tags_list, list):
+            tags_list = sugg.get('tags', [])
 
-                        tags_str = ", ".join(tags_list)
+            if isinstance(tags_list, list):
 
-                    else:
+                tags_str = ", ".join(tags_list)
 
-                        tags_str = str(tags_list)
+            else:
 
-                    new_opt_tags = st.text_area("Novas Tags", tags_str, key="new_opt_tags")
+                tags_str = str(tags_list)
 
-                
+            new_opt_tags = st.text_area("Novas Tags", tags_str, key="new_opt_tags")
 
-                with col_opt2:
+        
 
-                    st.markdown("### 🆚 Comparação")
+        with col_opt2:
 
-                    st.caption("Original vs Novo")
+            st.markdown("### 🆚 Comparação")
 
-                    st.text(f"Mudança de Título:\n{current_title}\n⬇\n{new_opt_title}")
+            st.caption("Original vs Novo")
 
-                    st.divider()
+            st.text(f"Mudança de Título:\n{current_title}\n⬇\n{new_opt_title}")
 
-                    st.info("Clicar em Aplicar atualizará o vídeo no YouTube imediatamente.")
+            st.divider()
 
-                    
+            st.info("Clicar em Aplicar atualizará o vídeo no YouTube imediatamente.")
 
-                    if st.button("✅ Aplicar Mudanças no YouTube"):
+            
 
-                        if update_video_on_youtube(service, selected_video_id, new_opt_title, new_opt_desc, [t.strip() for t in new_opt_tags.split(',')]):
+            if st.button("✅ Aplicar Mudanças no YouTube"):
 
-                            st.balloons()
+                if update_video_on_youtube(service, selected_video_id, new_opt_title, new_opt_desc, [t.strip() for t in new_opt_tags.split(',')]):
 
-                            st.success("✅ Vídeo atualizado com sucesso no YouTube!")
+                    invalidate_video_cache(user.id, selected_video_id)
 
-                            st.info("As alterações já estão visíveis no seu canal.")
+                    st.balloons()
 
-                            
+                    st.success("✅ Vídeo atualizado com sucesso no YouTube!")
 
-                            # Update History in DB (Optional but good practice)
+                    st.info("As alterações já estão visíveis no seu canal.")
 
-                            user = get_current_user_cached()
+                    
 
-                            if user:
+                    # Update History in DB (Optional but good practice)
 
-                                database.add_optimization_history(user.id, selected_video_id, new_opt_title, "manual_ai", {"timestamp": datetime.datetime.now().isoformat()})
+                    user = get_current_user_cached()
 
+                    if user:
 
+                        write_behind.get_queue().add_optimization_history(user.id, selected_video_id, new_opt_title, "manual_ai", {"timestamp": datetime.datetime.now().isoformat()}, tokens=auth.get_session_tokens())
 
-                            # Add to Session History
 
-                            st.session_state.session_history.append({
 
-                                "timestamp": datetime.datetime.now().strftime("%H:%M:%S"),
+                    # Add to Session History
 
-                                "old_title": current_title,
+                    st.session_state.session_history.append({
 
-                                "new_title": new_opt_title,
+                        "timestamp": datetime.datetime.now().strftime("%H:%M:%S"),
 
-                                "status": "success"
+                        "old_title": current_title,
 
-                            })
+                        "new_title": new_opt_title,
+
+                        "status": "success"
+
+                    })
 
 
 
 # --- Tab 5: Pending Reviews ---
 
+REVIEWS_PAGE_SIZE = 20
+
 def render_reviews():
     user = get_current_user_cached()
     if not user:
         st.warning("Faça login para ver revisões pendentes.")
         return
 
-    pending = database.get_pending_reviews(user.id)
+    # History and deletions are written in the background; hide reviews whose deletion is still queued
+    queued = write_behind.get_queue().queued_video_ids(user.id, write_behind.OP_DELETE_PENDING, tokens=auth.get_session_tokens())
+
+    # Paged on the server: only titles for the current page come back, the full suggestion is
+    # loaded when a card is opened
+    page = st.session_state.get('review_page', 0)
+    rows, total = database.list_pending_reviews(user.id, REVIEWS_PAGE_SIZE, page * REVIEWS_PAGE_SIZE, exclude_video_ids=queued)
+    if not rows and page > 0:
+        page = st.session_state.review_page = max(0, (total - 1) // REVIEWS_PAGE_SIZE)
+        rows, total = database.list_pending_reviews(user.id, REVIEWS_PAGE_SIZE, page * REVIEWS_PAGE_SIZE, exclude_video_ids=queued)
     
-    if not pending:
+    if not total:
         st.container().success("🎉 Tudo em dia! Nenhum vídeo aguardando revisão.")
-    else:
-        st.info(f"Você tem {len(pending)} vídeo(s) aguardando aprovação.")
+        return
+
+    st.info(f"Você tem {total} vídeo(s) aguardando aprovação.")
+
+    report = st.session_state.pop('bulk_report', None)
+    if report:
+        render_bulk_report(report)
+
+    col_b1, col_b2 = st.columns(2)
+    approve_selected = col_b1.button("✅ Aprovar selecionados", key="approve_selected", use_container_width=True)
+    approve_all = col_b2.button(f"✅ Aprovar todos ({total})", key="approve_all", use_container_width=True)
+    st.caption(f"Cada vídeo usa cerca de {bulk_approval.UPDATE_COST} unidades de cota do YouTube "
+               f"({bulk_approval.UPDATE_COST + bulk_approval.THUMBNAIL_COST} com thumbnail). Até "
+               f"{bulk_approval.DEFAULT_QUOTA_BUDGET} unidades por lote; o que passar disso continua pendente.")
+    if approve_selected or approve_all:
+        selected = None if approve_all else {row['video_id'] for row in rows if st.session_state.get(f"select_{row['video_id']}")}
+        if selected == set():
+            st.warning("Selecione ao menos um vídeo nesta página.")
+        else:
+            run_bulk_approval(user, selected, queued)
+
+    # Each card is a fragment: opening, approving or rejecting reruns that card only, not the whole app.
+    # A full rerun reloads the page (queued deletions are already hidden above), so start clean.
+    st.session_state.resolved_reviews = {}
+    st.session_state.review_items = {}
+    for row in rows:
+        render_review_card(user, row)
+
+    pages = (total - 1) // REVIEWS_PAGE_SIZE + 1
+    if pages > 1:
+        col_p1, col_p2, col_p3 = st.columns([1, 2, 1])
+        col_p1.button("⬅️ Anterior", key="reviews_prev", disabled=page == 0, use_container_width=True,
+                      on_click=set_review_page, args=(page - 1,))
+        col_p2.markdown(f"<div style='text-align: center'>Página {page + 1} de {pages}</div>", unsafe_allow_html=True)
+        col_p3.button("Próxima ➡️", key="reviews_next", disabled=page >= pages - 1, use_container_width=True,
+                      on_click=set_review_page, args=(page + 1,))
+
+def set_review_page(page):
+    st.session_state.review_page = page
+
+@st.fragment
+def render_review_card(user, row):
+    """One pending suggestion: a one-line summary, and the editor once it is opened."""
+    video_id = row['video_id']
+    title = row['current_title'] or video_id
+    resolved = st.session_state.setdefault('resolved_reviews', {})
+    if video_id in resolved:
+        st.caption(f"{resolved[video_id]} · {title}")
+        return
+
+    with st.container(border=True):
+        col_s1, col_s2 = st.columns([5, 1])
+        with col_s1:
+            if row['new_title'] and row['new_title'] != row['current_title']:
+                st.markdown(f"🎥 **{title}**  \n✨ {row['new_title']}")
+            else:
+                st.markdown(f"🎥 **{title}**  \n✨ Título mantido; descrição e tags revisadas")
+            st.caption(f"Sugerido em {row['created_at'][:16].replace('T', ' ')}")
+        col_s2.checkbox("Selecionar", key=f"select_{video_id}")
+        opened = col_s2.toggle("Revisar", key=f"open_{video_id}")
+
+        if not opened:
+            return
+
+        # Loaded only when the card is opened, once per page load
+        items = st.session_state.setdefault('review_items', {})
+        if video_id not in items:
+            items[video_id] = database.get_pending_review(user.id, video_id)
+        item = items[video_id]
+        if not item:
+            st.warning("Sugestão não encontrada; talvez já tenha sido revisada.")
+            return
+
+        st.divider()
+        col1, col2 = st.columns([1, 1.5])
         
-        # Convert to list to handle deletion during iteration
-        for video_id in list(pending.keys()):
-            item = pending[video_id]
+        with col1:
+            st.markdown("### 🛑 Original")
+            st.caption("Metadados Atuais")
+            st.text_input("Título Atual", item.get('current_title', title), disabled=True, key=f"old_title_{video_id}")
+            st.text_area("Descrição Atual", item.get('current_description', "..."), disabled=True, height=100, key=f"old_desc_{video_id}")
             
-            with st.expander(f"🎥 {item['current_title']}", expanded=True):
-                col1, col2 = st.columns([1, 1.5])
-                
-                with col1:
-                    st.markdown("### 🛑 Original")
-                    st.caption("Metadados Atuais")
-                    st.text_input("Título Atual", item['current_title'], disabled=True, key=f"old_title_{video_id}")
-                    st.text_area("Descrição Atual", "...", disabled=True, height=100, key=f"old_desc_{video_id}")
-                
-                with col2:
-                    st.markdown("### ✨ Sugestão Otimizada")
-                    st.caption("Gerado por IA • Editável")
-                    new_title = st.text_input("Novo Título", item['new_title'], key=f"title_{video_id}")
-                    new_desc = st.text_area("Nova Descrição", item['new_description'], height=300, key=f"desc_{video_id}")
-                    new_tags = st.text_area("Novas Tags", item['new_tags'], key=f"tags_{video_id}")
-                    
-                    if item.get('thumbnail_path'):
-                        st.image(item['thumbnail_path'], caption="Thumbnail Gerada", width=300)
+        with col2:
+            st.markdown("### ✨ Sugestão Otimizada")
+            st.caption("Gerado por IA • Editável")
+            st.text_input("Novo Título", item['new_title'], key=f"title_{video_id}")
+            st.text_area("Nova Descrição", item['new_description'], height=300, key=f"desc_{video_id}")
+            st.text_area("Novas Tags", item['new_tags'], key=f"tags_{video_id}")
+            
+            if item.get('thumbnail_path'):
+                st.image(item['thumbnail_path'], caption="Thumbnail Gerada", width=300)
+        
+        st.divider()
+        btn_col1, btn_col2, btn_col3 = st.columns([1, 1, 4])
+        
+        # Callbacks run before the fragment reruns, so the card comes back already resolved
+        btn_col1.button("✅ Aprovar", key=f"approve_{video_id}", use_container_width=True,
+                        on_click=approve_review, args=(user, video_id, item))
+        btn_col2.button("🗑️ Rejeitar", key=f"reject_{video_id}", use_container_width=True,
+                        on_click=reject_review, args=(user, video_id))
+
+def approve_review(user, video_id, item):
+    """Applies the (edited) suggestion on YouTube and queues the history entry and the deletion."""
+    service = get_authenticated_service()
+    if not service:
+        return
+    new_title = st.session_state[f"title_{video_id}"]
+    new_desc = st.session_state[f"desc_{video_id}"]
+    new_tags = st.session_state[f"tags_{video_id}"]
+    if update_video_on_youtube(service, video_id, new_title, new_desc, new_tags, item.get('thumbnail_path'), stored=item):
+        invalidate_video_cache(user.id, video_id)
+        # Update History in DB
+        write_queue = write_behind.get_queue()
+        tokens = auth.get_session_tokens()
+        write_queue.add_optimization_history(user.id, video_id, new_title, "optimized", {"timestamp": datetime.datetime.now().isoformat()}, tokens=tokens)
+        # Remove from pending in DB
+        write_queue.delete_pending_review(user.id, video_id, tokens=tokens)
+        st.session_state.resolved_reviews[video_id] = "✅ Aprovado"
+        st.toast("Vídeo atualizado com sucesso!", icon="✅")
+
+def reject_review(user, video_id):
+    write_behind.get_queue().delete_pending_review(user.id, video_id, tokens=auth.get_session_tokens())
+    st.session_state.resolved_reviews[video_id] = "🗑️ Rejeitado"
+    st.toast("Sugestão rejeitada.", icon="🗑️")
+
+def run_bulk_approval(user, video_ids, exclude_video_ids):
+    """Applies the selected reviews (all when video_ids is None) and queues their history and deletion."""
+    # The workers build their own clients from these; refreshing is left to the credential manager
+    creds = get_youtube_credentials()
+    if not creds:
+        return
+    # One query for the full suggestions (the selected ones only, unless approving all); edits made
+    # in an opened card are applied as shown
+    reviews = []
+    for video_id, item in database.get_pending_reviews(user.id, video_ids).items():
+        if video_id in exclude_video_ids:
+            continue
+        reviews.append({
+            "video_id": video_id,
+            "new_title": st.session_state.get(f"title_{video_id}", item.get('new_title')),
+            "new_description": st.session_state.get(f"desc_{video_id}", item.get('new_description')),
+            "new_tags": st.session_state.get(f"tags_{video_id}", item.get('new_tags')),
+            "thumbnail_path": item.get('thumbnail_path'),
+            "snippet": item.get('snippet'),
+            "etag": item.get('etag'),
+        })
+    if not reviews:
+        return
 
-                st.divider()
-                btn_col1, btn_col2, btn_col3 = st.columns([1, 1, 4])
-                
-                if btn_col1.button("✅ Aprovar", key=f"approve_{video_id}", use_container_width=True):
-                    service = get_authenticated_service()
-                    if service:
-                        if update_video_on_youtube(service, video_id, new_title, new_desc, new_tags, item.get('thumbnail_path')):
-                            # Update History in DB
-                            database.add_optimization_history(user.id, video_id, new_title, "optimized", {"timestamp": datetime.datetime.now().isoformat()})
-                            # Remove from pending in DB
-                            database.delete_pending_review(user.id, video_id)
-                            st.toast("Vídeo atualizado com sucesso!", icon="✅")
-                            st.rerun()
-                            
-                if btn_col2.button("🗑️ Rejeitar", key=f"reject_{video_id}", use_container_width=True):
-                    database.delete_pending_review(user.id, video_id)
-                    st.toast("Sugestão rejeitada.", icon="🗑️")
-                    st.rerun()
+    with st.status(f"Aplicando {len(reviews)} sugestão(ões) no YouTube...", expanded=True) as status:
+        progress = st.progress(0.0)
+        results = bulk_approval.approve(creds, reviews,
+                                        on_progress=lambda done, total: progress.progress(done / total))
+        approved = [r for r in results if r['status'] == bulk_approval.STATUS_APPROVED]
+        if approved:
+            write_queue = write_behind.get_queue()
+            tokens = auth.get_session_tokens()
+            timestamp = datetime.datetime.now().isoformat()
+            write_queue.add_optimization_history_bulk(user.id, [{
+                "video_id": r['video_id'],
+                "video_title": r['title'],
+                "action_taken": "optimized",
+                "details": {"timestamp": timestamp, "bulk": True}
+            } for r in approved], tokens=tokens)
+            write_queue.delete_pending_reviews(user.id, [r['video_id'] for r in approved], tokens=tokens)
+            for r in approved:
+                invalidate_video_cache(user.id, r['video_id'])
+        status.update(label=f"{len(approved)} de {len(reviews)} vídeo(s) atualizado(s).", state="complete")
+
+    st.session_state.bulk_report = results
+    st.rerun()
+
+def render_bulk_report(results):
+    """Summary and per-video table of the last bulk approval."""
+    labels = {
+        bulk_approval.STATUS_APPROVED: "✅ Aprovado",
+        bulk_approval.STATUS_FAILED: "❌ Falhou",
+        bulk_approval.STATUS_SKIPPED: "⏭️ Não enviado",
+    }
+    counts = {status: sum(1 for r in results if r['status'] == status) for status in labels}
+    message = (f"Aprovação em lote: {counts[bulk_approval.STATUS_APPROVED]} aprovado(s), "
+               f"{counts[bulk_approval.STATUS_FAILED]} com falha, {counts[bulk_approval.STATUS_SKIPPED]} não enviado(s).")
+    problems = counts[bulk_approval.STATUS_FAILED] + counts[bulk_approval.STATUS_SKIPPED]
+    (st.warning if problems else st.success)(message)
+    with st.expander("Relatório por vídeo", expanded=bool(problems)):
+        st.dataframe(pd.DataFrame([{
+            "Vídeo": r['video_id'],
+            "Título": r['title'],
+            "Resultado": labels[r['status']],
+            "Detalhe": r['error'] or "",
+        } for r in results]), hide_index=True, use_container_width=True)
 # --- Tab 6: Control (Removed) ---
 
 # with tab6:
@@ -3892,11 +3803,9 @@ def fetch_google_models(api_key):
 
     try:
 
-        genai.configure(api_key=api_key)
-
         models = []
 
-        for m in genai.list_models():
+        for m in gemini_client.list_models(api_key):
 
             if 'generateContent' in m.supported_generation_methods:
 
@@ -3918,7 +3827,7 @@ def fetch_openai_models(api_key):
 
         headers = {"Authorization": f"Bearer {api_key}"}
 
-        response = requests.get("https://api.openai.com/v1/models", headers=headers, timeout=5)
+        response = http_client.get_session().get("https://api.openai.com/v1/models", headers=headers, timeout=5)
 
         if response.status_code == 200:
 
@@ -4099,20 +4008,10 @@ def render_integrations():
 
                 current_config[env_var] = data['api_key']
 
-                # CRITICAL: Set env var for this session so other parts of app can use it
-
-                if data['api_key']:
-
-                    os.environ[env_var] = data['api_key']
-
-                    
-
                 if "model_var" in PROVIDERS[provider_name] and data['model']:
 
                     current_config[PROVIDERS[provider_name]["model_var"]] = data['model']
 
-                    os.environ[PROVIDERS[provider_name]["model_var"]] = data['model']
-
 
 
     # --- Status Dashboard & Configuration (Merged) ---
@@ -4363,9 +4262,9 @@ def render_integrations():
 
                                 if success:
 
-                                    os.environ[env_var] = new_key
+                                    # The other pages pick the new key up from get_settings()
 
-                                    if new_model: os.environ[model_var] = new_model
+                                    reset_settings()
 
                                     st.success("Salvo!")
 
@@ -4399,11 +4298,9 @@ def render_integrations():
 
     if user:
 
-        # We reuse user_api_keys table with a special provider name
-
-        persona_key = database.get_user_api_keys(user.id).get("Optimization_Persona", {})
+        # We reuse user_api_keys table with a special provider name (style stored in api_key column)
 
-        current_persona = persona_key.get("api_key", "") # storing style in api_key column
+        current_persona = database.get_user_persona(user.id)
 
 
 
@@ -4449,6 +4346,13 @@ def render_integrations():
 
         st.json({k: "********" if "KEY" in k and v else v for k, v in current_config.items()})
 
+    with st.expander("📶 Latência das APIs Externas"):
+        latency_stats = http_client.get_latency_stats()
+        if latency_stats:
+            st.dataframe(pd.DataFrame.from_dict(latency_stats, orient='index'), use_container_width=True)
+        else:
+            st.caption("Nenhuma chamada externa registrada nesta instância ainda.")
+
 # --- Main Router ---
 if selected_page == "🏠 Início":
     render_home()
@@ -1,5 +1,10 @@
 import os
 import json
+import threading
+import functools
+import contextlib
+from types import SimpleNamespace
+from collections import OrderedDict
 import streamlit as st
 from supabase import create_client, Client
 
@@ -7,8 +12,24 @@ from supabase import create_client, Client
 API_CONFIG_FILE = 'api_config.json'
 SESSION_FILE = '.session'
 
-def init_supabase():
-    """Initialize Supabase client from config or env."""
+def _read_config_file(path=API_CONFIG_FILE):
+    """Returns the parsed config file, re-reading it only when it changes on disk."""
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {}
+    return _parse_config_file(path, mtime)
+
+@functools.lru_cache(maxsize=4)
+def _parse_config_file(path, mtime):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except:
+        return {}
+
+def get_supabase_credentials():
+    """Resolves (url, key) from env, Streamlit Secrets (Cloud) or the config file."""
     url = os.environ.get("SUPABASE_URL")
     key = os.environ.get("SUPABASE_KEY")
     
@@ -23,14 +44,19 @@ def init_supabase():
                 pass
 
     if not url or not key:
-        if os.path.exists(API_CONFIG_FILE):
-            try:
-                with open(API_CONFIG_FILE, 'r') as f:
-                    config = json.load(f)
-                    url = url or config.get("SUPABASE_URL")
-                    key = key or config.get("SUPABASE_KEY")
-            except:
-                pass
+        config = _read_config_file()
+        url = url or config.get("SUPABASE_URL")
+        key = key or config.get("SUPABASE_KEY")
+
+    return url, key
+
+def init_supabase():
+    """Initialize Supabase client from config or env.
+
+    Returns a fresh, session-less client (login, sign-up, OAuth exchange mutate its auth state).
+    Data access should go through get_authenticated_client(), which is cached.
+    """
+    url, key = get_supabase_credentials()
     
     if url and key:
         try:
@@ -117,12 +143,16 @@ def register_user(email, password):
 
 def logout_user():
     """Logs out the current user."""
-    supabase = init_supabase()
+    supabase = get_authenticated_client()
     if supabase:
-        supabase.auth.sign_out()
+        try:
+            supabase.auth.sign_out()
+        except Exception:
+            pass
         
-    # Remove session from state
+    # Remove session from state (and its cached client)
     if 'supabase_session' in st.session_state:
+        _forget_client(st.session_state['supabase_session'])
         del st.session_state['supabase_session']
     if 'user' in st.session_state:
         del st.session_state['user']
@@ -151,28 +181,7 @@ def _get_fixed_pkce_challenge():
 def get_google_login_url():
     """Returns the URL for Google OAuth login."""
     # Load config to get URL/Key - Logic matched with init_supabase
-    supabase_url = os.environ.get("SUPABASE_URL")
-    supabase_key = os.environ.get("SUPABASE_KEY")
-    
-    # Try loading from config if not in env
-    if not supabase_url or not supabase_key:
-        # Check Streamlit Secrets (Cloud)
-        if hasattr(st, "secrets"):
-            try:
-                supabase_url = st.secrets.get("SUPABASE_URL") or st.secrets.get("general", {}).get("SUPABASE_URL")
-                supabase_key = st.secrets.get("SUPABASE_KEY") or st.secrets.get("general", {}).get("SUPABASE_KEY")
-            except:
-                pass
-
-    if not supabase_url or not supabase_key:
-        if os.path.exists(API_CONFIG_FILE):
-            try:
-                with open(API_CONFIG_FILE, 'r') as f:
-                    config = json.load(f)
-                    supabase_url = supabase_url or config.get("SUPABASE_URL")
-                    supabase_key = supabase_key or config.get("SUPABASE_KEY")
-            except:
-                pass
+    supabase_url, supabase_key = get_supabase_credentials()
             
     if not supabase_url or not supabase_key:
         st.error("Supabase URL/Key not found in environment or secrets.")
@@ -245,19 +254,117 @@ def handle_oauth_callback():
         st.error(f"Erro no callback de login: {e}")
     return False
 
+# Authenticated clients, keyed by (url, key, access token). Reusing them keeps the HTTP connections
+# alive and avoids create_client + set_session on every query.
+MAX_CACHED_CLIENTS = 64
+_client_cache = OrderedDict()
+_client_cache_lock = threading.Lock()
+
+def _get_cached_client(url, key, session):
+    cache_key = (url, key, session.access_token)
+    with _client_cache_lock:
+        client = _client_cache.get(cache_key)
+        if client is not None:
+            _client_cache.move_to_end(cache_key)
+            return client, session
+
+    client = create_client(url, key)
+    response = client.auth.set_session(session.access_token, session.refresh_token)
+    # set_session refreshes an expired access token; keep the newest session around
+    if response and response.session:
+        session = response.session
+
+    with _client_cache_lock:
+        _client_cache[cache_key] = client
+        _client_cache[(url, key, session.access_token)] = client
+        while len(_client_cache) > MAX_CACHED_CLIENTS:
+            _client_cache.popitem(last=False)
+    return client, session
+
+def _forget_client(session):
+    """Drops every cached client bound to this session's access token."""
+    with _client_cache_lock:
+        for cache_key in [k for k in _client_cache if k[2] == session.access_token]:
+            del _client_cache[cache_key]
+
+# Background threads (e.g. the write-behind queue) have no st.session_state; they bind the
+# tokens captured from the user's session instead.
+_bound_session = threading.local()
+
+def get_session_tokens():
+    """Returns (access_token, refresh_token) of the logged-in session, or None."""
+    session = st.session_state.get('supabase_session')
+    if not session:
+        return None
+    return session.access_token, session.refresh_token
+
+@contextlib.contextmanager
+def bind_session(access_token, refresh_token):
+    """Makes get_authenticated_client use these tokens on the current thread."""
+    previous = getattr(_bound_session, "session", None)
+    _bound_session.session = SimpleNamespace(access_token=access_token, refresh_token=refresh_token)
+    try:
+        yield
+    finally:
+        _bound_session.session = previous
+
+# The background worker (youtube_seo_optimizer.py) has no user session at all: it reads and writes
+# for every user with the service-role key, which RLS lets through. Never enabled in the app.
+_service_role_enabled = False
+
+def get_service_role_key():
+    """Resolves the service-role key from env or the config file (not from Streamlit Secrets)."""
+    return os.environ.get("SUPABASE_SERVICE_ROLE_KEY") or _read_config_file().get("SUPABASE_SERVICE_ROLE_KEY")
+
+@functools.lru_cache(maxsize=1)
+def _service_client(url, key):
+    return create_client(url, key)
+
+def get_service_client():
+    """Returns a Supabase client with the service-role key, or None if the key isn't configured."""
+    url, _ = get_supabase_credentials()
+    key = get_service_role_key()
+    if not url or not key:
+        return None
+    try:
+        return _service_client(url, key)
+    except Exception as e:
+        print(f"Erro ao conectar com Supabase (service role): {e}")
+        return None
+
+def enable_service_role():
+    """Makes get_authenticated_client() fall back to the service-role client when there's no session.
+    Only for the background worker process. Returns False if the key isn't configured."""
+    global _service_role_enabled
+    _service_role_enabled = True
+    return get_service_role_key() is not None
+
 def get_authenticated_client():
-    """Returns a Supabase client with the active session set."""
-    supabase = init_supabase()
-    if not supabase:
+    """Returns a Supabase client with the active session set (cached per session)."""
+    bound = getattr(_bound_session, "session", None)
+    if bound is None and (_service_role_enabled or 'supabase_session' not in st.session_state):
+        return get_service_client() if _service_role_enabled else None
+
+    url, key = get_supabase_credentials()
+    if not url or not key:
         return None
-        
-    if 'supabase_session' in st.session_state:
+
+    if bound is not None:
         try:
-            session = st.session_state['supabase_session']
-            supabase.auth.set_session(session.access_token, session.refresh_token)
-            return supabase
+            client, _ = _get_cached_client(url, key, bound)
+            return client
         except Exception as e:
-            pass
+            print(f"Erro ao autenticar sessão vinculada: {e}")
+            return None
+
+    try:
+        session = st.session_state['supabase_session']
+        client, current_session = _get_cached_client(url, key, session)
+        if current_session is not session:
+            st.session_state['supabase_session'] = current_session
+        return client
+    except Exception as e:
+        pass
     return None
 
 def get_current_user():
@@ -0,0 +1,48 @@
+"""Times the performance page's catalog table and analytics on a synthetic channel.
+
+Usage: python benchmarks/catalog_benchmark.py [videos]
+Runs offline; no YouTube API or Streamlit needed.
+"""
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import channel_catalog
+
+RUNS = 50
+
+def timed(label, func, runs=RUNS):
+    started = time.perf_counter()
+    for _ in range(runs):
+        result = func()
+    print(f"{label:<35} {(time.perf_counter() - started) * 1000 / runs:8.2f} ms")
+    return result
+
+def fake_items(count):
+    random.seed(42)
+    items = []
+    for i in range(count):
+        seconds = random.choice([random.randint(10, 60), random.randint(120, 7200)])
+        items.append({
+            "id": f"vid{i:06d}",
+            "snippet": {"title": f"Video {i}", "publishedAt": "2024-01-01T12:00:00Z"},
+            "statistics": {"viewCount": str(random.randint(0, 10**6)), "likeCount": str(random.randint(0, 10**4)), "commentCount": "3"},
+            "contentDetails": {"duration": f"PT{seconds // 3600}H{seconds % 3600 // 60}M{seconds % 60}S"},
+        })
+    return items
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    items = fake_items(count)
+    print(f"{count} videos\n")
+    df = timed("build_table (once per cache miss)", lambda: channel_catalog.build_table(items), runs=5)
+    timed("averages_by_type", lambda: channel_catalog.averages_by_type(df))
+    timed("top_videos", lambda: channel_catalog.top_videos(df, 10))
+    print()
+    print(channel_catalog.averages_by_type(df).to_string(index=False))
+
+if __name__ == '__main__':
+    main()
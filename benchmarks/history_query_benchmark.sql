@@ -0,0 +1,101 @@
+-- Query latency of the hot optimization_history / pending_reviews lookups as history grows,
+-- with and without the indexes from migrations/001_hot_query_indexes.sql.
+--
+-- Runs on a scratch schema (bench), never on public. Usage:
+--   psql "$DATABASE_URL" -f benchmarks/history_query_benchmark.sql
+-- The 5M step takes a few minutes; trim the sizes array for a quick run.
+
+create schema if not exists bench;
+
+drop table if exists bench.optimization_history;
+create table bench.optimization_history (
+    id uuid default gen_random_uuid() primary key,
+    user_id uuid not null,
+    video_id text not null,
+    video_title text,
+    action_taken text,
+    details jsonb,
+    created_at timestamp with time zone not null
+);
+
+drop table if exists bench.results;
+create table bench.results (
+    history_rows bigint,
+    query text,
+    indexed boolean,
+    avg_ms numeric
+);
+
+create or replace function bench.time_query(sql text, runs int) returns numeric
+language plpgsql as $$
+declare
+    started timestamptz;
+    i int;
+begin
+    execute sql; -- warm the cache
+    started := clock_timestamp();
+    for i in 1..runs loop
+        execute sql;
+    end loop;
+    return round((extract(epoch from clock_timestamp() - started) * 1000 / runs)::numeric, 3);
+end $$;
+
+do $$
+declare
+    sizes bigint[] := array[10000, 100000, 1000000, 5000000];
+    users int := 500;   -- history spread over this many channels
+    videos int := 2000; -- distinct videos per channel
+    n bigint;
+    loaded bigint := 0;
+    probe_user uuid := md5('user-1')::uuid;
+    queries text[][] := array[
+        array['history by user',
+              format('select video_id, created_at from bench.optimization_history where user_id = %L', probe_user)],
+        array['latest for one video',
+              format('select created_at from bench.optimization_history where user_id = %L and video_id = %L order by created_at desc limit 1', probe_user, 'vid-42')]
+    ];
+    q int;
+    with_index boolean;
+begin
+    foreach n in array sizes loop
+        insert into bench.optimization_history (user_id, video_id, video_title, action_taken, details, created_at)
+        select md5('user-' || (g % users))::uuid,
+               'vid-' || ((g / users) % videos),
+               'Video ' || g,
+               'analyzed',
+               jsonb_build_object('timestamp', now()),
+               now() - (g || ' seconds')::interval
+        from generate_series(loaded + 1, n) g;
+        loaded := n;
+
+        foreach with_index in array array[false, true] loop
+            drop index if exists bench.optimization_history_user_video_created_idx;
+            if with_index then
+                create index optimization_history_user_video_created_idx
+                    on bench.optimization_history (user_id, video_id, created_at desc);
+            end if;
+            analyze bench.optimization_history;
+
+            for q in 1..array_length(queries, 1) loop
+                insert into bench.results
+                values (n, queries[q][1], with_index, bench.time_query(queries[q][2], 20));
+            end loop;
+        end loop;
+    end loop;
+end $$;
+
+select history_rows,
+       query,
+       max(avg_ms) filter (where not indexed) as seq_scan_ms,
+       max(avg_ms) filter (where indexed) as indexed_ms
+from bench.results
+group by history_rows, query
+order by query, history_rows;
+
+-- Plan of the largest run, to confirm the index is used
+explain (analyze, buffers)
+select created_at from bench.optimization_history
+where user_id = md5('user-1')::uuid and video_id = 'vid-42'
+order by created_at desc limit 1;
+
+drop schema bench cascade;
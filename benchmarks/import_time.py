@@ -0,0 +1,86 @@
+"""Measures the Streamlit cold start of app.py and which heavy SDKs it loads.
+
+Usage: python benchmarks/import_time.py [--budget-ms N]
+Each measurement runs in a fresh interpreter. Exits with status 1 if a heavy SDK is imported by the
+landing page or if the first run takes longer than --budget-ms, so CI can track regressions.
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# SDKs that must stay lazy (imported on first use by the page / action that needs them)
+HEAVY_MODULES = [
+    "google.generativeai",
+    "openai",
+    "plotly.express",
+    "googleapiclient.discovery",
+    "youtube_transcript_api",
+    "yt_dlp",
+]
+
+MODULE_PROBE = """
+import sys, time, json, importlib
+started = time.perf_counter()
+importlib.import_module(sys.argv[1])
+print(json.dumps({"ms": (time.perf_counter() - started) * 1000}))
+"""
+
+APP_PROBE = """
+import sys, time, json
+from streamlit.testing.v1 import AppTest
+before = set(sys.modules)
+started = time.perf_counter()
+at = AppTest.from_file("app.py", default_timeout=120)
+at.run()
+elapsed = (time.perf_counter() - started) * 1000
+print(json.dumps({
+    "ms": elapsed,
+    "exceptions": [str(e.value) for e in at.exception],
+    "loaded": sorted(set(sys.modules) - before),
+}))
+"""
+
+def _probe(code, *args):
+    result = subprocess.run(
+        [sys.executable, "-c", code, *args],
+        cwd=ROOT, capture_output=True, text=True, timeout=300
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip())
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=None, help="fail if the first app run is slower")
+    args = parser.parse_args()
+
+    print("Import cost of each heavy SDK (fresh interpreter):")
+    for name in HEAVY_MODULES:
+        try:
+            print(f"  {name:<28} {_probe(MODULE_PROBE, name)['ms']:8.0f} ms")
+        except RuntimeError:
+            print(f"  {name:<28} {'não instalado':>11}")
+
+    app = _probe(APP_PROBE)
+    eager = [name for name in HEAVY_MODULES if name in app["loaded"]]
+    print(f"\nFirst run of app.py (landing page): {app['ms']:.0f} ms")
+    print(f"Heavy SDKs loaded by it: {', '.join(eager) if eager else 'none'}")
+
+    failed = False
+    if app["exceptions"]:
+        print(f"FAIL: the app raised {app['exceptions']}")
+        failed = True
+    if eager:
+        print("FAIL: heavy SDKs must be imported lazily")
+        failed = True
+    if args.budget_ms is not None and app["ms"] > args.budget_ms:
+        print(f"FAIL: cold start above the {args.budget_ms:.0f} ms budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""Times the database.py calls the app makes on every page load against the local SQLite backend.
+
+Usage: python benchmarks/storage_benchmark.py [history_rows]
+Runs offline in a temporary file; no Supabase or Streamlit needed.
+"""
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from storage_sqlite import SQLiteStorage
+
+USERS = 50
+RUNS = 200
+
+def timed(label, func, runs=RUNS):
+    started = time.perf_counter()
+    for _ in range(runs):
+        func()
+    print(f"{label:<45} {(time.perf_counter() - started) * 1000 / runs:8.3f} ms")
+
+def main():
+    history_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as tmp:
+        database.set_backend(SQLiteStorage(os.path.join(tmp, "bench.db")))
+
+        started = time.perf_counter()
+        per_user = history_rows // USERS
+        for u in range(USERS):
+            database.add_optimization_history_bulk(f"user-{u}", [
+                {"video_id": f"vid-{i % 2000}", "video_title": f"Video {i}", "action_taken": "analyzed"}
+                for i in range(per_user)
+            ])
+            database.add_pending_reviews_bulk(f"user-{u}", [
+                {"video_id": f"vid-{i}", "original_data": {"current_title": f"Video {i}"}, "suggested_data": {"new_title": f"Novo {i}"}}
+                for i in range(20)
+            ])
+        print(f"Loaded {history_rows} history rows in {time.perf_counter() - started:.1f}s\n")
+
+        database.save_user_api_key("user-1", "Gemini", "key", "gemini-1.5-flash")
+        timed("get_user_api_keys (cached)", lambda: database.get_user_api_keys("user-1"))
+        timed("get_user_api_keys (refresh)", lambda: database.get_user_api_keys("user-1", refresh=True))
+        timed("get_optimization_history (all videos)", lambda: database.get_optimization_history("user-1"), runs=20)
+        timed("get_optimization_history (one video)", lambda: database.get_optimization_history("user-1", video_ids=["vid-42"]))
+        timed("get_pending_reviews", lambda: database.get_pending_reviews("user-1"))
+        timed("add_optimization_history", lambda: database.add_optimization_history("user-1", "vid-1", "Video", "optimized"))
+
+if __name__ == '__main__':
+    main()
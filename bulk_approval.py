@@ -0,0 +1,186 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import video_metadata
+
+API_SERVICE_NAME = 'youtube'
+API_VERSION = 'v3'
+
+# Applies many pending reviews on YouTube at once. Reviews are split into chunks of up to 50
+# videos; a chunk is one batch HTTP request carrying its videos.update calls, sent over the
+# snippet and ETag stored with each review (video_metadata.py), and chunks run on worker threads.
+# videos.list is only called for reviews stored without them and for videos that changed since.
+# The quota is budgeted before anything is sent; re-sending after a conflict is paid from what the
+# plan left over, and a quotaExceeded from YouTube stops the chunks that haven't started yet. Thumbnails are uploaded one at a time, since media uploads can't go in
+# a batch request.
+CHUNK_SIZE = 50 # API maximum for ids per videos.list call and for calls per batch request
+MAX_WORKERS = 4
+
+# YouTube Data API quota costs, in units
+LIST_COST = 1
+UPDATE_COST = 50
+THUMBNAIL_COST = 50
+DEFAULT_QUOTA_BUDGET = 5000 # half of the default daily quota, leaving room for the rest of the app
+
+# Result status values
+STATUS_APPROVED = 'approved'
+STATUS_FAILED = 'failed'
+STATUS_SKIPPED = 'skipped'
+
+QUOTA_ERROR = "Cota da API do YouTube esgotada"
+
+def _has_thumbnail(review):
+    return bool(review.get('thumbnail_path')) and os.path.exists(review['thumbnail_path'])
+
+def _is_quota_error(error):
+    return "quotaExceeded" in str(error) or "dailyLimitExceeded" in str(error)
+
+def _result(review, status, error=None):
+    return {"video_id": review['video_id'], "title": review.get('new_title'), "status": status, "error": error}
+
+class _Budget:
+    """Quota units left after the plan, spent by the conflict retries of every chunk."""
+
+    def __init__(self, units):
+        self.units = units
+        self._lock = threading.Lock()
+
+    def spend(self, units):
+        """Takes the units if they are left; False otherwise."""
+        with self._lock:
+            if units > self.units:
+                return False
+            self.units -= units
+            return True
+
+def plan(reviews, quota_budget=DEFAULT_QUOTA_BUDGET):
+    """Splits reviews into the chunks that fit the budget and the ones skipped, keeping their order.
+
+    Returns (chunks, skipped, estimated_quota).
+    """
+    chunks, skipped, spent = [], [], 0
+    chunk, chunk_lists = [], False
+    for review in reviews:
+        cost = UPDATE_COST + (THUMBNAIL_COST if _has_thumbnail(review) else 0)
+        needs_list = not video_metadata.stored_version(review)
+        if needs_list and not chunk_lists:
+            cost += LIST_COST
+        if skipped or spent + cost > quota_budget:
+            skipped.append(review)
+            continue
+        spent += cost
+        chunk.append(review)
+        chunk_lists = chunk_lists or needs_list
+        if len(chunk) == CHUNK_SIZE:
+            chunks.append(chunk)
+            chunk, chunk_lists = [], False
+    if chunk:
+        chunks.append(chunk)
+    return chunks, skipped, spent
+
+def _apply_chunk(credentials, chunk, quota_exhausted, budget):
+    """Updates one chunk of videos. Returns {video_id: result}."""
+    from googleapiclient.discovery import build
+    from googleapiclient.http import MediaFileUpload
+
+    # Each worker builds its own client: httplib2 connections are not thread-safe
+    service = build(API_SERVICE_NAME, API_VERSION, credentials=credentials, cache_discovery=False)
+    reviews = {review['video_id']: review for review in chunk}
+    results, conflicts = {}, []
+
+    def _fetch(video_ids):
+        videos = video_metadata.list_videos(service, video_ids) if video_ids else {}
+        for video_id in video_ids:
+            if video_id not in videos:
+                results[video_id] = _result(reviews[video_id], STATUS_FAILED, "Vídeo não encontrado no YouTube")
+        return {video_id: video_metadata.current_version(video) for video_id, video in videos.items()}
+
+    def _updated(request_id, response, exception):
+        if exception is None:
+            results[request_id] = _result(reviews[request_id], STATUS_APPROVED)
+        elif video_metadata.is_conflict(exception):
+            conflicts.append(request_id)
+        else:
+            if _is_quota_error(exception):
+                quota_exhausted.set()
+            results[request_id] = _result(reviews[request_id], STATUS_FAILED, str(exception))
+
+    def _send(versions):
+        batch = service.new_batch_http_request(callback=_updated)
+        for video_id, version in versions.items():
+            review = reviews[video_id]
+            batch.add(video_metadata.update_request(service, video_id, version, review['new_title'],
+                                                    review['new_description'], review.get('new_tags')),
+                      request_id=video_id)
+        batch.execute()
+
+    versions = {video_id: video_metadata.stored_version(review) for video_id, review in reviews.items()}
+    versions.update(_fetch([video_id for video_id, version in versions.items() if version is None]))
+    _send({video_id: version for video_id, version in versions.items() if version is not None})
+
+    # Videos edited on YouTube after their suggestion was generated: send again over the current snippet
+    if conflicts:
+        changed = list(conflicts)
+        conflicts.clear()
+        if not budget.spend(LIST_COST + UPDATE_COST * len(changed)):
+            for video_id in changed:
+                results[video_id] = _result(reviews[video_id], STATUS_FAILED,
+                                            "O vídeo foi alterado no YouTube e não há cota neste lote para reenviar")
+        else:
+            retry = _fetch(changed)
+            if retry:
+                _send(retry)
+        for video_id in conflicts:
+            results[video_id] = _result(reviews[video_id], STATUS_FAILED, "O vídeo foi alterado no YouTube durante a atualização")
+
+    # The metadata is already live, so a thumbnail failure is reported but the review stays approved
+    for video_id, review in reviews.items():
+        if results[video_id]['status'] != STATUS_APPROVED or not _has_thumbnail(review):
+            continue
+        if quota_exhausted.is_set():
+            results[video_id]['error'] = f"Thumbnail não enviada: {QUOTA_ERROR}"
+            continue
+        try:
+            service.thumbnails().set(videoId=video_id, media_body=MediaFileUpload(review['thumbnail_path'])).execute()
+        except Exception as e:
+            if _is_quota_error(e):
+                quota_exhausted.set()
+            results[video_id]['error'] = f"Thumbnail não enviada: {e}"
+    return results
+
+def approve(credentials, reviews, quota_budget=DEFAULT_QUOTA_BUDGET, max_workers=MAX_WORKERS, on_progress=None):
+    """Applies the reviews on YouTube.
+
+    reviews: [{"video_id", "new_title", "new_description", "new_tags", and optionally "thumbnail_path",
+    "snippet" and "etag" from the review's original_data}, ...]
+    on_progress(done, total) is called from the calling thread as chunks finish; total counts the
+    videos that fit the quota budget.
+    Returns one result per video, in input order: {"video_id", "title", "status", "error"}.
+    """
+    reviews = list({review['video_id']: review for review in reviews}.values())
+    chunks, skipped, estimated = plan(reviews, quota_budget)
+    results = {review['video_id']: _result(review, STATUS_SKIPPED, "Fora do orçamento de cota deste lote")
+               for review in skipped}
+    quota_exhausted = threading.Event()
+    budget = _Budget(quota_budget - estimated)
+
+    def _run(chunk):
+        if quota_exhausted.is_set():
+            return {review['video_id']: _result(review, STATUS_SKIPPED, QUOTA_ERROR) for review in chunk}
+        try:
+            return _apply_chunk(credentials, chunk, quota_exhausted, budget)
+        except Exception as e:
+            if _is_quota_error(e):
+                quota_exhausted.set()
+            return {review['video_id']: _result(review, STATUS_FAILED, str(e)) for review in chunk}
+
+    done, total = 0, sum(len(chunk) for chunk in chunks)
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="yt-approve") as executor:
+        futures = {executor.submit(_run, chunk): chunk for chunk in chunks}
+        for future in as_completed(futures):
+            results.update(future.result())
+            done += len(futures[future])
+            if on_progress:
+                on_progress(done, total)
+    return [results[review['video_id']] for review in reviews]
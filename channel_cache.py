@@ -0,0 +1,88 @@
+import copy
+import time
+import inspect
+import functools
+import threading
+from collections import OrderedDict
+
+# Per-user cache for YouTube channel data (stats, analytics, video details).
+# st.cache_data can't be used for these: the service/credentials arguments are unhashable, so
+# they were passed underscored, which left them (and with them the user) out of the cache key and
+# let every user share one entry. Here the key is explicit: (user_id, fetcher, hashable args).
+MAX_ENTRIES = 5000
+
+class ChannelCache:
+    """Thread-safe TTL cache keyed by (user_id, name, args), with per-user invalidation."""
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict() # key -> (expires_at, value), least recently used first
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Returns (hit, value)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, entry[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id, name=None, args=None):
+        """Drops a user's entries: all of them, one fetcher's, or one fetcher call's (name + args)."""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == user_id
+                        and (name is None or k[1] == name)
+                        and (args is None or k[2] == tuple(args))]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+_cache = ChannelCache()
+
+def get_cache():
+    """Returns the process-wide channel cache."""
+    return _cache
+
+def cached(ttl):
+    """Caches a fetcher per user. Its first parameter must be user_id.
+
+    As with st.cache_data, parameters starting with an underscore (service, credentials) are left
+    out of the key; the rest must be hashable. Exceptions are not cached. Callers get their own
+    deep copy of the value, so mutating it (lists, dicts, DataFrames) never changes the cached one.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        key_params = [name for name in list(signature.parameters)[1:] if not name.startswith('_')]
+
+        @functools.wraps(func)
+        def wrapper(user_id, *args, **kwargs):
+            bound = signature.bind(user_id, *args, **kwargs)
+            bound.apply_defaults()
+            key = (user_id, func.__name__, tuple(bound.arguments[name] for name in key_params))
+            hit, value = _cache.get(key)
+            if hit:
+                return copy.deepcopy(value)
+            value = func(user_id, *args, **kwargs)
+            _cache.set(key, copy.deepcopy(value), ttl)
+            return value
+
+        wrapper.invalidate = lambda user_id, *args: _cache.invalidate(user_id, func.__name__, args or None)
+        return wrapper
+    return decorator
+
+def invalidate_user(user_id):
+    """Drops everything cached for a user, e.g. on "Atualizar Dados" or after reconnecting the channel."""
+    _cache.invalidate(user_id)
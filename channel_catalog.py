@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+
+# Whole-channel video table for the performance page. The uploads playlist is paged through
+# completely, statistics are fetched 50 ids per videos.list call (several calls per batch HTTP
+# request), and the result is kept as a typed columnar DataFrame so the analytics below are plain
+# vectorized pandas operations.
+PAGE_SIZE = 50 # API maximum for playlistItems.list and videos.list
+CALLS_PER_BATCH = 20 # videos.list calls sent in one batch HTTP request (API maximum is 50)
+SHORTS_MAX_SECONDS = 60
+
+PLAYLIST_FIELDS = "nextPageToken,items/contentDetails/videoId"
+VIDEO_FIELDS = "items(id,snippet(title,publishedAt),statistics(viewCount,likeCount,commentCount),contentDetails/duration)"
+
+COLUMNS = ['video_id', 'Title', 'Published', 'Duration', 'Views', 'Likes', 'Comments']
+_DURATION_RE = r'P(?:(\d+)D)?T?(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?'
+
+def list_upload_ids(service, uploads_playlist_id):
+    """Every video id in the uploads playlist, newest first."""
+    video_ids = []
+    page_token = None
+    while True:
+        response = service.playlistItems().list(
+            playlistId=uploads_playlist_id,
+            part='contentDetails',
+            maxResults=PAGE_SIZE,
+            pageToken=page_token,
+            fields=PLAYLIST_FIELDS
+        ).execute()
+        video_ids.extend(item['contentDetails']['videoId'] for item in response.get('items', []))
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            return video_ids
+
+def fetch_video_items(service, video_ids):
+    """videos.list items for the ids, using batch requests. Raises the first error."""
+    items, errors = [], []
+
+    def _collect(request_id, response, exception):
+        if exception is not None:
+            errors.append(exception)
+        else:
+            items.extend(response.get('items', []))
+
+    chunks = [video_ids[i:i + PAGE_SIZE] for i in range(0, len(video_ids), PAGE_SIZE)]
+    for start in range(0, len(chunks), CALLS_PER_BATCH):
+        batch = service.new_batch_http_request(callback=_collect)
+        for chunk in chunks[start:start + CALLS_PER_BATCH]:
+            batch.add(service.videos().list(
+                id=','.join(chunk),
+                part='snippet,statistics,contentDetails',
+                fields=VIDEO_FIELDS
+            ))
+        batch.execute()
+        if errors:
+            raise errors[0]
+    return items
+
+def build_table(items):
+    """Turns videos.list items into the catalog DataFrame (one row per video)."""
+    columns = {name: [] for name in COLUMNS}
+    for item in items:
+        snippet, stats = item.get('snippet', {}), item.get('statistics', {})
+        columns['video_id'].append(item['id'])
+        columns['Title'].append(snippet.get('title', ''))
+        columns['Published'].append(snippet.get('publishedAt'))
+        columns['Duration'].append(item.get('contentDetails', {}).get('duration', ''))
+        columns['Views'].append(stats.get('viewCount', 0))
+        columns['Likes'].append(stats.get('likeCount', 0)) # hidden like counts are missing
+        columns['Comments'].append(stats.get('commentCount', 0))
+
+    df = pd.DataFrame(columns)
+    for name in ('Views', 'Likes', 'Comments'):
+        df[name] = pd.to_numeric(df[name], errors='coerce').fillna(0).astype('int64')
+    df['Published'] = pd.to_datetime(df['Published'], utc=True, errors='coerce')
+
+    # astype('string'): an empty column is float64, which has no .str (channels with no uploads)
+    parts = df['Duration'].astype('string').str.extract(_DURATION_RE).fillna(0).astype('int64').to_numpy()
+    df['Seconds'] = parts @ np.array([86400, 3600, 60, 1], dtype='int64')
+    # Live streams and premieres report P0D, so 0 seconds is not a Short
+    is_short = (df['Seconds'] > 0) & (df['Seconds'] <= SHORTS_MAX_SECONDS)
+    df['Type'] = pd.Categorical(np.where(is_short, 'Shorts', 'Video'),
+                                categories=['Shorts', 'Video'])
+    return df.drop(columns='Duration')
+
+def fetch_catalog(service, uploads_playlist_id):
+    """The channel's whole catalog as a DataFrame. Costs about 2 quota units per 50 videos."""
+    return build_table(fetch_video_items(service, list_upload_ids(service, uploads_playlist_id)))
+
+def averages_by_type(df, columns=('Views', 'Likes')):
+    """Mean of the columns per Type (Shorts / Video), one row per type present."""
+    return df.groupby('Type', observed=True)[list(columns)].mean().reset_index()
+
+def top_videos(df, n=10, by='Views'):
+    """The n rows with the highest value of `by`."""
+    return df.nlargest(n, by)
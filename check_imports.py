@@ -17,7 +17,7 @@ import google.generativeai
 import time
 import base64
 import requests
-from moviepy.editor import *
+import video_assembly
 import auth
 import database
 print("All imports successful")
@@ -0,0 +1,78 @@
+import datetime
+
+import database
+
+# Per-user numbers for the home page, computed by the background worker (youtube_seo_optimizer.py)
+# and stored in dashboard_snapshots, so rendering the home page is one primary-key read instead of
+# several YouTube API calls.
+REFRESH_INTERVAL_MINUTES = 30
+DEFAULT_RPM = 1.50 # USD per 1,000 views, same default as the revenue simulator
+PERIOD_DAYS = 28
+
+def _analytics_by_day(creds, start_date, end_date):
+    from googleapiclient.discovery import build # heavy SDK, see lazy_imports.py
+    analytics = build('youtubeAnalytics', 'v2', credentials=creds)
+    response = analytics.reports().query(
+        ids='channel==MINE',
+        startDate=start_date.isoformat(),
+        endDate=end_date.isoformat(),
+        metrics='views,subscribersGained,subscribersLost',
+        dimensions='day',
+        sort='day'
+    ).execute()
+    return response.get('rows', [])
+
+def compute_snapshot(user_id, service, creds, rpm=DEFAULT_RPM, today=None):
+    """Builds the snapshot dict for a user: channel totals, the last 28 days vs the 28 before,
+    estimated revenue and the optimization counters. Raises on YouTube API errors."""
+    channel = service.channels().list(mine=True, part='statistics').execute()['items'][0]['statistics']
+
+    # One Analytics query covers both periods; rows are [day, views, gained, lost]
+    today = today or datetime.date.today()
+    current_start = today - datetime.timedelta(days=PERIOD_DAYS - 1)
+    rows = _analytics_by_day(creds, current_start - datetime.timedelta(days=PERIOD_DAYS), today)
+    current = [row for row in rows if row[0] >= current_start.isoformat()]
+    previous = [row for row in rows if row[0] < current_start.isoformat()]
+    week_start = (today - datetime.timedelta(days=7)).isoformat()
+
+    views_28d = int(sum(row[1] for row in current))
+    return {
+        "subscribers": int(channel.get('subscriberCount', 0)),
+        "subscribers_net_7d": int(sum(row[2] - row[3] for row in current if row[0] >= week_start)),
+        "total_views": int(channel.get('viewCount', 0)),
+        "video_count": int(channel.get('videoCount', 0)),
+        "views_28d": views_28d,
+        "views_prev_28d": int(sum(row[1] for row in previous)),
+        "rpm": rpm,
+        "estimated_revenue_28d": round(views_28d / 1000 * rpm, 2),
+        "optimized_videos": len(database.get_optimization_history(user_id, action="optimized")),
+        "pending_reviews": database.list_pending_reviews(user_id, limit=1)[1],
+    }
+
+def refresh(user_id, service, creds, rpm=DEFAULT_RPM):
+    """Computes and stores a user's snapshot. Returns the data, or None if it failed."""
+    try:
+        data = compute_snapshot(user_id, service, creds, rpm)
+    except Exception as e:
+        print(f"Erro ao calcular o painel ({user_id}): {e}")
+        return None
+    if not database.save_dashboard_snapshot(user_id, data):
+        return None
+    return data
+
+def computed_at(snapshot):
+    """When the snapshot was computed (UTC), or None if it's missing or unreadable."""
+    try:
+        value = datetime.datetime.fromisoformat(snapshot['computed_at'])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return value.astimezone(datetime.timezone.utc)
+
+def is_stale(snapshot, max_age_minutes=REFRESH_INTERVAL_MINUTES * 2):
+    """True if the snapshot is missing or older than the worker should ever let it get."""
+    when = computed_at(snapshot) if snapshot else None
+    if when is None:
+        return True
+    return datetime.datetime.now(datetime.timezone.utc) - when > datetime.timedelta(minutes=max_age_minutes)
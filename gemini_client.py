@@ -0,0 +1,59 @@
+import functools
+import mimetypes
+import pathlib
+
+from lazy_imports import lazy_module
+
+genai = lazy_module("google.generativeai")
+genai_client = lazy_module("google.generativeai.client")
+genai_file_types = lazy_module("google.generativeai.types.file_types")
+genai_model_types = lazy_module("google.generativeai.types.model_types")
+
+DEFAULT_MODEL = "gemini-1.5-flash"
+
+# genai.configure() sets one API key for the whole process, so two sessions with different keys
+# would overwrite each other. Instead, each key gets its own client manager and the objects built
+# here are bound to it explicitly. _ClientManager and model._client are private, so
+# requirements.txt pins google-generativeai to 0.8.x.
+@functools.lru_cache(maxsize=64)
+def _clients(api_key):
+    manager = genai_client._ClientManager()
+    manager.configure(api_key=api_key)
+    return manager
+
+def _client(api_key, name):
+    if not api_key:
+        raise ValueError("Chave de API do Google não configurada.")
+    return _clients(api_key).get_default_client(name)
+
+def generative_model(api_key, model_name=None, **kwargs):
+    """genai.GenerativeModel bound to api_key."""
+    model = genai.GenerativeModel(model_name or DEFAULT_MODEL, **kwargs)
+    model._client = _client(api_key, "generative")
+    return model
+
+def upload_file(api_key, path, mime_type=None, display_name=None):
+    """genai.upload_file with api_key."""
+    path = pathlib.Path(path)
+    mime_type = mime_type or mimetypes.guess_type(path)[0]
+    if mime_type is None:
+        raise ValueError(f"Tipo de arquivo desconhecido: {path.name}")
+    response = _client(api_key, "file").create_file(
+        path=path, mime_type=mime_type, display_name=display_name or path.name
+    )
+    return genai_file_types.File(response)
+
+def get_file(api_key, name):
+    """genai.get_file with api_key."""
+    if "/" not in name:
+        name = f"files/{name}"
+    return genai_file_types.File(_client(api_key, "file").get_file(name=name))
+
+def list_models(api_key):
+    """genai.list_models with api_key."""
+    for model in _client(api_key, "model").list_models(page_size=50):
+        yield genai_model_types.Model(**type(model).to_dict(model))
+
+def delete_file(api_key, name):
+    """File.delete() with api_key."""
+    _client(api_key, "file").delete_file(name=name)
@@ -0,0 +1,89 @@
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Connection pool sizing
+POOL_CONNECTIONS = 10  # number of hosts kept alive at once
+POOL_MAXSIZE = 8  # connections per host kept alive; extra concurrent requests open one that is not kept
+
+# Retries: connection errors are retried for any method, bad statuses only for idempotent ones.
+# 503 is left out on purpose: Hugging Face uses it for "model loading", which the caller handles.
+RETRY_TOTAL = 3
+RETRY_BACKOFF = 0.5
+RETRY_STATUSES = (429, 500, 502, 504)
+
+_session = None
+_deadline_session = None
+_session_lock = threading.Lock()
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+def _record_latency(response, *args, **kwargs):
+    """Response hook that accumulates per-host latency (time until headers arrive)."""
+    host = urlsplit(response.url).netloc
+    elapsed_ms = response.elapsed.total_seconds() * 1000
+    with _stats_lock:
+        entry = _stats.setdefault(host, {"requests": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0})
+        entry["requests"] += 1
+        entry["total_ms"] += elapsed_ms
+        entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+        entry["last_ms"] = elapsed_ms
+        if response.status_code >= 400:
+            entry["errors"] += 1
+
+def _build_session(retry):
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.hooks["response"].append(_record_latency)
+    return session
+
+def get_session():
+    """Returns the process-wide pooled session shared by all REST integrations (keep-alive, retries)."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = _build_session(Retry(
+                total=RETRY_TOTAL,
+                backoff_factor=RETRY_BACKOFF,
+                status_forcelist=RETRY_STATUSES,
+                allowed_methods=frozenset(["GET", "HEAD", "OPTIONS"]),
+                respect_retry_after_header=True,
+                raise_on_status=False
+            ))
+        return _session
+
+def get_deadline_session():
+    """Returns the pooled session for calls bound by a hard deadline (image providers). It never
+    retries: each retry would start with the full timeout again, and those callers fall back to
+    another provider instead."""
+    global _deadline_session
+    with _session_lock:
+        if _deadline_session is None:
+            _deadline_session = _build_session(Retry(total=0, raise_on_status=False))
+        return _deadline_session
+
+def get_latency_stats():
+    """Returns per-host latency stats: {host: {requests, errors, avg_ms, max_ms, last_ms}}."""
+    with _stats_lock:
+        return {
+            host: {
+                "requests": entry["requests"],
+                "errors": entry["errors"],
+                "avg_ms": round(entry["total_ms"] / entry["requests"], 1),
+                "max_ms": round(entry["max_ms"], 1),
+                "last_ms": round(entry["last_ms"], 1)
+            }
+            for host, entry in _stats.items()
+        }
+
+def reset_latency_stats():
+    """Clears the accumulated latency stats."""
+    with _stats_lock:
+        _stats.clear()
@@ -0,0 +1,344 @@
+import os
+import json
+import time
+import uuid
+import base64
+import hashlib
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
+
+import http_client
+import session_settings
+
+# Hard deadline (seconds) for each provider. When one is exceeded, "Auto" falls through to the next provider.
+PROVIDER_TIMEOUTS = {
+    "Stability AI": 60,
+    "OpenAI (DALL-E 3)": 90,
+    "Hugging Face": 60,
+    "Pollinations (Grátis)": 45
+}
+CONNECT_TIMEOUT = 5
+MAX_PARALLEL_SCENES = 5  # storyboards have 3-5 scenes, so all of them run at once
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+DEFAULT_IMAGE_SIZE = "1280x720"
+
+# On-disk cache of generated images, evicted least-recently-used first once it exceeds the cap
+CACHE_DIR = os.path.join('generated_assets', 'image_cache')
+CACHE_MAX_BYTES = 500 * 1024 * 1024
+_cache_lock = threading.Lock()
+
+def _cache_path(prompt, provider, model, size):
+    """Maps (prompt, provider, model, size) to its cache file."""
+    key = hashlib.sha256(json.dumps([prompt, provider, model or "", size]).encode('utf-8')).hexdigest()
+    return os.path.join(CACHE_DIR, f"{key}.img")
+
+def get_cached_image(prompt, provider="Auto", model=None, size=DEFAULT_IMAGE_SIZE):
+    """Returns cached image bytes, or None on a miss. A hit counts as a use for LRU eviction."""
+    path = _cache_path(prompt, provider, model, size)
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        os.utime(path) # mtime doubles as last-access time
+        return data
+    except OSError:
+        return None
+
+def store_cached_image(prompt, provider, model, size, data):
+    """Writes image bytes to the cache and evicts old entries beyond CACHE_MAX_BYTES."""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        path = _cache_path(prompt, provider, model, size)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path) # atomic, so concurrent readers never see partial files
+        _evict_lru()
+    except OSError as e:
+        print(f"Erro ao salvar imagem no cache: {e}")
+
+def _evict_lru():
+    """Deletes least-recently-used cache files until the cache fits in CACHE_MAX_BYTES."""
+    with _cache_lock:
+        entries = []
+        for entry in os.scandir(CACHE_DIR):
+            if entry.name.endswith('.img'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= CACHE_MAX_BYTES:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+def _deadline(provider):
+    """Returns the absolute monotonic deadline for a provider call started now."""
+    return time.monotonic() + PROVIDER_TIMEOUTS[provider]
+
+def _remaining(deadline):
+    """Seconds left until the deadline, raising TimeoutError once it has passed."""
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError("tempo limite excedido")
+    return remaining
+
+def _set_read_timeout(response, seconds):
+    """Bounds the next socket read of a streamed response."""
+    sock = getattr(getattr(response.raw, "connection", None), "sock", None)
+    if sock is not None:
+        sock.settimeout(seconds)
+
+def _read_body(response, deadline):
+    """Reads a streamed response body, enforcing the deadline across the whole download.
+
+    The response is always closed, so a download cut short doesn't keep its pooled connection.
+    """
+    with response:
+        chunks = []
+        _set_read_timeout(response, _remaining(deadline))
+        for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+            chunks.append(chunk)
+            _set_read_timeout(response, _remaining(deadline))
+        return b"".join(chunks)
+
+def generate_image_with_ai(prompt, provider="Auto", model=None, on_fallback=None, size=DEFAULT_IMAGE_SIZE, use_cache=True, settings=None):
+    """Generates an image using available AI providers (Stability > DALL-E 3 > Hugging Face > Pollinations).
+
+    Every provider call has a hard deadline (PROVIDER_TIMEOUTS). Fallback messages are passed to
+    on_fallback instead of being written to the page, so this can run outside the Streamlit thread.
+    Results are cached on disk by (prompt, provider, model, size), so retries come back instantly.
+    API keys come from settings (session_settings.Settings); without it they are resolved from the
+    environment and api_config.json.
+    """
+    if use_cache:
+        cached = get_cached_image(prompt, provider, model, size)
+        if cached:
+            return cached
+
+    settings = settings or session_settings.resolve_settings()
+    img_data = _generate_uncached(prompt, provider, model, on_fallback or print, size, settings)
+    if img_data and use_cache:
+        store_cached_image(prompt, provider, model, size, img_data)
+    return img_data
+
+# --- Providers ---
+# Each provider takes (prompt, model, width, height, settings) and returns image bytes or raises.
+
+PROVIDER_CHAIN = ["Stability AI", "OpenAI (DALL-E 3)", "Hugging Face", "Pollinations (Grátis)"]
+PROVIDER_KEY_VARS = {
+    "Stability AI": "STABILITY_API_KEY",
+    "OpenAI (DALL-E 3)": "OPENAI_API_KEY",
+    "Hugging Face": "HUGGINGFACE_API_TOKEN",
+    "Pollinations (Grátis)": None # Free, always available
+}
+
+# Hugging Face warm-up: wait for the provider's own estimate, within these bounds
+HF_DEFAULT_WARMUP = 10
+HF_MIN_WARMUP = 1
+
+class _ModelLoading(Exception):
+    """Hugging Face answered 503 because the model is still warming up."""
+
+    def __init__(self, estimated_time, deadline):
+        super().__init__(f"modelo carregando (~{estimated_time:.0f}s)")
+        self.estimated_time = estimated_time
+        self.deadline = deadline
+
+def _stability(prompt, model, width, height, settings):
+    deadline = _deadline("Stability AI")
+    api_key = settings.get("STABILITY_API_KEY")
+    engine_id = model or settings.get("STABILITY_MODEL", "stable-diffusion-xl-10-stable")
+    api_host = settings.get('API_HOST', 'https://api.stability.ai')
+
+    # Enhance prompt for realism
+    enhanced_prompt = f"{prompt}, photorealistic, 8k, highly detailed, cinematic lighting, ultra realistic, photography"
+
+    response = http_client.get_deadline_session().post(
+        f"{api_host}/v1/generation/{engine_id}/text-to-image",
+        headers={
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+            "Authorization": f"Bearer {api_key}"
+        },
+        json={
+            "text_prompts": [{"text": enhanced_prompt}],
+            "cfg_scale": 7,
+            "height": height,
+            "width": width,
+            "samples": 1,
+            "steps": 30,
+        },
+        timeout=(CONNECT_TIMEOUT, _remaining(deadline)),
+        stream=True
+    )
+    body = _read_body(response, deadline)
+
+    if response.status_code != 200:
+        raise Exception(f"Non-200 response: {body[:500]!r}")
+
+    data = json.loads(body)
+    return base64.b64decode(data["artifacts"][0]["base64"])
+
+def _dalle(prompt, model, width, height, settings):
+    from openai import OpenAI # heavy SDK, only needed for this provider
+    client = OpenAI(
+        api_key=settings.get("OPENAI_API_KEY"),
+        timeout=PROVIDER_TIMEOUTS["OpenAI (DALL-E 3)"],
+        max_retries=0
+    )
+
+    response = client.images.generate(
+        model="dall-e-3",
+        prompt=f"{prompt}, Photorealistic, cinematic, 4k",
+        size="1024x1024", # DALL-E 3 standard
+        quality="standard",
+        n=1,
+        response_format="b64_json"
+    )
+
+    return base64.b64decode(response.data[0].b64_json)
+
+def _huggingface(prompt, model, width, height, settings, deadline=None):
+    """Hugging Face Inference API (free with token). Raises _ModelLoading on a warm-up 503."""
+    deadline = deadline or _deadline("Hugging Face")
+    api_token = settings.get("HUGGINGFACE_API_TOKEN")
+    model_id = model or settings.get("HUGGINGFACE_MODEL", "stabilityai/stable-diffusion-xl-base-1.0")
+    api_url = f"https://api-inference.huggingface.co/models/{model_id}"
+    headers = {"Authorization": f"Bearer {api_token}"}
+
+    # Enhance prompt
+    enhanced_prompt = f"{prompt}, photorealistic, 8k, highly detailed, cinematic lighting"
+
+    payload = {
+        "inputs": enhanced_prompt,
+        "parameters": {"num_inference_steps": 25}
+    }
+
+    response = http_client.get_deadline_session().post(api_url, headers=headers, json=payload,
+                                              timeout=(CONNECT_TIMEOUT, _remaining(deadline)), stream=True)
+    body = _read_body(response, deadline)
+
+    # Model loading state (common in free tier): the body carries the provider's own estimate
+    if response.status_code == 503:
+        try:
+            estimated_time = float(json.loads(body).get("estimated_time") or HF_DEFAULT_WARMUP)
+        except (ValueError, AttributeError):
+            estimated_time = HF_DEFAULT_WARMUP
+        raise _ModelLoading(estimated_time, deadline)
+
+    if response.status_code != 200:
+        raise Exception(f"Non-200 response: {body[:500]!r}")
+
+    return body
+
+def _huggingface_after_warmup(prompt, model, width, height, settings, loading, cancelled):
+    """Waits for the estimated load time and retries, until it succeeds, the deadline passes or it is cancelled."""
+    while True:
+        wait_time = min(max(loading.estimated_time, HF_MIN_WARMUP), _remaining(loading.deadline))
+        if cancelled.wait(wait_time):
+            return None
+        try:
+            return _huggingface(prompt, model, width, height, settings, deadline=loading.deadline)
+        except _ModelLoading as still_loading:
+            loading = still_loading
+
+def _pollinations(prompt, model, width, height, settings):
+    deadline = _deadline("Pollinations (Grátis)")
+    # URL encode prompt
+    encoded_prompt = requests.utils.quote(f"{prompt}, photorealistic, 4k, cinematic")
+    # Force Flux model for better quality
+    image_url = f"https://image.pollinations.ai/prompt/{encoded_prompt}?width={width}&height={height}&nologo=true&model=flux"
+    response = http_client.get_deadline_session().get(image_url, timeout=(CONNECT_TIMEOUT, _remaining(deadline)), stream=True)
+    body = _read_body(response, deadline)
+    if response.status_code != 200:
+        raise Exception(f"Non-200 response: {response.status_code}")
+    return body
+
+_PROVIDERS = {
+    "Stability AI": _stability,
+    "OpenAI (DALL-E 3)": _dalle,
+    "Hugging Face": _huggingface,
+    "Pollinations (Grátis)": _pollinations
+}
+
+def is_available(provider, settings):
+    """Whether the provider exists and its API key (if it needs one) is in settings."""
+    key_var = PROVIDER_KEY_VARS.get(provider)
+    return provider in _PROVIDERS and (key_var is None or bool(settings.get(key_var)))
+
+def _generate_uncached(prompt, provider, model, notify, size, settings):
+    """Runs the provider fallback chain without touching the cache."""
+    width, height = (int(v) for v in size.split('x'))
+    if provider == "Auto":
+        chain = [name for name in PROVIDER_CHAIN if is_available(name, settings)]
+    else:
+        chain = [provider] if is_available(provider, settings) else []
+    return _run_chain(chain, prompt, model, width, height, settings, notify)
+
+def _run_chain(chain, prompt, model, width, height, settings, notify):
+    """Tries each provider in order; the first image wins."""
+    for index, name in enumerate(chain):
+        rest = chain[index + 1:]
+        try:
+            return _PROVIDERS[name](prompt, model, width, height, settings)
+        except _ModelLoading as loading:
+            return _race_warmup(loading, rest, prompt, model, width, height, settings, notify)
+        except Exception as e:
+            notify(f"{name} falhou ({e}), tentando próximo..." if rest else f"{name} falhou ({e})")
+    return None
+
+def _race_warmup(loading, rest, prompt, model, width, height, settings, notify):
+    """While Hugging Face warms up, runs the rest of the chain in parallel. The first image wins."""
+    cancelled = threading.Event()
+
+    def _warm_hf():
+        try:
+            return _huggingface_after_warmup(prompt, model, width, height, settings, loading, cancelled)
+        except Exception as e:
+            notify(f"Hugging Face falhou ({e})")
+            return None
+
+    if not rest:
+        notify(f"Modelo Hugging Face carregando, aguardando ~{loading.estimated_time:.0f}s...")
+        return _warm_hf()
+
+    notify(f"Modelo Hugging Face carregando (~{loading.estimated_time:.0f}s), tentando {rest[0]} em paralelo...")
+    # Not a `with` block: returning must not wait for the losing branch
+    executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="img-race")
+    pending = {
+        executor.submit(_warm_hf),
+        executor.submit(_run_chain, rest, prompt, model, width, height, settings, notify)
+    }
+    try:
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                if result:
+                    return result
+        return None
+    finally:
+        cancelled.set() # stops a still-sleeping Hugging Face retry
+        executor.shutdown(wait=False)
+
+def generate_scene_images(prompts, provider="Auto", model=None, max_workers=MAX_PARALLEL_SCENES, size=DEFAULT_IMAGE_SIZE, settings=None):
+    """Generates one image per prompt concurrently, with bounded parallelism.
+
+    Yields (index, image_bytes_or_None, warnings) as each scene finishes, in completion order.
+    """
+    settings = settings or session_settings.resolve_settings()
+
+    def _generate(index, prompt):
+        warnings = []
+        img_data = generate_image_with_ai(prompt, provider=provider, model=model, on_fallback=warnings.append, size=size, settings=settings)
+        return index, img_data, warnings
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(prompts)))) as executor:
+        futures = [executor.submit(_generate, i, prompt) for i, prompt in enumerate(prompts)]
+        for future in as_completed(futures):
+            yield future.result()
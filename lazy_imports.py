@@ -0,0 +1,33 @@
+import sys
+import importlib
+import threading
+
+class LazyModule:
+    """Stands in for a module and imports it on first attribute access.
+
+    Heavy SDKs (Gemini, Plotly, the Google API client) cost hundreds of milliseconds to import;
+    with this, a page only pays for the ones it actually uses.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+def lazy_module(name):
+    """Returns a LazyModule for name, or the module itself if something already imported it."""
+    return sys.modules.get(name) or LazyModule(name)
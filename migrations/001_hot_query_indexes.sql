@@ -0,0 +1,41 @@
+-- Indexes and constraints for the queries the app and the worker run on every page load / cycle.
+-- Safe to run more than once. New installs get the same objects from supabase_schema.sql.
+
+-- 1. Optimization History
+-- get_optimization_history filters by user_id; should_optimize and the latest-per-video lookups
+-- also filter by video_id and want the newest created_at first.
+create index if not exists optimization_history_user_video_created_idx
+    on public.optimization_history (user_id, video_id, created_at desc);
+
+-- 2. Pending Reviews
+-- One open suggestion per video: keep the newest row of any duplicates before adding the constraint.
+delete from public.pending_reviews p
+using public.pending_reviews newer
+where p.user_id = newer.user_id
+  and p.video_id = newer.video_id
+  and (p.created_at, p.id) < (newer.created_at, newer.id);
+
+do $$
+begin
+    if not exists (
+        select 1 from pg_constraint where conname = 'pending_reviews_user_id_video_id_key'
+    ) then
+        alter table public.pending_reviews
+            add constraint pending_reviews_user_id_video_id_key unique (user_id, video_id);
+    end if;
+end $$;
+
+-- The unique constraint's index also serves "where user_id = ?" (leading column).
+-- Listing pending reviews newest first:
+create index if not exists pending_reviews_user_created_idx
+    on public.pending_reviews (user_id, created_at desc);
+
+-- 3. Automation Settings
+-- The worker only scans active automations, ordered by when they are due.
+create index if not exists automation_settings_active_next_run_idx
+    on public.automation_settings (next_run)
+    where active;
+
+analyze public.optimization_history;
+analyze public.pending_reviews;
+analyze public.automation_settings;
@@ -0,0 +1,26 @@
+-- Latest optimization per video, computed server-side.
+-- get_optimization_history only needs {video_id: last created_at}; returning that instead of every
+-- history row (with its details jsonb) keeps the payload O(videos) instead of O(history events).
+-- Served by optimization_history_user_video_created_idx (001_hot_query_indexes.sql).
+
+create or replace function public.latest_optimizations(
+    p_user_id uuid,
+    p_video_ids text[] default null,     -- only these videos
+    p_since timestamptz default null,    -- only optimizations at or after this time
+    p_action text default null           -- only this action_taken ('optimized', 'analyzed', ...)
+)
+returns table (video_id text, last_optimized_at timestamptz)
+language sql
+stable
+security invoker -- RLS still limits callers to their own rows
+as $$
+    select h.video_id, max(h.created_at) as last_optimized_at
+    from public.optimization_history h
+    where h.user_id = p_user_id
+      and (p_video_ids is null or h.video_id = any(p_video_ids))
+      and (p_since is null or h.created_at >= p_since)
+      and (p_action is null or h.action_taken = p_action)
+    group by h.video_id;
+$$;
+
+grant execute on function public.latest_optimizations(uuid, text[], timestamptz, text) to authenticated;
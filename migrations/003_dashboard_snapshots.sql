@@ -0,0 +1,22 @@
+-- Precomputed home page numbers, one row per user.
+-- The background worker (youtube_seo_optimizer.py) refreshes each connected user's row every
+-- dashboard_snapshot.REFRESH_INTERVAL_MINUTES; render_home reads it by primary key instead of
+-- calling the YouTube APIs on every page load.
+
+create table if not exists public.dashboard_snapshots (
+    user_id uuid references auth.users(id) on delete cascade primary key,
+    data jsonb not null,
+    computed_at timestamp with time zone default timezone('utc'::text, now()) not null
+);
+
+alter table public.dashboard_snapshots enable row level security;
+
+drop policy if exists "Users can view their own snapshot" on public.dashboard_snapshots;
+drop policy if exists "Users can insert their own snapshot" on public.dashboard_snapshots;
+drop policy if exists "Users can update their own snapshot" on public.dashboard_snapshots;
+create policy "Users can view their own snapshot" on public.dashboard_snapshots
+    for select using (auth.uid() = user_id);
+create policy "Users can insert their own snapshot" on public.dashboard_snapshots
+    for insert with check (auth.uid() = user_id);
+create policy "Users can update their own snapshot" on public.dashboard_snapshots
+    for update using (auth.uid() = user_id);
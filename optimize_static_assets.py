@@ -0,0 +1,36 @@
+"""Regenerates the web-optimized copies of the app images in static/.
+
+Usage: python optimize_static_assets.py
+The PNG sources stay at the repo root (the thumbnail renderer uses logo.png); the app serves the
+WebP files from static/ through Streamlit's static file serving.
+"""
+import os
+
+from PIL import Image
+
+STATIC_DIR = 'static'
+
+# source, output, max size (px), WebP quality
+ASSETS = [
+    ('background.png', 'background.webp', (1920, 1920), 80),
+    ('logo.png', 'logo.webp', (256, 256), 85),
+]
+
+def optimize(source, output, max_size, quality):
+    with Image.open(source) as img:
+        img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+        img.thumbnail(max_size, Image.LANCZOS)
+        img.save(output, "WEBP", quality=quality, method=6)
+    return os.path.getsize(source), os.path.getsize(output)
+
+def main():
+    os.makedirs(STATIC_DIR, exist_ok=True)
+    for source, output, max_size, quality in ASSETS:
+        if not os.path.exists(source):
+            print(f"{source} não encontrado, ignorando.")
+            continue
+        before, after = optimize(source, os.path.join(STATIC_DIR, output), max_size, quality)
+        print(f"{source} -> {STATIC_DIR}/{output}: {before // 1024} KB -> {after // 1024} KB")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+import os
+import json
+import functools
+from types import MappingProxyType
+
+API_CONFIG_FILE = 'api_config.json'
+
+# Stored provider name (user_api_keys.provider) -> (API key setting, model setting).
+# Setting names match the env vars / api_config.json keys, so all three sources line up.
+PROVIDER_SETTINGS = {
+    "Google Gemini": ("GOOGLE_API_KEY", "GOOGLE_MODEL"),
+    "OpenAI (ChatGPT)": ("OPENAI_API_KEY", "OPENAI_MODEL"),
+    "Anthropic (Claude)": ("ANTHROPIC_API_KEY", "ANTHROPIC_MODEL"),
+    "Stability AI": ("STABILITY_API_KEY", "STABILITY_MODEL"),
+    "ElevenLabs": ("ELEVENLABS_API_KEY", "ELEVENLABS_MODEL"),
+    "Pexels": ("PEXELS_API_KEY", "PEXELS_MODEL"),
+    "Hugging Face": ("HUGGINGFACE_API_TOKEN", "HUGGINGFACE_MODEL"),
+}
+
+# Other settings that may come from the environment or api_config.json
+EXTRA_SETTINGS = ("YOUTUBE_CLIENT_ID", "YOUTUBE_CLIENT_SECRET", "API_HOST")
+
+SETTING_NAMES = tuple(name for pair in PROVIDER_SETTINGS.values() for name in pair) + EXTRA_SETTINGS
+
+class Settings:
+    """Read-only API keys and models for one session.
+
+    Resolved once at login and passed explicitly to the LLM, image and YouTube layers instead of
+    being copied into os.environ, which is shared by every session of the process.
+    """
+
+    __slots__ = ("_values",)
+
+    def __init__(self, values=None):
+        object.__setattr__(self, "_values", MappingProxyType({k: v for k, v in (values or {}).items() if v}))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Settings is immutable")
+
+    def get(self, name, default=None):
+        return self._values.get(name, default)
+
+    def __contains__(self, name):
+        return name in self._values
+
+    def as_dict(self):
+        return dict(self._values)
+
+    def youtube_client_config(self):
+        """{client_id, client_secret} when both are set, else None (client_secret.json is used)."""
+        if self.get("YOUTUBE_CLIENT_ID") and self.get("YOUTUBE_CLIENT_SECRET"):
+            return {"client_id": self.get("YOUTUBE_CLIENT_ID"), "client_secret": self.get("YOUTUBE_CLIENT_SECRET")}
+        return None
+
+    def __repr__(self):
+        # Never print the keys themselves
+        return f"Settings({', '.join(sorted(self._values))})"
+
+@functools.lru_cache(maxsize=4)
+def _parse_config_file(path, mtime):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Error loading config: {e}")
+        return {}
+
+def read_config_file(path=API_CONFIG_FILE):
+    """Returns api_config.json as a dict, re-read only when it changes on disk."""
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {}
+    return dict(_parse_config_file(path, mtime))
+
+def resolve_settings(user_keys=None, config_path=API_CONFIG_FILE, environ=None):
+    """Builds a Settings from, in increasing priority: the environment, api_config.json and the
+    user's stored keys ({provider: {"api_key", "model"}}, as returned by database.get_user_api_keys)."""
+    environ = os.environ if environ is None else environ
+    values = {name: environ.get(name) for name in SETTING_NAMES}
+
+    for name, value in read_config_file(config_path).items():
+        if value:
+            values[name] = value
+
+    for provider, data in (user_keys or {}).items():
+        if provider not in PROVIDER_SETTINGS:
+            continue
+        key_name, model_name = PROVIDER_SETTINGS[provider]
+        if data.get('api_key'):
+            values[key_name] = data['api_key']
+        if data.get('model'):
+            values[model_name] = data['model']
+
+    return Settings(values)
@@ -0,0 +1,130 @@
+import os
+import abc
+
+# Which backend database.py talks to: "supabase" (default) or "sqlite" (single node / offline)
+DEFAULT_BACKEND = "supabase"
+DEFAULT_SQLITE_PATH = "youtubeceo.db"
+
+class StorageBackend(abc.ABC):
+    """Interface shared by the storage backends; a backend missing a method can't be instantiated.
+
+    Return conventions match database.py: reads return {} / None on failure, writes return True /
+    False (save_user_api_key returns (success, message)), bulk writes return
+    (saved_video_ids, {video_id: error message}).
+    """
+
+    # Whether writes must run as the user's session (RLS); the write-behind queue parks a user's
+    # writes while it has no valid session for them
+    requires_session = False
+
+    # --- API keys ---
+    @abc.abstractmethod
+    def get_user_api_keys(self, user_id):
+        """Returns {provider: {"api_key": ..., "model": ...}}, or None on failure."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def save_user_api_key(self, user_id, provider, api_key, model=None):
+        raise NotImplementedError
+
+    # --- YouTube tokens ---
+    @abc.abstractmethod
+    def get_youtube_token(self, user_id):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def save_youtube_token(self, user_id, token_data):
+        raise NotImplementedError
+
+    # --- Automation ---
+    @abc.abstractmethod
+    def get_automation_settings(self, user_id):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def save_automation_settings(self, user_id, active, frequency, last_run=None, next_run=None):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_all_active_automations(self):
+        raise NotImplementedError
+
+    # --- Optimization history ---
+    @abc.abstractmethod
+    def get_optimization_history(self, user_id, video_ids=None, since=None, action=None):
+        """Returns {video_id: latest created_at}."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def add_optimization_history(self, user_id, video_id, video_title, action_taken, details=None):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def add_optimization_history_bulk(self, user_id, entries):
+        raise NotImplementedError
+
+    # --- Pending reviews ---
+    @abc.abstractmethod
+    def get_pending_reviews(self, user_id, video_ids=None):
+        """Returns {video_id: original_data + suggested_data + db_id}, only for video_ids if given."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def list_pending_reviews(self, user_id, limit, offset=0, exclude_video_ids=None):
+        """One page of the user's pending reviews, newest first, without the full suggestion.
+
+        Returns (rows, total) where rows are {"video_id", "db_id", "current_title", "new_title",
+        "created_at"} and total counts every pending review not excluded; ([], 0) on failure.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_pending_review(self, user_id, video_id):
+        """Returns one review as original_data + suggested_data + db_id, or None."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def add_pending_review(self, user_id, video_id, original_data, suggested_data):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def add_pending_reviews_bulk(self, user_id, reviews):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def delete_pending_review(self, user_id, video_id):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def delete_pending_reviews(self, user_id, video_ids):
+        """Deletes several pending reviews in one request. Returns True on success."""
+        raise NotImplementedError
+
+    # --- Dashboard snapshots ---
+    @abc.abstractmethod
+    def get_dashboard_snapshot(self, user_id):
+        """Returns {"data": {...}, "computed_at": iso string}, or None if there is none."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def save_dashboard_snapshot(self, user_id, data):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_youtube_connected_users(self):
+        """Returns the ids of every user with a stored YouTube token (used by the worker)."""
+        raise NotImplementedError
+
+def create_backend(name=None):
+    """Builds the backend selected by name or the STORAGE_BACKEND env var.
+
+    The SQLite file defaults to DEFAULT_SQLITE_PATH (override with SQLITE_DB_PATH).
+    """
+    name = (name or os.environ.get("STORAGE_BACKEND") or DEFAULT_BACKEND).strip().lower()
+    if name == "sqlite":
+        from storage_sqlite import SQLiteStorage
+        return SQLiteStorage(os.environ.get("SQLITE_DB_PATH", DEFAULT_SQLITE_PATH))
+    if name == "supabase":
+        from storage_supabase import SupabaseStorage
+        return SupabaseStorage()
+    raise ValueError(f"STORAGE_BACKEND desconhecido: {name}")
@@ -0,0 +1,395 @@
+import json
+import uuid
+import sqlite3
+import datetime
+import threading
+
+from storage import StorageBackend
+
+# Same tables, unique constraints and indexes as supabase_schema.sql. Ids are uuid strings,
+# jsonb columns are JSON text and timestamps are UTC ISO-8601 strings (like PostgREST returns).
+SCHEMA = """
+create table if not exists user_api_keys (
+    id text primary key,
+    user_id text not null,
+    provider text not null,
+    api_key text,
+    model text,
+    created_at text not null,
+    unique(user_id, provider)
+);
+
+create table if not exists youtube_tokens (
+    id text primary key,
+    user_id text not null unique,
+    token_data text not null,
+    updated_at text not null
+);
+
+create table if not exists automation_settings (
+    id text primary key,
+    user_id text not null unique,
+    active integer default 0,
+    frequency integer default 24,
+    last_run text,
+    next_run text,
+    updated_at text not null
+);
+
+create table if not exists optimization_history (
+    id text primary key,
+    user_id text not null,
+    video_id text not null,
+    video_title text,
+    action_taken text,
+    details text,
+    created_at text not null
+);
+
+create table if not exists pending_reviews (
+    id text primary key,
+    user_id text not null,
+    video_id text not null,
+    original_data text,
+    suggested_data text,
+    created_at text not null,
+    unique(user_id, video_id)
+);
+
+create table if not exists dashboard_snapshots (
+    user_id text primary key,
+    data text not null,
+    computed_at text not null
+);
+
+create index if not exists optimization_history_user_video_created_idx
+    on optimization_history (user_id, video_id, created_at desc);
+create index if not exists pending_reviews_user_created_idx
+    on pending_reviews (user_id, created_at desc);
+create index if not exists automation_settings_active_next_run_idx
+    on automation_settings (next_run) where active;
+"""
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+def _new_id():
+    return str(uuid.uuid4())
+
+def _dumps(value):
+    return json.dumps(value) if value is not None else None
+
+def _loads(value):
+    return json.loads(value) if value is not None else None
+
+class SQLiteStorage(StorageBackend):
+    """Local single-file backend: no network hop, no Streamlit or Supabase dependency.
+
+    Each thread gets its own connection; WAL mode lets readers run while another thread writes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("pragma journal_mode=wal")
+            conn.execute("pragma synchronous=normal")
+            self._local.conn = conn
+        return conn
+
+    # --- API keys ---
+    def get_user_api_keys(self, user_id):
+        try:
+            rows = self._connect().execute(
+                "select provider, api_key, model from user_api_keys where user_id = ?", (user_id,)
+            ).fetchall()
+            return {row['provider']: {"api_key": row['api_key'], "model": row['model']} for row in rows}
+        except sqlite3.Error as e:
+            print(f"Erro ao buscar chaves de API: {e}")
+            return None
+
+    def save_user_api_key(self, user_id, provider, api_key, model=None):
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    """insert into user_api_keys (id, user_id, provider, api_key, model, created_at)
+                       values (?, ?, ?, ?, ?, ?)
+                       on conflict(user_id, provider) do update set api_key = excluded.api_key, model = excluded.model""",
+                    (_new_id(), user_id, provider, api_key, model, _now())
+                )
+            return True, "Salvo com sucesso"
+        except sqlite3.Error as e:
+            return False, str(e)
+
+    # --- YouTube tokens ---
+    def get_youtube_token(self, user_id):
+        try:
+            row = self._connect().execute(
+                "select token_data from youtube_tokens where user_id = ?", (user_id,)
+            ).fetchone()
+            return _loads(row['token_data']) if row else None
+        except sqlite3.Error as e:
+            print(f"Erro ao buscar token YouTube: {e}")
+            return None
+
+    def save_youtube_token(self, user_id, token_data):
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    """insert into youtube_tokens (id, user_id, token_data, updated_at) values (?, ?, ?, ?)
+                       on conflict(user_id) do update set token_data = excluded.token_data, updated_at = excluded.updated_at""",
+                    (_new_id(), user_id, _dumps(token_data), _now())
+                )
+            return True
+        except sqlite3.Error as e:
+            print(f"Erro ao salvar token YouTube: {e}")
+            return False
+
+    # --- Automation ---
+    @staticmethod
+    def _automation_row(row):
+        settings = dict(row)
+        settings['active'] = bool(settings['active'])
+        return settings
+
+    def get_automation_settings(self, user_id):
+        try:
+            row = self._connect().execute(
+                "select * from automation_settings where user_id = ?", (user_id,)
+            ).fetchone()
+            return self._automation_row(row) if row else {}
+        except sqlite3.Error as e:
+            print(f"Erro ao buscar configurações de automação: {e}")
+            return {}
+
+    def save_automation_settings(self, user_id, active, frequency, last_run=None, next_run=None):
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    """insert into automation_settings (id, user_id, active, frequency, last_run, next_run, updated_at)
+                       values (?, ?, ?, ?, ?, ?, ?)
+                       on conflict(user_id) do update set active = excluded.active, frequency = excluded.frequency,
+                           last_run = excluded.last_run, next_run = excluded.next_run, updated_at = excluded.updated_at""",
+                    (_new_id(), user_id, int(bool(active)), frequency, last_run, next_run, _now())
+                )
+            return True
+        except sqlite3.Error as e:
+            print(f"Erro ao salvar configurações de automação: {e}")
+            return False
+
+    def get_all_active_automations(self):
+        try:
+            rows = self._connect().execute("select * from automation_settings where active").fetchall()
+            return [self._automation_row(row) for row in rows]
+        except sqlite3.Error as e:
+            print(f"Erro ao buscar automações ativas: {e}")
+            return []
+
+    # --- Optimization history ---
+    def get_optimization_history(self, user_id, video_ids=None, since=None, action=None):
+        if video_ids is not None and not video_ids:
+            return {}
+
+        sql = "select video_id, max(created_at) as last_optimized_at from optimization_history where user_id = ?"
+        params = [user_id]
+        if video_ids is not None:
+            video_ids = list(video_ids)
+            sql += f" and video_id in ({', '.join('?' * len(video_ids))})"
+            params += video_ids
+        if since:
+            sql += " and created_at >= ?"
+            params.append(since)
+        if action:
+            sql += " and action_taken = ?"
+            params.append(action)
+        sql += " group by video_id"
+
+        try:
+            return {row['video_id']: row['last_optimized_at'] for row in self._connect().execute(sql, params)}
+        except sqlite3.Error as e:
+            print(f"Erro ao buscar histórico: {e}")
+            return {}
+
+    def add_optimization_history(self, user_id, video_id, video_title, action_taken, details=None):
+        saved, failed = self.add_optimization_history_bulk(user_id, [{
+            "video_id": video_id,
+            "video_title": video_title,
+            "action_taken": action_taken,
+            "details": details
+        }])
+        return bool(saved)
+
+    def add_optimization_history_bulk(self, user_id, entries):
+        rows = [(
+            _new_id(), user_id, entry['video_id'], entry.get('video_title'), entry['action_taken'],
+            _dumps(entry.get('details')), _now()
+        ) for entry in entries]
+        return self._write_rows(
+            "insert into optimization_history (id, user_id, video_id, video_title, action_taken, details, created_at) values (?, ?, ?, ?, ?, ?, ?)",
+            rows, "Erro ao salvar histórico"
+        )
+
+    # --- Pending reviews ---
+    def get_pending_reviews(self, user_id, video_ids=None):
+        where = "user_id = ?"
+        params = [user_id]
+        if video_ids is not None:
+            video_ids = list(video_ids)
+            where += f" and video_id in ({', '.join('?' * len(video_ids))})"
+            params += video_ids
+        try:
+            rows = self._connect().execute(
+                f"select id, video_id, original_data, suggested_data from pending_reviews where {where} order by created_at desc",
+                params
+            ).fetchall()
+        except sqlite3.Error as e:
+            print(f"Erro ao buscar pendências: {e}")
+            return {}
+
+        pending = {}
+        for row in rows:
+            data = {**(_loads(row['original_data']) or {}), **(_loads(row['suggested_data']) or {})}
+            data['db_id'] = row['id']
+            pending[row['video_id']] = data
+        return pending
+
+    def list_pending_reviews(self, user_id, limit, offset=0, exclude_video_ids=None):
+        where = "user_id = ?"
+        params = [user_id]
+        if exclude_video_ids:
+            exclude_video_ids = list(exclude_video_ids)
+            where += f" and video_id not in ({', '.join('?' * len(exclude_video_ids))})"
+            params += exclude_video_ids
+        try:
+            conn = self._connect()
+            total = conn.execute(f"select count(*) from pending_reviews where {where}", params).fetchone()[0]
+            rows = conn.execute(
+                f"""select id as db_id, video_id, created_at,
+                           json_extract(original_data, '$.current_title') as current_title,
+                           json_extract(suggested_data, '$.new_title') as new_title
+                    from pending_reviews where {where} order by created_at desc limit ? offset ?""",
+                params + [limit, offset]
+            ).fetchall()
+        except sqlite3.Error as e:
+            print(f"Erro ao listar pendências: {e}")
+            return [], 0
+        return [dict(row) for row in rows], total
+
+    def get_pending_review(self, user_id, video_id):
+        try:
+            row = self._connect().execute(
+                "select id, original_data, suggested_data from pending_reviews where user_id = ? and video_id = ?",
+                (user_id, video_id)
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Erro ao buscar pendência: {e}")
+            return None
+        if not row:
+            return None
+        data = {**(_loads(row['original_data']) or {}), **(_loads(row['suggested_data']) or {})}
+        data['db_id'] = row['id']
+        return data
+
+    def add_pending_review(self, user_id, video_id, original_data, suggested_data):
+        saved, failed = self.add_pending_reviews_bulk(user_id, [{
+            "video_id": video_id,
+            "original_data": original_data,
+            "suggested_data": suggested_data
+        }])
+        return bool(saved)
+
+    def add_pending_reviews_bulk(self, user_id, reviews):
+        # One open suggestion per video: a new one replaces the previous
+        rows = [(
+            _new_id(), user_id, review['video_id'], _dumps(review['original_data']),
+            _dumps(review['suggested_data']), _now()
+        ) for review in reviews]
+        return self._write_rows(
+            """insert into pending_reviews (id, user_id, video_id, original_data, suggested_data, created_at)
+               values (?, ?, ?, ?, ?, ?)
+               on conflict(user_id, video_id) do update set original_data = excluded.original_data,
+                   suggested_data = excluded.suggested_data, created_at = excluded.created_at""",
+            rows, "Erro ao salvar pendência"
+        )
+
+    def delete_pending_review(self, user_id, video_id):
+        try:
+            with self._connect() as conn:
+                conn.execute("delete from pending_reviews where user_id = ? and video_id = ?", (user_id, video_id))
+            return True
+        except sqlite3.Error as e:
+            print(f"Erro ao deletar pendência: {e}")
+            return False
+
+    def delete_pending_reviews(self, user_id, video_ids):
+        try:
+            with self._connect() as conn:
+                conn.executemany("delete from pending_reviews where user_id = ? and video_id = ?",
+                                 [(user_id, video_id) for video_id in video_ids])
+            return True
+        except sqlite3.Error as e:
+            print(f"Erro ao deletar pendências: {e}")
+            return False
+
+    # --- Dashboard snapshots ---
+    def get_dashboard_snapshot(self, user_id):
+        try:
+            row = self._connect().execute(
+                "select data, computed_at from dashboard_snapshots where user_id = ?", (user_id,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Erro ao buscar painel: {e}")
+            return None
+        return {"data": _loads(row['data']), "computed_at": row['computed_at']} if row else None
+
+    def save_dashboard_snapshot(self, user_id, data):
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    """insert into dashboard_snapshots (user_id, data, computed_at) values (?, ?, ?)
+                       on conflict(user_id) do update set data = excluded.data, computed_at = excluded.computed_at""",
+                    (user_id, _dumps(data), _now())
+                )
+            return True
+        except sqlite3.Error as e:
+            print(f"Erro ao salvar painel: {e}")
+            return False
+
+    def get_youtube_connected_users(self):
+        try:
+            return [row['user_id'] for row in self._connect().execute("select user_id from youtube_tokens")]
+        except sqlite3.Error as e:
+            print(f"Erro ao buscar usuários conectados: {e}")
+            return []
+
+    def _write_rows(self, sql, rows, error_label):
+        """Writes rows in one transaction; if it fails, row by row to find the bad ones.
+        Rows are tuples with video_id at index 2. Returns (saved_video_ids, {video_id: error})."""
+        if not rows:
+            return [], {}
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(sql, rows)
+            return [row[2] for row in rows], {}
+        except sqlite3.Error as e:
+            if len(rows) > 1:
+                print(f"{error_label} em lote, tentando individualmente: {e}")
+
+        saved, failed = [], {}
+        for row in rows:
+            try:
+                with conn:
+                    conn.execute(sql, row)
+                saved.append(row[2])
+            except sqlite3.Error as e:
+                print(f"{error_label} ({row[2]}): {e}")
+                failed[row[2]] = str(e)
+        return saved, failed
@@ -0,0 +1,422 @@
+import datetime
+
+import streamlit as st
+from auth import init_supabase, get_authenticated_client, get_service_client
+from storage import StorageBackend
+
+class SupabaseStorage(StorageBackend):
+    """Stores everything in the Supabase tables from supabase_schema.sql, as the logged-in user (RLS)."""
+
+    requires_session = True
+
+    def get_user_api_keys(self, user_id):
+        """Reads a user's API keys from Supabase. Returns None on failure."""
+        supabase = get_authenticated_client()
+        if not supabase:
+            return None
+        
+        try:
+            response = supabase.table("user_api_keys").select("*").eq("user_id", user_id).execute()
+            # Convert list of dicts to a simpler dict format: {provider: {key: ..., model: ...}}
+            keys_map = {}
+            for item in response.data:
+                keys_map[item['provider']] = {
+                    "api_key": item.get('api_key'),
+                    "model": item.get('model')
+                }
+            return keys_map
+        except Exception as e:
+            st.error(f"Erro ao buscar chaves de API: {e}")
+            return None
+
+    def save_user_api_key(self, user_id, provider, api_key, model=None):
+        """Saves or updates an API key for a user."""
+        supabase = get_authenticated_client()
+        if not supabase:
+            return False, "Supabase não conectado"
+        
+        try:
+            # Upsert logic
+            data = {
+                "user_id": user_id,
+                "provider": provider,
+                "api_key": api_key,
+                "model": model
+            }
+            
+            # We need to check if it exists to know if we update or insert, 
+            # but Supabase upsert works if we have a unique constraint.
+            # We defined unique(user_id, provider) in SQL, so upsert should work.
+            response = supabase.table("user_api_keys").upsert(data, on_conflict="user_id, provider").execute()
+            return True, "Salvo com sucesso"
+        except Exception as e:
+            return False, str(e)
+
+    def get_youtube_token(self, user_id):
+        """Fetches the YouTube token data for a user."""
+        supabase = get_authenticated_client()
+        if not supabase:
+            return None
+            
+        try:
+            response = supabase.table("youtube_tokens").select("token_data").eq("user_id", user_id).execute()
+            if response.data:
+                return response.data[0]['token_data']
+            return None
+        except Exception as e:
+            print(f"Erro ao buscar token YouTube: {e}")
+            return None
+
+    def save_youtube_token(self, user_id, token_data):
+        """Saves the YouTube token data."""
+        supabase = get_authenticated_client()
+        if not supabase:
+            return False
+            
+        try:
+            data = {
+                "user_id": user_id,
+                "token_data": token_data
+            }
+            supabase.table("youtube_tokens").upsert(data, on_conflict="user_id").execute()
+            return True
+        except Exception as e:
+            print(f"Erro ao salvar token YouTube: {e}")
+            return False
+
+    def get_automation_settings(self, user_id):
+        """Fetches automation settings for a user."""
+        supabase = get_authenticated_client()
+        if not supabase:
+            return {}
+            
+        try:
+            response = supabase.table("automation_settings").select("*").eq("user_id", user_id).execute()
+            if response.data:
+                return response.data[0]
+            return {}
+        except Exception as e:
+            print(f"Erro ao buscar configurações de automação: {e}")
+            return {}
+
+    def save_automation_settings(self, user_id, active, frequency, last_run=None, next_run=None):
+        """Saves automation settings."""
+        supabase = get_authenticated_client()
+        if not supabase:
+            return False
+            
+        try:
+            data = {
+                "user_id": user_id,
+                "active": active,
+                "frequency": frequency,
+                "last_run": last_run,
+                "next_run": next_run
+            }
+            supabase.table("automation_settings").upsert(data, on_conflict="user_id").execute()
+            return True
+        except Exception as e:
+            print(f"Erro ao salvar configurações de automação: {e}")
+            return False
+
+    def get_optimization_history(self, user_id, video_ids=None, since=None, action=None):
+        """Fetches the latest optimization date per video: {video_id: created_at}.
+
+        Optional filters: video_ids (only these videos), since (ISO timestamp) and action (action_taken).
+        """
+        supabase = get_authenticated_client()
+        if not supabase:
+            return {}
+
+        if video_ids is not None and not video_ids:
+            return {}
+
+        try:
+            # Aggregated server-side by the latest_optimizations RPC (migrations/002_latest_optimizations.sql)
+            response = supabase.rpc("latest_optimizations", {
+                "p_user_id": user_id,
+                "p_video_ids": list(video_ids) if video_ids is not None else None,
+                "p_since": since,
+                "p_action": action
+            }).execute()
+            return {item['video_id']: item['last_optimized_at'] for item in response.data}
+        except Exception as e:
+            print(f"RPC latest_optimizations indisponível, lendo histórico completo: {e}")
+
+        try:
+            query = supabase.table("optimization_history").select("video_id, created_at").eq("user_id", user_id)
+            if video_ids is not None:
+                query = query.in_("video_id", list(video_ids))
+            if since:
+                query = query.gte("created_at", since)
+            if action:
+                query = query.eq("action_taken", action)
+            response = query.execute()
+            # Convert to dict format expected by app: {video_id: latest date}
+            history = {}
+            for item in response.data:
+                if item['created_at'] > history.get(item['video_id'], ""):
+                    history[item['video_id']] = item['created_at']
+            return history
+        except Exception as e:
+            print(f"Erro ao buscar histórico: {e}")
+            return {}
+
+    def add_optimization_history(self, user_id, video_id, video_title, action_taken, details=None):
+        """Adds an entry to optimization history."""
+        supabase = get_authenticated_client()
+        if not supabase:
+            return False
+            
+        try:
+            data = {
+                "user_id": user_id,
+                "video_id": video_id,
+                "video_title": video_title,
+                "action_taken": action_taken,
+                "details": details
+            }
+            supabase.table("optimization_history").insert(data).execute()
+            return True
+        except Exception as e:
+            print(f"Erro ao salvar histórico: {e}")
+            return False
+
+    def _insert_rows(self, table, rows, on_conflict=None):
+        """Inserts rows in a single request (upserts when on_conflict is given). If the batch is
+        rejected, retries row by row so one bad row doesn't drop the others.
+        Returns (saved_rows, failed) with failed as [(row, error), ...]."""
+        supabase = get_authenticated_client()
+        if not supabase:
+            return [], [(row, "Cliente Supabase indisponível") for row in rows]
+        if not rows:
+            return [], []
+
+        def write(payload):
+            if on_conflict:
+                return supabase.table(table).upsert(payload, on_conflict=on_conflict).execute()
+            return supabase.table(table).insert(payload).execute()
+
+        try:
+            write(rows)
+            return list(rows), []
+        except Exception as e:
+            if len(rows) == 1:
+                return [], [(rows[0], str(e))]
+            print(f"Erro no insert em lote ({table}), tentando individualmente: {e}")
+
+        saved, failed = [], []
+        for row in rows:
+            try:
+                write(row)
+                saved.append(row)
+            except Exception as e:
+                failed.append((row, str(e)))
+        return saved, failed
+
+    def add_optimization_history_bulk(self, user_id, entries):
+        """Adds many optimization history entries in one request.
+
+        entries: [{"video_id", "video_title", "action_taken", "details" (optional)}, ...]
+        Returns (saved_video_ids, failed) where failed is {video_id: error message}.
+        """
+        rows = [{
+            "user_id": user_id,
+            "video_id": entry['video_id'],
+            "video_title": entry.get('video_title'),
+            "action_taken": entry['action_taken'],
+            "details": entry.get('details')
+        } for entry in entries]
+
+        saved, failed = self._insert_rows("optimization_history", rows)
+        for row, error in failed:
+            print(f"Erro ao salvar histórico ({row['video_id']}): {error}")
+        return [row['video_id'] for row in saved], {row['video_id']: error for row, error in failed}
+
+    def get_pending_reviews(self, user_id, video_ids=None):
+        """Fetches pending reviews (only those for video_ids, if given)."""
+        supabase = get_authenticated_client()
+        if not supabase:
+            return {}
+            
+        try:
+            query = supabase.table("pending_reviews").select("*").eq("user_id", user_id)
+            if video_ids is not None:
+                query = query.in_("video_id", list(video_ids))
+            response = query.execute()
+            # Convert to dict format: {video_id: {data...}}
+            pending = {}
+            for item in response.data:
+                # Merge suggested_data with other fields if needed, or just return suggested_data
+                # App expects a dict of items.
+                # Let's assume suggested_data contains the fields we need.
+                # The worker keeps current_* in original_data; merge it so every item has both sides
+                data = {**(item.get('original_data') or {}), **item['suggested_data']}
+                data['db_id'] = item['id'] # Store DB ID for deletion
+                pending[item['video_id']] = data
+            return pending
+        except Exception as e:
+            print(f"Erro ao buscar pendências: {e}")
+            return {}
+
+    def list_pending_reviews(self, user_id, limit, offset=0, exclude_video_ids=None):
+        """Fetches one page of pending reviews (titles only) and the total count, in one request."""
+        supabase = get_authenticated_client()
+        if not supabase:
+            return [], 0
+
+        try:
+            query = supabase.table("pending_reviews").select(
+                "db_id:id, video_id, created_at, "
+                "current_title:original_data->>current_title, new_title:suggested_data->>new_title",
+                count="exact"
+            ).eq("user_id", user_id)
+            if exclude_video_ids:
+                query = query.not_.in_("video_id", list(exclude_video_ids))
+            response = query.order("created_at", desc=True).range(offset, offset + limit - 1).execute()
+            return response.data, response.count or 0
+        except Exception as e:
+            print(f"Erro ao listar pendências: {e}")
+            return [], 0
+
+    def get_pending_review(self, user_id, video_id):
+        """Fetches one pending review with its full suggestion."""
+        supabase = get_authenticated_client()
+        if not supabase:
+            return None
+
+        try:
+            response = supabase.table("pending_reviews").select("*").eq("user_id", user_id).eq("video_id", video_id).limit(1).execute()
+            if not response.data:
+                return None
+            item = response.data[0]
+            data = {**(item.get('original_data') or {}), **(item.get('suggested_data') or {})}
+            data['db_id'] = item['id']
+            return data
+        except Exception as e:
+            print(f"Erro ao buscar pendência: {e}")
+            return None
+
+    def add_pending_review(self, user_id, video_id, original_data, suggested_data):
+        """Adds a pending review."""
+        supabase = get_authenticated_client()
+        if not supabase:
+            return False
+            
+        try:
+            data = {
+                "user_id": user_id,
+                "video_id": video_id,
+                "original_data": original_data,
+                "suggested_data": suggested_data
+            }
+            supabase.table("pending_reviews").upsert(data, on_conflict="user_id, video_id").execute()
+            return True
+        except Exception as e:
+            print(f"Erro ao salvar pendência: {e}")
+            return False
+
+    def add_pending_reviews_bulk(self, user_id, reviews):
+        """Adds many pending reviews in one request.
+
+        reviews: [{"video_id", "original_data", "suggested_data"}, ...]
+        Returns (saved_video_ids, failed) where failed is {video_id: error message}.
+        """
+        rows = [{
+            "user_id": user_id,
+            "video_id": review['video_id'],
+            "original_data": review['original_data'],
+            "suggested_data": review['suggested_data']
+        } for review in reviews]
+
+        # One open suggestion per video: a new one replaces the previous (unique user_id, video_id)
+        saved, failed = self._insert_rows("pending_reviews", rows, on_conflict="user_id, video_id")
+        for row, error in failed:
+            print(f"Erro ao salvar pendência ({row['video_id']}): {error}")
+        return [row['video_id'] for row in saved], {row['video_id']: error for row, error in failed}
+
+    def delete_pending_review(self, user_id, video_id):
+        """Deletes a pending review."""
+        supabase = get_authenticated_client()
+        if not supabase:
+            return False
+            
+        try:
+            supabase.table("pending_reviews").delete().eq("user_id", user_id).eq("video_id", video_id).execute()
+            return True
+        except Exception as e:
+            print(f"Erro ao deletar pendência: {e}")
+            return False
+
+    def delete_pending_reviews(self, user_id, video_ids):
+        """Deletes several pending reviews in one request."""
+        supabase = get_authenticated_client()
+        if not supabase:
+            return False
+
+        try:
+            supabase.table("pending_reviews").delete().eq("user_id", user_id).in_("video_id", list(video_ids)).execute()
+            return True
+        except Exception as e:
+            print(f"Erro ao deletar pendências: {e}")
+            return False
+
+    def get_dashboard_snapshot(self, user_id):
+        """Fetches the user's dashboard snapshot (one row per user)."""
+        supabase = get_authenticated_client()
+        if not supabase:
+            return None
+
+        try:
+            response = supabase.table("dashboard_snapshots").select("data, computed_at").eq("user_id", user_id).limit(1).execute()
+            return response.data[0] if response.data else None
+        except Exception as e:
+            print(f"Erro ao buscar painel: {e}")
+            return None
+
+    def save_dashboard_snapshot(self, user_id, data):
+        """Stores the user's dashboard snapshot, replacing the previous one."""
+        supabase = get_authenticated_client()
+        if not supabase:
+            return False
+
+        try:
+            supabase.table("dashboard_snapshots").upsert({
+                "user_id": user_id,
+                "data": data,
+                "computed_at": datetime.datetime.now(datetime.timezone.utc).isoformat()
+            }, on_conflict="user_id").execute()
+            return True
+        except Exception as e:
+            print(f"Erro ao salvar painel: {e}")
+            return False
+
+    def get_youtube_connected_users(self):
+        """Fetches the ids of all users with a YouTube token.
+
+        Reads every user, so it needs the service-role client (only the worker calls it).
+        """
+        supabase = get_service_client() or init_supabase()
+        if not supabase:
+            return []
+
+        try:
+            response = supabase.table("youtube_tokens").select("user_id").execute()
+            return [row['user_id'] for row in response.data]
+        except Exception as e:
+            print(f"Erro ao buscar usuários conectados: {e}")
+            return []
+
+    def get_all_active_automations(self):
+        """Fetches all active automation settings."""
+        # Reads every user's settings: only the worker calls it, through the service-role client
+        supabase = get_service_client() or init_supabase()
+        if not supabase:
+            return []
+            
+        try:
+            response = supabase.table("automation_settings").select("*").eq("active", True).execute()
+            return response.data
+        except Exception as e:
+            print(f"Erro ao buscar automações ativas: {e}")
+            return []
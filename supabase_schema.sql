@@ -51,9 +51,19 @@ create table if not exists public.pending_reviews (
     video_id text not null,
     original_data jsonb,
     suggested_data jsonb,
-    created_at timestamp with time zone default timezone('utc'::text, now()) not null
+    created_at timestamp with time zone default timezone('utc'::text, now()) not null,
+    unique(user_id, video_id)
 );
 
+-- Indexes for the hot queries (see migrations/001_hot_query_indexes.sql)
+create index if not exists optimization_history_user_video_created_idx
+    on public.optimization_history (user_id, video_id, created_at desc);
+create index if not exists pending_reviews_user_created_idx
+    on public.pending_reviews (user_id, created_at desc);
+create index if not exists automation_settings_active_next_run_idx
+    on public.automation_settings (next_run)
+    where active;
+
 -- Enable Row Level Security (RLS)
 alter table public.user_api_keys enable row level security;
 alter table public.youtube_tokens enable row level security;
@@ -104,3 +114,42 @@ create policy "Users can update their own reviews" on public.pending_reviews
     for update using (auth.uid() = user_id);
 create policy "Users can delete their own reviews" on public.pending_reviews
     for delete using (auth.uid() = user_id);
+
+-- Latest optimization per video (see migrations/002_latest_optimizations.sql)
+create or replace function public.latest_optimizations(
+    p_user_id uuid,
+    p_video_ids text[] default null,     -- only these videos
+    p_since timestamptz default null,    -- only optimizations at or after this time
+    p_action text default null           -- only this action_taken ('optimized', 'analyzed', ...)
+)
+returns table (video_id text, last_optimized_at timestamptz)
+language sql
+stable
+security invoker -- RLS still limits callers to their own rows
+as $$
+    select h.video_id, max(h.created_at) as last_optimized_at
+    from public.optimization_history h
+    where h.user_id = p_user_id
+      and (p_video_ids is null or h.video_id = any(p_video_ids))
+      and (p_since is null or h.created_at >= p_since)
+      and (p_action is null or h.action_taken = p_action)
+    group by h.video_id;
+$$;
+
+grant execute on function public.latest_optimizations(uuid, text[], timestamptz, text) to authenticated;
+
+-- 6. Dashboard Snapshots (see migrations/003_dashboard_snapshots.sql)
+create table if not exists public.dashboard_snapshots (
+    user_id uuid references auth.users(id) on delete cascade primary key,
+    data jsonb not null,
+    computed_at timestamp with time zone default timezone('utc'::text, now()) not null
+);
+
+alter table public.dashboard_snapshots enable row level security;
+
+create policy "Users can view their own snapshot" on public.dashboard_snapshots
+    for select using (auth.uid() = user_id);
+create policy "Users can insert their own snapshot" on public.dashboard_snapshots
+    for insert with check (auth.uid() = user_id);
+create policy "Users can update their own snapshot" on public.dashboard_snapshots
+    for update using (auth.uid() = user_id);
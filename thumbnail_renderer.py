@@ -0,0 +1,200 @@
+import io
+import os
+import sys
+import csv
+import functools
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageDraw, ImageFont
+
+THUMBNAIL_SIZE = (1280, 720)
+MAX_THUMBNAIL_BYTES = 2 * 1024 * 1024  # YouTube rejects custom thumbnails above 2 MB
+JPEG_QUALITIES = (92, 88, 84, 80, 75, 70, 60, 50)
+
+DEFAULT_LOGO = 'logo.png'
+LOGO_HEIGHT = 96
+MARGIN = 48
+TITLE_MAX_LINES = 3
+TITLE_FONT_SIZES = (110, 96, 84, 72, 62, 54)
+TEXT_COLOR = (255, 255, 255)
+STROKE_COLOR = (0, 0, 0)
+FALLBACK_BACKGROUND = (2, 6, 23)  # Slate-950, same as the dashboard
+
+# Bold fonts tried in order (Linux / Streamlit Cloud, macOS, Windows)
+FONT_CANDIDATES = [
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+    "/Library/Fonts/Arial Bold.ttf",
+    "C:\\Windows\\Fonts\\arialbd.ttf",
+]
+
+# --- Cached layers ---
+# Fonts, backgrounds, the logo and the gradient are loaded once per process and reused for every
+# thumbnail. File layers are keyed by mtime so an edited file is picked up again.
+
+@functools.lru_cache(maxsize=16)
+def _load_font(size):
+    for path in FONT_CANDIDATES:
+        if os.path.exists(path):
+            return ImageFont.truetype(path, size)
+    return ImageFont.load_default(size=size)
+
+@functools.lru_cache(maxsize=32)
+def _load_background(path, mtime):
+    """Loads a background and crops it to fill THUMBNAIL_SIZE (cover)."""
+    with Image.open(path) as img:
+        img = img.convert("RGB")
+        target_w, target_h = THUMBNAIL_SIZE
+        scale = max(target_w / img.width, target_h / img.height)
+        resized = img.resize((round(img.width * scale), round(img.height * scale)), Image.LANCZOS)
+    left = (resized.width - target_w) // 2
+    top = (resized.height - target_h) // 2
+    return resized.crop((left, top, left + target_w, top + target_h))
+
+@functools.lru_cache(maxsize=4)
+def _load_logo(path, mtime, height):
+    with Image.open(path) as img:
+        img = img.convert("RGBA")
+        width = round(img.width * height / img.height)
+        return img.resize((width, height), Image.LANCZOS)
+
+@functools.lru_cache(maxsize=1)
+def _gradient_overlay():
+    """Dark gradient over the lower half so white title text stays readable on any background."""
+    width, height = THUMBNAIL_SIZE
+    column = Image.new("L", (1, height))
+    for y in range(height):
+        column.putpixel((0, y), int(220 * max(0.0, (y - height * 0.35) / (height * 0.65))))
+    overlay = Image.new("RGBA", THUMBNAIL_SIZE, (0, 0, 0, 0))
+    overlay.putalpha(column.resize(THUMBNAIL_SIZE))
+    return overlay
+
+def _mtime(path):
+    return os.path.getmtime(path) if path and os.path.exists(path) else None
+
+# --- Rendering ---
+
+def _wrap_title(draw, title, font, max_width):
+    """Greedy word wrap. Returns the lines, or None if the title needs more than TITLE_MAX_LINES."""
+    lines = []
+    current = ""
+    for word in title.split():
+        candidate = f"{current} {word}".strip()
+        if draw.textlength(candidate, font=font) <= max_width:
+            current = candidate
+            continue
+        if current:
+            lines.append(current)
+        current = word
+        if draw.textlength(word, font=font) > max_width:
+            return None
+    if current:
+        lines.append(current)
+    return lines if len(lines) <= TITLE_MAX_LINES else None
+
+def _fit_title(draw, title, max_width):
+    """Picks the largest font size at which the title fits."""
+    for size in TITLE_FONT_SIZES:
+        font = _load_font(size)
+        lines = _wrap_title(draw, title, font, max_width)
+        if lines:
+            return font, lines
+    font = _load_font(TITLE_FONT_SIZES[-1])
+    lines = _wrap_title(draw, title[:60] + "…", font, max_width) or [title[:30] + "…"]
+    return font, lines
+
+def compose_thumbnail(title, background_path=None, logo_path=DEFAULT_LOGO):
+    """Composites background, gradient, title text and branding into a 1280x720 RGB image."""
+    if background_path and os.path.exists(background_path):
+        canvas = _load_background(background_path, _mtime(background_path)).copy()
+    else:
+        canvas = Image.new("RGB", THUMBNAIL_SIZE, FALLBACK_BACKGROUND)
+
+    canvas.paste(_gradient_overlay(), (0, 0), _gradient_overlay())
+    draw = ImageDraw.Draw(canvas)
+
+    # Title, bottom-left aligned
+    width, height = THUMBNAIL_SIZE
+    font, lines = _fit_title(draw, title.upper(), width - 2 * MARGIN)
+    line_height = font.size + font.size // 6
+    y = height - MARGIN - line_height * len(lines)
+    for line in lines:
+        draw.text((MARGIN, y), line, font=font, fill=TEXT_COLOR,
+                  stroke_width=max(2, font.size // 16), stroke_fill=STROKE_COLOR)
+        y += line_height
+
+    # Branding, top-right
+    if logo_path and os.path.exists(logo_path):
+        logo = _load_logo(logo_path, _mtime(logo_path), LOGO_HEIGHT)
+        canvas.paste(logo, (width - MARGIN - logo.width, MARGIN), logo)
+
+    return canvas
+
+def encode_jpeg(image, max_bytes=MAX_THUMBNAIL_BYTES):
+    """Encodes as progressive JPEG at the highest quality that stays under max_bytes."""
+    data = b""
+    for quality in JPEG_QUALITIES:
+        buffer = io.BytesIO()
+        image.save(buffer, "JPEG", quality=quality, optimize=True, progressive=True)
+        data = buffer.getvalue()
+        if len(data) <= max_bytes:
+            break
+    return data
+
+def render_thumbnail(title, output_path, background_path=None, logo_path=DEFAULT_LOGO):
+    """Renders a thumbnail to output_path. Returns (True, output_path) or (False, error message)."""
+    try:
+        data = encode_jpeg(compose_thumbnail(title, background_path, logo_path))
+        if len(data) > MAX_THUMBNAIL_BYTES:
+            return False, f"Thumbnail excede 2 MB ({len(data)} bytes)."
+        with open(output_path, 'wb') as f:
+            f.write(data)
+        return True, output_path
+    except Exception as e:
+        return False, str(e)
+
+# --- Batch mode ---
+
+def _render_job(job):
+    ok, result = render_thumbnail(job['title'], job['output_path'], job.get('background_path'), job.get('logo_path', DEFAULT_LOGO))
+    return {"output_path": job['output_path'], "success": ok, "error": None if ok else result}
+
+def render_batch(jobs, max_workers=None, chunksize=8):
+    """Renders many thumbnails in parallel across processes.
+
+    jobs: [{"title": ..., "output_path": ..., "background_path": ... (optional)}, ...]
+    Each worker process keeps its own font/layer caches, so shared backgrounds are decoded once per
+    process. Returns one {"output_path", "success", "error"} dict per job, in input order.
+    """
+    if not jobs:
+        return []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_render_job, jobs, chunksize=chunksize))
+
+def main():
+    """Usage: python thumbnail_renderer.py jobs.csv output_dir
+
+    The CSV needs a 'title' column and may have 'background' and 'filename' columns.
+    """
+    if len(sys.argv) != 3:
+        print(main.__doc__)
+        sys.exit(1)
+
+    csv_path, output_dir = sys.argv[1], sys.argv[2]
+    os.makedirs(output_dir, exist_ok=True)
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+
+    jobs = [{
+        "title": row['title'],
+        "background_path": row.get('background') or None,
+        "output_path": os.path.join(output_dir, row.get('filename') or f"thumbnail_{i:04d}.jpg")
+    } for i, row in enumerate(rows)]
+
+    results = render_batch(jobs)
+    failed = [r for r in results if not r['success']]
+    print(f"{len(results) - len(failed)} thumbnails gerados em {output_dir}.")
+    for r in failed:
+        print(f"Falha em {r['output_path']}: {r['error']}")
+
+if __name__ == '__main__':
+    main()
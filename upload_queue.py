@@ -0,0 +1,181 @@
+import os
+import time
+import uuid
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+API_SERVICE_NAME = 'youtube'
+API_VERSION = 'v3'
+
+MAX_CONCURRENT_UPLOADS = 3
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # 8 MB chunks so progress can be reported
+DEFAULT_CATEGORY_ID = '22'  # People & Blogs
+
+# Finished jobs are forgotten after FINISHED_JOB_TTL, and only the newest MAX_FINISHED_JOBS are kept.
+# The file of a failed upload is kept for a retry until its job is forgotten.
+FINISHED_JOB_TTL = 24 * 3600  # seconds
+MAX_FINISHED_JOBS = 200
+
+# Job status values
+STATUS_QUEUED = 'queued'
+STATUS_UPLOADING = 'uploading'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+
+def _remove_file(path):
+    if os.path.exists(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class UploadQueue:
+    """Runs YouTube uploads on worker threads, decoupled from the Streamlit script.
+
+    A single instance is shared by every session of the process, so a user can
+    queue a batch, keep navigating, and read the progress from any session.
+    """
+
+    def __init__(self, max_workers=MAX_CONCURRENT_UPLOADS, on_done=None):
+        """on_done(user_id, video_id) is called from the worker thread after each successful upload."""
+        self.on_done = on_done
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="yt-upload")
+        self._jobs = {}
+        self._requests = {}  # job_id -> (get_credentials, file_path, body, cleanup), until the job is forgotten
+        self._finished_at = {}  # job_id -> time.monotonic() when it finished, oldest first
+        self._lock = threading.Lock()
+
+    def submit(self, user_id, get_credentials, file_path, metadata, privacy="private", cleanup=True):
+        """Queues an upload and returns its job id immediately.
+
+        get_credentials: callable returning the user's YouTube Credentials (or None), called when the
+        upload starts, so a job that waited behind others still gets a fresh token.
+        """
+        job_id = uuid.uuid4().hex[:12]
+        body = {
+            'snippet': {
+                'title': metadata.get('title', ''),
+                'description': metadata.get('description', ''),
+                'tags': metadata.get('tags', []),
+                'categoryId': metadata.get('categoryId', DEFAULT_CATEGORY_ID)
+            },
+            'status': {
+                'privacyStatus': privacy
+            }
+        }
+
+        with self._lock:
+            self._evict_finished()
+            self._requests[job_id] = (get_credentials, file_path, body, cleanup)
+            self._jobs[job_id] = {
+                "id": job_id,
+                "user_id": user_id,
+                "title": body['snippet']['title'],
+                "privacy": privacy,
+                "status": STATUS_QUEUED,
+                "progress": 0.0,
+                "video_id": None,
+                "error": None,
+                "created_at": datetime.datetime.now().isoformat()
+            }
+
+        self._executor.submit(self._run, job_id, user_id, get_credentials, file_path, body, cleanup)
+        return job_id
+
+    def retry(self, job_id):
+        """Queues a failed upload again from its kept file. Returns False if it can't be retried."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] != STATUS_FAILED or not os.path.exists(self._requests[job_id][1]):
+                return False
+            job.update(status=STATUS_QUEUED, progress=0.0, error=None)
+            self._finished_at.pop(job_id, None)
+            user_id = job["user_id"]
+            get_credentials, file_path, body, cleanup = self._requests[job_id]
+
+        self._executor.submit(self._run, job_id, user_id, get_credentials, file_path, body, cleanup)
+        return True
+
+    def get_job(self, job_id):
+        """Returns a snapshot of a single job, or None."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list_jobs(self, user_id):
+        """Returns snapshots of all jobs of a user, newest first."""
+        with self._lock:
+            jobs = [dict(job) for job in self._jobs.values() if job["user_id"] == user_id]
+        return sorted(jobs, key=lambda job: job["created_at"], reverse=True)
+
+    def clear_finished(self, user_id):
+        """Forgets completed and failed jobs of a user."""
+        with self._lock:
+            for job_id in [j["id"] for j in self._jobs.values()
+                           if j["user_id"] == user_id and j["status"] in (STATUS_DONE, STATUS_FAILED)]:
+                self._forget(job_id)
+
+    def _forget(self, job_id):
+        """Drops a finished job and the file kept for its retry. Hold _lock."""
+        del self._jobs[job_id]
+        self._finished_at.pop(job_id, None)
+        _, file_path, _, cleanup = self._requests.pop(job_id)
+        if cleanup:
+            _remove_file(file_path)
+
+    def _evict_finished(self):
+        """Forgets finished jobs past FINISHED_JOB_TTL or beyond MAX_FINISHED_JOBS. Hold _lock."""
+        expired = time.monotonic() - FINISHED_JOB_TTL
+        finished = list(self._finished_at.items())
+        for i, (job_id, finished_at) in enumerate(finished):
+            if finished_at <= expired or len(finished) - i > MAX_FINISHED_JOBS:
+                self._forget(job_id)
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+                if fields.get("status") in (STATUS_DONE, STATUS_FAILED):
+                    self._finished_at[job_id] = time.monotonic()
+
+    def _run(self, job_id, user_id, get_credentials, file_path, body, cleanup):
+        self._update(job_id, status=STATUS_UPLOADING)
+        try:
+            from googleapiclient.discovery import build
+            from googleapiclient.http import MediaFileUpload
+
+            credentials = get_credentials()
+            if credentials is None:
+                raise RuntimeError("Canal do YouTube desconectado.")
+
+            # Each worker builds its own client: httplib2 connections are not thread-safe
+            service = build(API_SERVICE_NAME, API_VERSION, credentials=credentials, cache_discovery=False)
+            media = MediaFileUpload(file_path, chunksize=UPLOAD_CHUNK_SIZE, resumable=True)
+            request = service.videos().insert(
+                part=','.join(body.keys()),
+                body=body,
+                media_body=media
+            )
+
+            response = None
+            while response is None:
+                status, response = request.next_chunk(num_retries=3)
+                if status:
+                    self._update(job_id, progress=status.progress())
+
+            self._update(job_id, status=STATUS_DONE, progress=1.0, video_id=response['id'])
+        except Exception as e:
+            print(f"Erro no envio {job_id}: {e}")
+            self._update(job_id, status=STATUS_FAILED, error=str(e))
+        else:
+            # Uploaded: the file is no longer needed (a failed one is kept for retry())
+            if cleanup:
+                _remove_file(file_path)
+            if self.on_done:
+                try:
+                    self.on_done(user_id, response['id'])
+                except Exception as e:
+                    print(f"Erro após o envio {job_id}: {e}")
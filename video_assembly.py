@@ -0,0 +1,144 @@
+import os
+import time
+import shutil
+import subprocess
+import tempfile
+
+# Uses the ffmpeg binary installed via packages.txt (override with FFMPEG_BIN)
+FFMPEG_BIN = os.environ.get("FFMPEG_BIN", "ffmpeg")
+
+OUTPUT_WIDTH = 1280
+OUTPUT_HEIGHT = 720
+OUTPUT_FPS = 24
+# Slideshows are static frames: the fastest x264 preset plus the stillimage tune keeps quality
+# while encoding a few seconds of video in well under a second of CPU time.
+X264_PRESET = "ultrafast"
+X264_CRF = 23
+RENDER_TIMEOUT = 300
+
+# Each generation renders into its own folder (video_<id>/ under generated_assets). The scene
+# images are deleted once the MP4 exists; old folders are pruned oldest first, like the image cache.
+RUN_DIR_PREFIX = "video_"
+RUNS_MAX_BYTES = 500 * 1024 * 1024
+RUN_MAX_AGE = 24 * 3600 # seconds; also clears folders left behind by failed runs
+RUN_MIN_AGE = 600 # seconds; younger folders may belong to a render still in progress
+
+def ffmpeg_available():
+    """Checks if the ffmpeg binary can be found."""
+    return shutil.which(FFMPEG_BIN) is not None
+
+def _concat_entry(path):
+    """Quotes a file path for the concat demuxer list."""
+    return "file '" + os.path.abspath(path).replace("'", "'\\''") + "'"
+
+def _write_concat_list(scenes, list_path):
+    """Writes an ffconcat list where each image is shown for its scene duration."""
+    lines = ["ffconcat version 1.0"]
+    for image_path, duration in scenes:
+        lines.append(_concat_entry(image_path))
+        lines.append(f"duration {float(duration):.3f}")
+    # The demuxer ignores the duration of the last entry unless the file is listed again
+    lines.append(_concat_entry(scenes[-1][0]))
+    with open(list_path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
+
+def build_ffmpeg_command(list_path, output_path, width=OUTPUT_WIDTH, height=OUTPUT_HEIGHT, fps=OUTPUT_FPS):
+    """Builds the ffmpeg command that encodes a concat list of images into an H.264 MP4."""
+    # Letterbox every frame into width x height; eval=frame re-evaluates the sizes per image
+    video_filter = (
+        f"scale=w='min({width},iw*{height}/ih)':h='min({height},ih*{width}/iw)':eval=frame,"
+        f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:eval=frame,setsar=1,"
+        f"fps={fps},format=yuv420p"
+    )
+    return [
+        FFMPEG_BIN, "-y", "-hide_banner", "-loglevel", "error",
+        # Keep one filter graph when scene sizes differ (e.g. DALL-E squares among 16:9 frames);
+        # rebuilding it mid-stream resets the fps filter and drops the earlier scenes
+        "-reinit_filter", "0",
+        "-f", "concat", "-safe", "0", "-i", list_path,
+        "-vf", video_filter,
+        "-c:v", "libx264", "-preset", X264_PRESET, "-tune", "stillimage", "-crf", str(X264_CRF),
+        "-movflags", "+faststart",
+        "-an",
+        output_path
+    ]
+
+def assemble_slideshow(scenes, output_path, width=OUTPUT_WIDTH, height=OUTPUT_HEIGHT, fps=OUTPUT_FPS):
+    """Encodes scenes [(image_path, duration_seconds), ...] into an MP4 by driving ffmpeg directly.
+
+    Returns (True, output_path) on success or (False, error message).
+    """
+    if not scenes:
+        return False, "Nenhuma cena para renderizar."
+    if not ffmpeg_available():
+        return False, f"ffmpeg não encontrado ({FFMPEG_BIN})."
+
+    list_fd, list_path = tempfile.mkstemp(suffix=".ffconcat")
+    os.close(list_fd)
+    try:
+        _write_concat_list(scenes, list_path)
+        result = subprocess.run(
+            build_ffmpeg_command(list_path, output_path, width, height, fps),
+            capture_output=True,
+            text=True,
+            timeout=RENDER_TIMEOUT
+        )
+        if result.returncode != 0:
+            return False, result.stderr.strip() or f"ffmpeg saiu com código {result.returncode}"
+        return True, output_path
+    except subprocess.TimeoutExpired:
+        return False, f"ffmpeg excedeu {RENDER_TIMEOUT}s."
+    except OSError as e:
+        return False, str(e)
+    finally:
+        try:
+            os.remove(list_path)
+        except OSError:
+            pass
+
+def remove_files(paths):
+    """Deletes files, ignoring the ones already gone."""
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def _dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+def prune_run_dirs(parent, keep=None, max_bytes=RUNS_MAX_BYTES, max_age=RUN_MAX_AGE):
+    """Deletes run folders under parent older than max_age, then the oldest ones until all of them
+    fit in max_bytes. keep and folders younger than RUN_MIN_AGE are never deleted."""
+    now = time.time()
+    keep = os.path.abspath(keep) if keep else None
+    runs = []
+    try:
+        for entry in os.scandir(parent):
+            if entry.is_dir() and entry.name.startswith(RUN_DIR_PREFIX):
+                runs.append((entry.stat().st_mtime, entry.path))
+    except OSError:
+        return
+
+    total, candidates = 0, []
+    for mtime, path in sorted(runs):
+        if os.path.abspath(path) != keep and now - mtime > max_age:
+            shutil.rmtree(path, ignore_errors=True)
+            continue
+        size = _dir_size(path)
+        total += size
+        if os.path.abspath(path) != keep and now - mtime >= RUN_MIN_AGE:
+            candidates.append((path, size))
+
+    for path, size in candidates:
+        if total <= max_bytes:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
@@ -0,0 +1,93 @@
+# Title/description/tags updates without a read before every write. When a suggestion is
+# generated, the video's updatable snippet fields and its ETag go into the review's original_data;
+# applying it sends that snippet with the new metadata and an If-Match header, so YouTube answers
+# 412 if the video changed in the meantime, and only then is the video fetched again.
+PAGE_SIZE = 50 # API maximum for ids per videos.list call
+
+# Snippet fields videos.update writes; the rest of the snippet is read-only. Writable fields left
+# out of an update are cleared, so these are always sent back.
+UPDATABLE_SNIPPET_FIELDS = ('title', 'description', 'tags', 'categoryId', 'defaultLanguage', 'defaultAudioLanguage')
+
+# The ETag covers every part that was fetched; with statistics it changes on each view and would
+# never match, so it is only kept for items fetched with part='snippet' alone.
+_SNIPPET_ONLY_KEYS = {'kind', 'etag', 'id', 'snippet'}
+
+def _updatable(snippet):
+    return {field: snippet[field] for field in UPDATABLE_SNIPPET_FIELDS if field in snippet}
+
+def _tags(value):
+    """Tags as the list the API expects; suggestions store either a list or a comma-separated string."""
+    if isinstance(value, str):
+        return [tag.strip() for tag in value.split(',') if tag.strip()]
+    return list(value or [])
+
+def list_videos(service, video_ids):
+    """{video_id: videos.list item (part='snippet')} for the ids that exist, PAGE_SIZE ids per call."""
+    video_ids = list(video_ids)
+    videos = {}
+    for start in range(0, len(video_ids), PAGE_SIZE):
+        response = service.videos().list(
+            id=','.join(video_ids[start:start + PAGE_SIZE]), part='snippet', maxResults=PAGE_SIZE
+        ).execute()
+        videos.update((item['id'], item) for item in response.get('items', []))
+    return videos
+
+def original_data(video):
+    """original_data for a pending review, from a videos.list item: the metadata shown in the
+    review plus the updatable snippet and, for snippet-only items, the ETag to apply it with."""
+    snippet = video['snippet']
+    return {
+        'current_title': snippet['title'],
+        'current_description': snippet.get('description', ''),
+        'current_tags': snippet.get('tags', []),
+        'snippet': _updatable(snippet),
+        'etag': video.get('etag') if video.keys() <= _SNIPPET_ONLY_KEYS else None,
+    }
+
+def stored_version(data):
+    """(snippet, etag) saved with a review, or None if the review predates them or has no ETag."""
+    snippet, etag = data.get('snippet'), data.get('etag')
+    if not etag or not snippet or 'categoryId' not in snippet:
+        return None
+    return snippet, etag
+
+def current_version(video):
+    """(snippet, etag) of a freshly fetched videos.list item (part='snippet')."""
+    return _updatable(video['snippet']), video.get('etag')
+
+def update_request(service, video_id, version, title, description, tags):
+    """videos.update request writing the metadata over version = (snippet, etag), sent with If-Match."""
+    snippet, etag = version
+    request = service.videos().update(part='snippet', body={
+        'id': video_id,
+        'snippet': dict(snippet, title=title, description=description, tags=_tags(tags))
+    })
+    if etag:
+        request.headers['If-Match'] = etag
+    return request
+
+def is_conflict(error):
+    """True for the 412 YouTube returns when the If-Match ETag no longer matches the video."""
+    return getattr(getattr(error, 'resp', None), 'status', None) == 412
+
+def update(service, video_id, title, description, tags, stored=None):
+    """Writes a video's title, description and tags.
+
+    stored: the review's original_data; its snippet and ETag are used when present, and the video
+    is fetched only without them or after a conflict. Returns False if the video doesn't exist;
+    API errors are raised.
+    """
+    version = stored_version(stored or {})
+    if version:
+        try:
+            update_request(service, video_id, version, title, description, tags).execute()
+            return True
+        except Exception as e:
+            if not is_conflict(e):
+                raise
+
+    video = list_videos(service, [video_id]).get(video_id)
+    if video is None:
+        return False
+    update_request(service, video_id, current_version(video), title, description, tags).execute()
+    return True
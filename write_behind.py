@@ -0,0 +1,301 @@
+import os
+import json
+import time
+import atexit
+import contextlib
+import sqlite3
+import threading
+
+import auth
+import database
+
+# Durable write-behind queue for writes the UI doesn't need to wait for (history entries,
+# deleting approved/rejected reviews). Writes are acknowledged once they are in a local SQLite
+# file and flushed to the database in batches by a background thread. Anything still queued at
+# shutdown is drained by an atexit hook, and whatever is left is flushed on the next start.
+#
+# The queue file holds no credentials. The Supabase session a user's writes run as (RLS) is kept
+# in memory only, refreshed by each write the user queues. Writes left without a usable session
+# (after a restart, or once it expired) wait for the user's next write or visit to the reviews
+# page, and are marked failed after SESSION_WAIT. Failed rows are deleted after FAILED_RETENTION.
+QUEUE_PATH = os.environ.get("WRITE_QUEUE_PATH", "write_queue.db")
+FLUSH_INTERVAL = 0.5 # seconds between flushes when idle
+BATCH_SIZE = 200
+MAX_ATTEMPTS = 8
+RETRY_BACKOFF = 2 # seconds, doubled per attempt
+MAX_RETRY_DELAY = 300
+DRAIN_TIMEOUT = 15
+SESSION_WAIT = 24 * 3600 # seconds a write may wait for its user's session
+FAILED_RETENTION = 7 * 24 * 3600 # seconds failed rows are kept for inspection
+PURGE_INTERVAL = 600
+
+OP_ADD_HISTORY = "add_optimization_history"
+OP_DELETE_PENDING = "delete_pending_review"
+
+SCHEMA = """
+create table if not exists ops (
+    id integer primary key autoincrement,
+    op text not null,
+    user_id text not null,
+    payload text not null,
+    attempts integer not null default 0,
+    next_attempt real not null default 0,
+    failed integer not null default 0,
+    last_error text,
+    created_at real not null
+);
+create index if not exists ops_due_idx on ops (failed, next_attempt, id);
+"""
+
+class WriteBehindQueue:
+    """Queues database writes locally and applies them in the background."""
+
+    def __init__(self, path=QUEUE_PATH, flush_interval=FLUSH_INTERVAL, batch_size=BATCH_SIZE):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("pragma journal_mode=wal")
+        self._conn.executescript(SCHEMA)
+        self._sessions = {} # user_id -> (access_token, refresh_token), memory only
+        # Users whose writes are parked until a session shows up, including rows parked before a
+        # restart (parked rows wait SESSION_WAIT, far beyond any retry backoff)
+        self._waiting_users = {row[0] for row in self._conn.execute(
+            "select distinct user_id from ops where not failed and next_attempt > ?", (time.time() + MAX_RETRY_DELAY,)
+        )}
+        self._last_purge = 0
+        self._db_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """begin/commit on the autocommit connection, rolled back if anything fails. Hold _db_lock."""
+        self._conn.execute("begin")
+        try:
+            yield
+            self._conn.execute("commit")
+        except BaseException:
+            # Left open, the transaction would swallow every later enqueue and break the next begin
+            if self._conn.in_transaction:
+                self._conn.execute("rollback")
+            raise
+
+    # --- Producer side ---
+    def remember_session(self, user_id, tokens):
+        """Keeps the user's session (in memory) for their queued writes and releases any that waited for one."""
+        if not tokens:
+            return
+        with self._db_lock:
+            self._sessions[user_id] = tuple(tokens)
+            if user_id in self._waiting_users:
+                self._waiting_users.discard(user_id)
+                self._conn.execute("update ops set next_attempt = 0 where user_id = ? and not failed", (user_id,))
+        self._wakeup.set()
+
+    def enqueue(self, op, user_id, payload, tokens=None):
+        """Stores a write durably and returns its id. tokens: (access_token, refresh_token) to run it as."""
+        self.remember_session(user_id, tokens)
+        with self._db_lock:
+            cursor = self._conn.execute(
+                "insert into ops (op, user_id, payload, created_at) values (?, ?, ?, ?)",
+                (op, user_id, json.dumps(payload), time.time())
+            )
+        self._wakeup.set()
+        return cursor.lastrowid
+
+    def enqueue_many(self, op, user_id, payloads, tokens=None):
+        """Stores several writes of one op in a single local transaction."""
+        self.remember_session(user_id, tokens)
+        now = time.time()
+        with self._db_lock, self._transaction():
+            self._conn.executemany(
+                "insert into ops (op, user_id, payload, created_at) values (?, ?, ?, ?)",
+                [(op, user_id, json.dumps(payload), now) for payload in payloads]
+            )
+        self._wakeup.set()
+
+    def add_optimization_history(self, user_id, video_id, video_title, action_taken, details=None, tokens=None):
+        """Queued version of database.add_optimization_history."""
+        return self.enqueue(OP_ADD_HISTORY, user_id, {
+            "video_id": video_id,
+            "video_title": video_title,
+            "action_taken": action_taken,
+            "details": details
+        }, tokens)
+
+    def delete_pending_review(self, user_id, video_id, tokens=None):
+        """Queued version of database.delete_pending_review."""
+        return self.enqueue(OP_DELETE_PENDING, user_id, {"video_id": video_id}, tokens)
+
+    def add_optimization_history_bulk(self, user_id, entries, tokens=None):
+        """Queued version of database.add_optimization_history_bulk."""
+        self.enqueue_many(OP_ADD_HISTORY, user_id, [{
+            "video_id": entry['video_id'],
+            "video_title": entry.get('video_title'),
+            "action_taken": entry['action_taken'],
+            "details": entry.get('details')
+        } for entry in entries], tokens)
+
+    def delete_pending_reviews(self, user_id, video_ids, tokens=None):
+        """Queued version of database.delete_pending_reviews."""
+        self.enqueue_many(OP_DELETE_PENDING, user_id, [{"video_id": video_id} for video_id in video_ids], tokens)
+
+    def queued_video_ids(self, user_id, op, tokens=None):
+        """Video ids with a queued (not yet flushed) op for this user, e.g. reviews being deleted."""
+        self.remember_session(user_id, tokens)
+        with self._db_lock:
+            rows = self._conn.execute(
+                "select payload from ops where user_id = ? and op = ? and not failed", (user_id, op)
+            ).fetchall()
+        return {json.loads(payload)['video_id'] for (payload,) in rows}
+
+    def pending_count(self):
+        with self._db_lock:
+            return self._conn.execute("select count(*) from ops where not failed").fetchone()[0]
+
+    # --- Consumer side ---
+    def start(self):
+        self.purge()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="write-behind", daemon=True)
+            self._thread.start()
+
+    def _loop(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                while self.flush():
+                    pass
+                if time.time() - self._last_purge > PURGE_INTERVAL:
+                    self.purge()
+            except Exception as e:
+                print(f"Erro na fila de gravação: {e}")
+
+    def purge(self):
+        """Fails writes that waited too long for a session and deletes old failed rows."""
+        now = time.time()
+        with self._db_lock, self._transaction():
+            expired = self._conn.execute(
+                "update ops set failed = 1, last_error = 'Sessão expirada' where not failed and created_at < ?",
+                (now - SESSION_WAIT,)
+            ).rowcount
+            self._conn.execute("delete from ops where failed and created_at < ?", (now - FAILED_RETENTION,))
+        self._last_purge = now
+        if expired:
+            print(f"{expired} gravação(ões) descartada(s): o usuário não voltou a ter uma sessão válida em {SESSION_WAIT // 3600} h.")
+
+    def _session(self, user_id):
+        """The context a user's writes run in, or None if the backend needs a session and there is no valid one."""
+        if not database.get_backend().requires_session:
+            return contextlib.nullcontext()
+        tokens = self._sessions.get(user_id)
+        if tokens is not None:
+            with auth.bind_session(*tokens):
+                if auth.get_authenticated_client() is not None:
+                    return auth.bind_session(*tokens)
+            # Refresh token rotated or revoked: retrying can't help, wait for a fresh session
+            print(f"Sessão expirada para o usuário {user_id}; as gravações dele aguardam um novo login.")
+            self._sessions.pop(user_id, None)
+        return None
+
+    def flush(self):
+        """Applies one batch of due writes. Returns how many ops were attempted."""
+        with self._flush_lock:
+            with self._db_lock:
+                rows = self._conn.execute(
+                    "select id, op, user_id, payload, attempts from ops "
+                    "where not failed and next_attempt <= ? order by id limit ?",
+                    (time.time(), self.batch_size)
+                ).fetchall()
+            if not rows:
+                return 0
+
+            # Group by op and user, one backend call per group
+            groups = {}
+            for row in rows:
+                groups.setdefault((row[1], row[2]), []).append(row)
+
+            done, retry, waiting = [], [], []
+            for (op, user_id), group in groups.items():
+                session = self._session(user_id)
+                if session is None:
+                    waiting.extend(group)
+                    self._waiting_users.add(user_id)
+                    continue
+                try:
+                    with session:
+                        failed = self._apply(op, user_id, [json.loads(row[3]) for row in group])
+                except Exception as e:
+                    failed = {i: str(e) for i in range(len(group))}
+                for i, row in enumerate(group):
+                    if i in failed:
+                        retry.append((row, failed[i]))
+                    else:
+                        done.append(row[0])
+
+            self._finish(done, retry, waiting)
+            return len(rows)
+
+    def _apply(self, op, user_id, payloads):
+        """Runs one group of writes. Returns {index: error} for the ones that failed."""
+        if op == OP_ADD_HISTORY:
+            saved_ids, failed = database.add_optimization_history_bulk(user_id, payloads)
+            return {i: failed[p['video_id']] for i, p in enumerate(payloads) if p['video_id'] in failed}
+        if op == OP_DELETE_PENDING:
+            if database.delete_pending_reviews(user_id, [p['video_id'] for p in payloads]):
+                return {}
+            return {i: "Falha ao deletar pendências" for i in range(len(payloads))}
+        return {i: f"Operação desconhecida: {op}" for i in range(len(payloads))}
+
+    def _finish(self, done, retry, waiting=()):
+        now = time.time()
+        with self._db_lock, self._transaction():
+            self._conn.executemany("delete from ops where id = ?", [(op_id,) for op_id in done])
+            # Parked until remember_session releases them, or until purge expires them
+            self._conn.executemany("update ops set next_attempt = ? where id = ?",
+                                   [(now + SESSION_WAIT, row[0]) for row in waiting])
+            for row, error in retry:
+                attempts = row[4] + 1
+                if attempts >= MAX_ATTEMPTS:
+                    print(f"Gravação {row[1]} ({row[0]}) marcada como falha após {attempts} tentativas: {error}")
+                delay = min(RETRY_BACKOFF * 2 ** attempts, MAX_RETRY_DELAY)
+                self._conn.execute(
+                    "update ops set attempts = ?, next_attempt = ?, failed = ?, last_error = ? where id = ?",
+                    (attempts, now + delay, int(attempts >= MAX_ATTEMPTS), error, row[0])
+                )
+
+    def drain(self, timeout=DRAIN_TIMEOUT):
+        """Flushes until nothing is due or the timeout expires (used at shutdown). Returns ops left."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                if not self.flush():
+                    break
+            except Exception as e:
+                print(f"Erro ao esvaziar a fila de gravação: {e}")
+                break
+        return self.pending_count()
+
+    def stop(self, timeout=DRAIN_TIMEOUT):
+        self._stopped.set()
+        self._wakeup.set()
+        left = self.drain(timeout)
+        if left:
+            print(f"{left} gravação(ões) pendente(s) na fila; serão enviadas na próxima inicialização.")
+        return left
+
+_queue = None
+_queue_lock = threading.Lock()
+
+def get_queue():
+    """Returns the process-wide queue, started on first use and drained at exit."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = WriteBehindQueue()
+            _queue.start()
+            atexit.register(_queue.stop)
+        return _queue
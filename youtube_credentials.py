@@ -0,0 +1,130 @@
+import os
+import json
+import datetime
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from google.auth.exceptions import RefreshError
+from google.oauth2.credentials import Credentials
+from google.auth.transport.requests import Request
+
+import auth
+import database
+
+CLIENT_SECRETS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "client_secret.json")
+REFRESH_MARGIN = datetime.timedelta(minutes=5) # refresh a bit before Google rejects the token
+
+@functools.lru_cache(maxsize=4)
+def _parse_client_config(path, mtime):
+    try:
+        with open(path, 'r') as f:
+            client_config = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    # Handle both "web" and "installed" formats
+    config_data = client_config.get('web') or client_config.get('installed') or {}
+    return {
+        "client_id": config_data.get('client_id'),
+        "client_secret": config_data.get('client_secret')
+    }
+
+def get_client_config(path=CLIENT_SECRETS_FILE):
+    """Returns {client_id, client_secret} from client_secret.json, re-parsed only when the file changes."""
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {}
+    return dict(_parse_client_config(path, mtime))
+
+def _needs_refresh(creds):
+    if not creds.token:
+        return True
+    # google-auth keeps expiry as naive UTC
+    return creds.expiry is not None and creds.expiry - REFRESH_MARGIN <= datetime.datetime.utcnow()
+
+class CredentialManager:
+    """Keeps live YouTube OAuth credentials in memory per user.
+
+    The token is read from the database once per user; afterwards the same Credentials object is
+    reused and only refreshed when it is about to expire. Refreshed tokens are saved in the
+    background so the caller doesn't wait for the database.
+    """
+
+    def __init__(self, scopes):
+        self.scopes = scopes
+        self._creds = {}
+        self._user_locks = {}
+        self._lock = threading.Lock()
+        self._persist_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="token-persist")
+
+    def _user_lock(self, user_id):
+        with self._lock:
+            return self._user_locks.setdefault(user_id, threading.Lock())
+
+    def _load(self, user_id, client_config=None):
+        token_data = database.get_youtube_token(user_id)
+        if not token_data:
+            return None
+        # Inject client_id and client_secret from the session settings, or from the file if available
+        client_config = client_config or get_client_config()
+        token_data = {**token_data, **{k: v for k, v in client_config.items() if v}}
+        return Credentials.from_authorized_user_info(token_data, self.scopes)
+
+    def get_credentials(self, user_id, session_tokens=None, client_config=None):
+        """Returns valid credentials for the user, or None if the channel isn't connected.
+
+        session_tokens: (access_token, refresh_token) of the user's Supabase session, used to save a
+        refreshed token from the background thread. client_config: {client_id, client_secret} from
+        the session settings; client_secret.json is used when it's None. Raises if Google rejects
+        the refresh.
+        """
+        with self._user_lock(user_id):
+            creds = self._creds.get(user_id)
+            if creds is None:
+                creds = self._load(user_id, client_config)
+                if creds is None:
+                    return None
+
+            if _needs_refresh(creds):
+                if not creds.refresh_token:
+                    self._creds.pop(user_id, None)
+                    return None
+                try:
+                    creds.refresh(Request())
+                except RefreshError:
+                    # invalid_grant: revoked or replaced by a reconnection, so reload from the DB next time
+                    self.invalidate(user_id)
+                    raise
+                self._persist_executor.submit(self._persist, user_id, creds.to_json(), session_tokens)
+
+            self._creds[user_id] = creds
+            return creds
+
+    def _persist(self, user_id, token_json, session_tokens):
+        try:
+            if session_tokens:
+                with auth.bind_session(*session_tokens):
+                    saved = database.save_youtube_token(user_id, json.loads(token_json))
+            else:
+                saved = database.save_youtube_token(user_id, json.loads(token_json))
+            if not saved:
+                print(f"Token do YouTube atualizado, mas não foi salvo ({user_id}).")
+        except Exception as e:
+            print(f"Erro ao salvar token do YouTube ({user_id}): {e}")
+
+    def invalidate(self, user_id):
+        """Drops the in-memory credentials (after a reconnection, or a refresh Google rejected)."""
+        with self._lock:
+            self._creds.pop(user_id, None)
+
+_manager = None
+_manager_lock = threading.Lock()
+
+def get_manager(scopes):
+    """Returns the process-wide credential manager."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = CredentialManager(scopes)
+        return _manager
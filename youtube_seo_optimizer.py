@@ -3,16 +3,17 @@ import time
 import datetime
 import logging
 import schedule
-import json
-import google.generativeai as genai
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
 
 # Import Database Module
+import auth
 import database
+import youtube_credentials
+import gemini_client
+import dashboard_snapshot
+import video_metadata
 
 # --- Configuration ---
 SCOPES = [
@@ -35,29 +36,16 @@ def get_authenticated_service(user_id):
     """
     Authenticates with YouTube Data API using credentials from DB.
     """
-    creds = None
-    
-    # Load from DB
-    token_data = database.get_youtube_token(user_id)
-    if token_data:
-        try:
-            creds = Credentials.from_authorized_user_info(token_data, SCOPES)
-        except Exception as e:
-            logging.error(f"Error loading credentials for user {user_id}: {e}")
-            return None
-    
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            try:
-                creds.refresh(Request())
-                # Update DB with refreshed token
-                database.save_youtube_token(user_id, json.loads(creds.to_json()))
-            except Exception as e:
-                logging.error(f"Error refreshing token for user {user_id}: {e}")
-                return None
-        else:
-            logging.warning(f"No valid credentials for user {user_id}")
-            return None
+    try:
+        # Cached per user across cycles; refreshed only near expiry
+        creds = youtube_credentials.get_manager(SCOPES).get_credentials(user_id)
+    except Exception as e:
+        logging.error(f"Error refreshing token for user {user_id}: {e}")
+        return None
+
+    if not creds:
+        logging.warning(f"No valid credentials for user {user_id}")
+        return None
 
     try:
         service = build(API_SERVICE_NAME, API_VERSION, credentials=creds)
@@ -85,8 +73,8 @@ def optimize_metadata_with_llm(user_id, title, description, tags):
         logging.error(f"Google API Key not found for user {user_id}")
         return None, None, None
 
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel(model_name)
+    # Bound to this user's key; genai.configure() would switch the key for every user in the process
+    model = gemini_client.generative_model(api_key, model_name)
 
     prompt = f"""
     Act as a YouTube SEO Expert. Optimize the following video metadata for high Click-Through Rate (CTR) and viral potential.
@@ -197,7 +185,7 @@ def get_video_ctr(service, video_id):
 
 def should_optimize(user_id, video_id):
     """Checks if video should be optimized based on DB history."""
-    history = database.get_optimization_history(user_id)
+    history = database.get_optimization_history(user_id, video_ids=[video_id])
     if video_id not in history:
         return True
     
@@ -244,7 +232,7 @@ def job():
         videos = get_all_videos(service)
         print(f"  Found {len(videos)} videos.")
         
-        videos_processed = 0
+        pending_batch = []
         for video in videos:
             video_id = video['id']
             snippet = video['snippet']
@@ -262,23 +250,29 @@ def job():
             new_title, new_desc, new_tags = optimize_metadata_with_llm(user_id, title, description, tags)
             
             if new_title and new_desc:
-                # Save to Pending
-                database.add_pending_review(
-                    user_id, 
-                    video_id, 
-                    {'current_title': title, 'current_description': description, 'current_tags': tags},
-                    {'new_title': new_title, 'new_description': new_desc, 'new_tags': new_tags}
-                )
-                
-                # Update History
-                database.add_optimization_history(user_id, video_id, title, "analyzed", {"timestamp": datetime.datetime.now().isoformat()})
-                videos_processed += 1
+                pending_batch.append({
+                    'video_id': video_id,
+                    'original_data': video_metadata.original_data(video),
+                    'suggested_data': {'new_title': new_title, 'new_description': new_desc, 'new_tags': new_tags}
+                })
             
             # Limit to 1 video per run per user to avoid quota issues? Or run all?
             # Original script ran all. Let's stick to that but maybe limit to avoid timeouts.
             # Let's process just 1 for now to be safe and incremental.
             break # Process only one video per cycle as per original "next video" logic hint
         
+        # Save to Pending and update History, one request each for the whole batch
+        if pending_batch:
+            saved_ids, failed = database.add_pending_reviews_bulk(user_id, pending_batch)
+            database.add_optimization_history_bulk(user_id, [{
+                'video_id': item['video_id'],
+                'video_title': item['original_data']['current_title'],
+                'action_taken': "analyzed",
+                'details': {"timestamp": datetime.datetime.now().isoformat()}
+            } for item in pending_batch if item['video_id'] in saved_ids])
+            if failed:
+                logging.error(f"User {user_id}: {len(failed)} pending review(s) not saved: {failed}")
+
         # Update Next Run
         freq = settings.get('frequency', 24)
         new_next_run = (datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(hours=freq)).isoformat()
@@ -287,12 +281,34 @@ def job():
 
     logging.info("Job finished.")
 
+def refresh_dashboards():
+    """Recomputes the home page snapshot of every user with a connected channel."""
+    user_ids = database.get_youtube_connected_users()
+    logging.info(f"Refreshing {len(user_ids)} dashboard snapshot(s)...")
+    for user_id in user_ids:
+        try:
+            creds = youtube_credentials.get_manager(SCOPES).get_credentials(user_id)
+        except Exception as e:
+            logging.error(f"Error refreshing token for user {user_id}: {e}")
+            continue
+        if not creds:
+            continue
+        service = build(API_SERVICE_NAME, API_VERSION, credentials=creds)
+        if dashboard_snapshot.refresh(user_id, service, creds) is None:
+            logging.error(f"Dashboard snapshot failed for user {user_id}")
+
 def main():
+    # No user is logged in here: storage goes through the service-role key
+    if not auth.enable_service_role() and database.get_backend().requires_session:
+        logging.warning("SUPABASE_SERVICE_ROLE_KEY not set: the worker can't read or write user data through RLS")
+
     # Run once immediately
     job()
+    refresh_dashboards()
     
     # Schedule
     schedule.every(10).minutes.do(job) # Check every 10 mins
+    schedule.every(dashboard_snapshot.REFRESH_INTERVAL_MINUTES).minutes.do(refresh_dashboards)
     
     print("Script started. Checking every 10 minutes.")
     